@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 17:35:42
+
+Comments : runs the headless command line interface (see HAL.cli)
+"""
+
+# %% IMPORTS
+
+# -- global
+import sys
+
+# -- local
+from .cli import main
+
+# %% RUN
+sys.exit(main())
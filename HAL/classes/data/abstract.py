@@ -6,6 +6,7 @@ Created  : 2021-04-21 15:38:07
 Comments : Abstract classes for data handling
 """
 # %% IMPORTS
+import re
 from pathlib import Path
 
 
@@ -13,9 +14,37 @@ from pathlib import Path
 class AbstractData(object):
     """Abstract Data object, to use as a model"""
 
+    # data class name : declared at the class level, so that it can be read
+    # without instantiating the class (see HAL.loader.modules)
+    name = "Abstract Data"
+
+    # class-level name filter : OPTIONAL !
+    # data classes can declare the file suffixes they accept, for instance
+    # (".png", ".tif"), and/or a regular expression the file name should match.
+    # These are checked without instantiating the class, which makes folder
+    # scanning much faster. When declared, they are used by the default
+    # filter() method and replace it when scanning folders.
+    file_suffixes = None
+    file_name_pattern = None
+
+    @classmethod
+    def hasNameFilter(cls):
+        """returns True if a class-level name filter is declared"""
+        return cls.file_suffixes is not None or cls.file_name_pattern is not None
+
+    @classmethod
+    def filterName(cls, name):
+        """checks a file name against the class-level name filter"""
+        if cls.file_suffixes is not None:
+            if not name.endswith(tuple(cls.file_suffixes)):
+                return False
+        if cls.file_name_pattern is not None:
+            if re.fullmatch(cls.file_name_pattern, name) is None:
+                return False
+        return True
+
     def __init__(self):
 
-        self.name = "Abstract Data"
         self.dimension = None  # should be 1, 2 or 3
         self.path = Path(".")
         self.pixel_scale = ()  # should be a tuple, with same size as dimension
@@ -25,7 +54,7 @@ class AbstractData(object):
 
     def filter(self):
         """should filter from name"""
-        return True
+        return self.filterName(self.path.name)
 
     def getDisplayName(self):
         """returns the name to be displayed"""
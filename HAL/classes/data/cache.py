@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 11:20:05
+
+Comments : in-memory cache for loaded data objects. Loaded data is stored in
+           a LRU cache, bounded by a memory budget, and the data can be loaded
+           in advance (prefetched) in a background thread, so that browsing
+           through a sequence of runs does not wait for file decoding.
+"""
+
+# %% IMPORTS
+
+# -- global
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# -- logger
+logger = logging.getLogger(__name__)
+
+
+# %% CLASS DEFINITION
+
+
+class DataCache(object):
+    """LRU cache of loaded data objects, with background prefetching.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        memory budget for the cached data, in bytes
+    """
+
+    def __init__(self, max_size=500 * 1024**2):
+        self.max_size = max_size
+        self.size = 0
+        self._cache = OrderedDict()  # {key: (data object, size)}
+        self._pending = {}  # {key: future}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    # == TOOLS
+
+    def _key(self, data_class, path):
+        """returns the cache key for a given file. The key contains the
+        modification time and size of the file, so that modified files are
+        loaded again. Returns None if the file does not exist"""
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return (data_class, str(path), st.st_mtime_ns, st.st_size)
+
+    def _load(self, data_class, path):
+        """loads a data object. Returns None if the file is filtered out by
+        the data class"""
+        data = data_class()
+        data.path = path
+        if not data.filter():
+            return None
+        data.load()
+        return data
+
+    def _store(self, key, data):
+        """stores a data object, and removes the least recently used ones if
+        the memory budget is exceeded"""
+        if data is None:
+            return
+        size = np.asarray(data.data).nbytes
+        if size > self.max_size:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = (data, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, old_size) = self._cache.popitem(last=False)
+                self.size -= old_size
+
+    def _prefetch_task(self, key, data_class, path):
+        """loads and stores a data object (run in the background thread)"""
+        try:
+            data = self._load(data_class, path)
+            self._store(key, data)
+            return data
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    # == PUBLIC METHODS
+
+    def get(self, data_class, path):
+        """returns the data object for a given file, loaded with the given
+        data class. If the file is not in the cache, it is loaded (or, if it
+        is being prefetched, we wait for the prefetch to finish).
+        Returns None if the file is filtered out or does not exist"""
+        path = Path(path)
+        key = self._key(data_class, path)
+        if key is None:
+            return None
+
+        # -- in cache ?
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key][0]
+            future = self._pending.get(key, None)
+
+        # -- being prefetched ?
+        if future is not None and not future.cancelled():
+            try:
+                data = future.result()
+            except Exception as e:
+                logger.debug(f"prefetch failed for '{path}' : {e}")
+            else:
+                if data is not None:
+                    return data
+
+        # -- load
+        data = self._load(data_class, path)
+        self._store(key, data)
+        return data
+
+    def prefetch(self, data_class, path_list):
+        """loads a list of files in the background. Pending prefetches for
+        files that are not in the list are cancelled (if not started)"""
+        keys = OrderedDict()
+        for path in path_list:
+            path = Path(path)
+            key = self._key(data_class, path)
+            if key is not None:
+                keys[key] = path
+
+        with self._lock:
+            # cancel the previous requests that are no longer needed
+            for key in list(self._pending):
+                if key not in keys and self._pending[key].cancel():
+                    self._pending.pop(key)
+            # submit new ones
+            for key, path in keys.items():
+                if key in self._cache or key in self._pending:
+                    continue
+                future = self._executor.submit(
+                    self._prefetch_task, key, data_class, path
+                )
+                self._pending[key] = future
+
+    def clear(self):
+        """empties the cache"""
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._cache.clear()
+            self.size = 0
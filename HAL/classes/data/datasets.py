@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 17:31:08
+
+Comments : tools to read the datasets saved by HAL (json files stored in the
+           '.datasets' subfolder of a data folder, or in ~/.HAL/datasets)
+           The DatasetRegistry keeps the paths of the datasets already read,
+           so that they are only parsed again when the json file is modified
+"""
+
+# %% IMPORTS
+
+# -- global
+import json
+import logging
+import os
+import re
+from pathlib import Path
+
+# -- logger
+logger = logging.getLogger(__name__)
+
+# %% GLOBAL VARIABLES
+
+DATASET_FOLDER_NAME = ".datasets"
+
+
+# %% FUNCTIONS
+
+
+def get_dataset_paths(set_json, data_root):
+    """returns the list of paths contained in a dataset (loaded json content).
+    The "root tag" (if any) at the beginning of the paths is replaced by the
+    local data root"""
+    json_paths = set_json.get("paths", [])
+    if "root tag" in set_json:
+        root = str(Path(data_root).expanduser())
+        pattern = "^%s" % set_json["root tag"]
+        json_paths = [re.sub(pattern, root, p) for p in json_paths]
+    return [Path(p) for p in json_paths]
+
+
+def read_dataset(dataset_file, data_root):
+    """reads a dataset json file, and returns the list of its paths (see
+    get_dataset_paths())"""
+    set_json = json.loads(Path(dataset_file).read_text())
+    return get_dataset_paths(set_json, data_root)
+
+
+# %% CLASS DEFINITION
+
+
+class DatasetRegistry(object):
+    """caches the (resolved) paths of the dataset json files. A dataset is
+    read again only if its json file was modified, or if the data root
+    changed"""
+
+    def __init__(self):
+        # {dataset file: ((mtime_ns, size), data_root, paths)}
+        self._datasets = {}
+
+    def clear(self):
+        self._datasets = {}
+
+    def getPaths(self, dataset_file, data_root):
+        """returns the list of paths contained in a dataset (see
+        get_dataset_paths()), or None if the dataset file does not exist"""
+        dataset_file = Path(dataset_file)
+        try:
+            st = os.stat(dataset_file)
+        except OSError:
+            self._datasets.pop(dataset_file, None)
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        data_root = str(data_root)
+        cached = self._datasets.get(dataset_file, None)
+        if cached is not None and cached[:2] == (signature, data_root):
+            return list(cached[2])
+        # (re)load
+        logger.debug(f"reading dataset '{dataset_file}'")
+        paths = read_dataset(dataset_file, data_root)
+        self._datasets[dataset_file] = (signature, data_root, paths)
+        return list(paths)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 11:52:37
+
+Comments : fast data folder scanning, based on os.scandir(). File types and
+           modification times are taken from the directory entries, and the
+           data classes name filter (see AbstractData.filterName) is used
+           when available, so that no data object is created per file.
+"""
+
+# %% IMPORTS
+
+# -- global
+import os
+from pathlib import Path
+
+# %% FUNCTIONS
+
+
+def _get_file_filter(data_class=None):
+    """returns a function that checks whether a file name is accepted by the
+    data class"""
+    # if no data class is provided : take all !
+    if data_class is None:
+        return lambda folder, name: True
+    # use class-level name filter if available
+    if data_class.hasNameFilter():
+        return lambda folder, name: data_class.filterName(name)
+
+    # otherwise, use the filter() method
+    def _filter(folder, name):
+        data = data_class()
+        data.path = folder / name
+        return data.filter()
+
+    return _filter
+
+
+def scan_folder(folder, data_class=None, sort_by_time=False):
+    """scans a folder, and returns the list of data files and the list of
+    subfolders (hidden folders are ignored)
+
+    Parameters
+    ----------
+    folder : Path
+        the folder to scan
+    data_class : class, optional
+        if provided, only the files accepted by this data class are kept
+    sort_by_time : bool, optional
+        if True, the files are sorted by modification time, otherwise by name.
+        In both cases, the last one comes first.
+
+    Returns
+    -------
+    file_list, subdir_list : lists of Path
+    """
+    folder = Path(folder)
+    file_filter = _get_file_filter(data_class)
+    files = []
+    subdir_list = []
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        # ignore hidden folders
+                        if not entry.name.startswith("."):
+                            subdir_list.append(folder / entry.name)
+                    elif entry.is_file() and file_filter(folder, entry.name):
+                        mtime = entry.stat().st_mtime if sort_by_time else 0
+                        files.append((mtime, entry.name))
+                except OSError:
+                    continue
+    except OSError:
+        return [], []
+
+    # sort (on names : much faster than comparing Path objects)
+    files.sort(reverse=True)
+    subdir_list.sort(reverse=True)
+    file_list = [folder / name for _, name in files]
+
+    return file_list, subdir_list
+
+
+def scan_day_folder(folder, data_class=None):
+    """scans a day folder, and its subfolders (sequences). Files in the day
+    folder are sorted by name, files in the subfolders by modification time
+    (most recent first). Returns a list of dictionnaries, with keys "name",
+    "path" and "file_list", the first one corresponding to the day folder
+    itself"""
+    folder = Path(folder)
+    if not folder.is_dir():
+        return []
+
+    # -- current dir
+    file_list, subdir_list = scan_folder(folder, data_class)
+    dir_content = [{"name": ".", "path": folder, "file_list": file_list}]
+
+    # -- subdirs
+    for subdir in subdir_list:
+        file_list, _ = scan_folder(subdir, data_class, sort_by_time=True)
+        content = {"name": subdir.name, "path": subdir, "file_list": file_list}
+        dir_content.append(content)
+
+    return dir_content
@@ -10,15 +10,19 @@ Comments : Abstract classes for data display, dedicated to image display !
 
 # -- global
 import logging
+import numpy as np
 import pyqtgraph as pg
 
 # -- local
 from .abstract import AbstractDisplay
+from ..fit.batch import get_roi_slices
 from .colormaps import get_pyqtgraph_lookuptable
 
 # -- logger
 logger = logging.getLogger(__name__)
 
+# %% GLOBAL VARIABLES
+
 # %% FUNCTIONS
 
 
@@ -43,6 +47,8 @@ class AbstractImageDisplay(AbstractDisplay):
         self.image_plot = None
         self.current_image = None
         self.current_data = None
+        self._data_buffer = None  # float buffer, reused for current_data
+        self._data_buffer_shared = False  # True if views of it were returned
         self._current_colormap = "Greiner"
         self._selected_ROI = None
 
@@ -77,10 +83,13 @@ class AbstractImageDisplay(AbstractDisplay):
             return
 
         # create roi object
+        # (snapped to the pixel grid, see getRegionData())
         new_roi = pg.RectROI(
             pos=[0, 0],
             size=[50, 50],
             rotatable=False,
+            translateSnap=True,
+            scaleSnap=True,
             pen=roi_style,
             hoverPen=roi_hover_style,
             handlePen=handle_style,
@@ -184,11 +193,58 @@ class AbstractImageDisplay(AbstractDisplay):
         if roi is None:
             return None, (None, None)
 
-        # get roi, image item and image data
+        return self.getRegionData(roi)
+
+    def _getRegionSlices(self, roi, data=None):
+        """returns the (x, y) slices of the data (current data by default)
+        covered by a roi, if the roi is axis-aligned. Returns None otherwise.
+        The roi boundaries are rounded to the nearest pixel and clipped to
+        the image, as in the batch fits (see batch.get_roi_slices())"""
+        image = self.current_image
+        if data is None:
+            data = self.current_data
+        if image is None or data is None:
+            return None
+        if roi.angle() != 0 or image.transform().isRotating():
+            return None
+
+        # roi boundaries, in image pixels
+        rect = roi.mapRectToItem(image, roi.boundingRect())
+        pos = (rect.left(), rect.top())
+        size = (rect.width(), rect.height())
+
+        return get_roi_slices(np.shape(data), pos, size)
+
+    def getRegionData(self, roi):
+        """returns the data contained in a roi (or background) object, and the
+        corresponding pixel coordinates, as Z, (X, Y)"""
         data = self.current_data
         image = self.current_image
 
-        # get the roi data
+        # -- fast path : axis-aligned roi
+        # the data is a (read-only) view of the current data, and the
+        # coordinates are broadcasted 1D arrays : no copy, no interpolation
+        slices = self._getRegionSlices(roi)
+        if slices is not None:
+            sx, sy = slices
+            Z = data[sx, sy]
+            if np.issubdtype(Z.dtype, np.floating):
+                Z = Z.view()
+                Z.flags.writeable = False
+                # the buffer should not be overwritten by the next image
+                if data is self._data_buffer:
+                    self._data_buffer_shared = True
+            else:
+                # same output type as getArrayRegion()
+                Z = Z.astype(float)
+            shape = Z.shape[:2]
+            x = np.arange(sx.start, sx.stop, dtype=float)
+            y = np.arange(sy.start, sy.stop, dtype=float)
+            X = np.broadcast_to(x[:, np.newaxis], shape)
+            Y = np.broadcast_to(y[np.newaxis, :], shape)
+            return Z, (X, Y)
+
+        # -- general case
         # use the convenient 'getArrayRegion' to retrieve selected image roi
         Z, XY = roi.getArrayRegion(data, image, returnMappedCoords=True)
 
@@ -198,6 +254,45 @@ class AbstractImageDisplay(AbstractDisplay):
 
         return Z, (X, Y)
 
+    def getBackgroundValue(self, image):
+        """returns the mean value of an image in the background area (0 if
+        there is no background)"""
+        if self.background is None:
+            return 0
+        slices = self._getRegionSlices(self.background, image)
+        if slices is not None:
+            background = image[slices]
+        else:
+            background, _ = self.background.getArrayRegion(
+                image, self.current_image, returnMappedCoords=True
+            )
+        if np.size(background) == 0:
+            return 0
+        return np.mean(background)
+
+    def setCurrentData(self, image):
+        """subtracts the background value from the image, and stores the
+        result as the current data, which is shared by the displayed image
+        and the roi data (see getROIData). To avoid allocating a new array for
+        each new image, the result is written in a float buffer, that is
+        reused as long as the image shape does not change, and no view of it
+        was returned by getRegionData() (the views could still be used, for
+        instance by a fit object). Returns the current data"""
+        image = np.asarray(image)
+        background_value = self.getBackgroundValue(image)
+        # get buffer
+        buffer = self._data_buffer
+        if buffer is None or buffer.shape != image.shape or self._data_buffer_shared:
+            buffer = np.empty(image.shape, dtype=float)
+            self._data_buffer = buffer
+            self._data_buffer_shared = False
+        # subtract background (in place)
+        np.subtract(image, background_value, out=buffer)
+        # store
+        self.current_data = buffer
+        self._data_in = image
+        return buffer
+
     # -- BACKGROUND MANAGEMENT
 
     def addBackground(
@@ -224,6 +319,8 @@ class AbstractImageDisplay(AbstractDisplay):
             pos=[0, 0],
             size=[30, 30],
             rotatable=False,
+            translateSnap=True,
+            scaleSnap=True,
             pen=background_style,
             hoverPen=background_hover_style,
             handlePen=handle_style,
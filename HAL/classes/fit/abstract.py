@@ -7,12 +7,15 @@ Comments : Abstract classes for data fitting
 """
 # %% IMPORTS
 import json
+import logging
 import jsbeautifier as jsb
 import numpy as np
 import scipy.optimize as opt
 import matplotlib.pyplot as plt
 from datetime import datetime
 
+# -- logger
+logger = logging.getLogger(__name__)
 
 # %% USEFUL : JSON ARRAY ENCODER
 
@@ -23,11 +26,33 @@ class NumpyArrayEncoder(json.JSONEncoder):
     """
 
     def default(self, obj):
-        if isinstance(obj, np.ndarray):
+        if isinstance(obj, (np.ndarray, np.generic)):
             return obj.tolist()
         return json.JSONEncoder.default(self, obj)
 
 
+# available formats for json export :
+# - "indent" : native json module, indented (fast, human readable)
+# - "compact" : native json module, no whitespace (fastest, smallest)
+# - "beautify" : beautified with jsbeautifier (slow, legacy HAL format)
+JSON_FORMATS = ("indent", "compact", "beautify")
+
+
+def format_json(dic, json_format="indent"):
+    """converts a dictionnary (that can contain numpy arrays) into a json
+    string, with one of the JSON_FORMATS formats"""
+    if json_format == "compact":
+        return json.dumps(
+            dic, ensure_ascii=False, cls=NumpyArrayEncoder, separators=(",", ":")
+        )
+    elif json_format == "indent":
+        return json.dumps(dic, ensure_ascii=False, cls=NumpyArrayEncoder, indent=4)
+    elif json_format == "beautify":
+        json_str = json.dumps(dic, ensure_ascii=False, cls=NumpyArrayEncoder)
+        return jsb.beautify(json_str)
+    raise ValueError(f"unknown json format '{json_format}' (use {JSON_FORMATS})")
+
+
 # %% FUNCTIONS
 
 
@@ -41,6 +66,11 @@ def Gauss1D(x, *p):
 class AbstractFit(object):
     """Abstract fit object, to use as a model"""
 
+    # fit name and version : declared at the class level, so that they can be
+    # read without instantiating the fit (see HAL.loader.modules)
+    name = "AbstractFit"
+    _version = "0.0"
+
     def __init__(self, **kwargs):
 
         # -- inputs
@@ -55,10 +85,8 @@ class AbstractFit(object):
         self.values = []  # list physical values computed from fit parameters
 
         # -- other attributes
-        self.name = "AbstractFit"
         self.formula_help = "f(x) = p[0] * x"
         self.parameters_help = "p = []"
-        self._version = "0.0"
 
     # == ACTUAL FITTING ==
 
@@ -93,6 +121,15 @@ class AbstractFit(object):
     def _fitfunc(self, x, *p):
         pass
 
+    # analytic jacobian of the fit function : OPTIONAL !
+    # if implemented in a fit model, as _jacobian(self, x, *p), it should
+    # return an array of shape (number of data points, number of parameters)
+    # containing the derivatives of _fitfunc() with respect to the parameters.
+    # It is then passed to the fitting routine, which otherwise estimates the
+    # jacobian by finite differences (that is, one extra evaluation of the fit
+    # function per parameter and per iteration)
+    _jacobian = None
+
     # == ANALYZE OF FIT PARAMETERS ==
 
     def compute_values(self):
@@ -117,13 +154,11 @@ class AbstractFit(object):
         out["values"] = self.values
         return out
 
-    def export_json_str(self):
-        """exports fit info and results as a json string"""
+    def export_json_str(self, json_format="indent"):
+        """exports fit info and results as a json string (see JSON_FORMATS)"""
         # get dictionnary
         out_dic = self.export_dic()
-        json_str = json.dumps(out_dic, ensure_ascii=False, cls=NumpyArrayEncoder)
-        json_str = jsb.beautify(json_str)
-        return json_str
+        return format_json(out_dic, json_format)
 
 
 # %% 2D ABSTRACT CLASSES
@@ -148,13 +183,95 @@ class Abstract2DFit(AbstractFit):
         # with N_phot_per_atom = 0.5 * Gamma * fluo_exposure_duration
         self.count_conversion_factor = 1
         self.converted_count_unit = ""
+        # binning : if > 1, the data is block-averaged by binning x binning
+        # pixels before fitting, which reduces the fit cost by ~binning**2.
+        # If binning_refinement is True, the fit is then refined on the full
+        # resolution data, starting from the binned fit result
+        self.binning = 1
+        self.binning_refinement = True
+
+    # separable models : OPTIONAL !
+    # models that are built from 1D functions of x and y (for instance a
+    # product of two gaussians) can implement _fitfunc_grid(self, x, y, *p),
+    # that evaluates the model on the rectilinear grid defined by the 1D
+    # coordinates x and y, and returns a (len(x), len(y)) array. When the data
+    # lies on such a grid, it is used for fitting instead of _fitfunc(), which
+    # avoids evaluating 1D functions on the full meshgrid. Likewise,
+    # _jacobian_grid(self, x, y, *p) can be implemented to replace _jacobian()
+    _fitfunc_grid = None
+    _jacobian_grid = None
+
+    def _get_grid_axes(self, X, Y):
+        """returns the 1D coordinates (x, y) if the 2D coordinates (X, Y) form
+        a rectilinear grid (X[i, j] = x[i] and Y[i, j] = y[j]), None
+        otherwise"""
+        if X.ndim != 2 or X.shape != Y.shape or X.size == 0:
+            return None
+        x = X[:, 0]
+        y = Y[0, :]
+        if np.all(X == x[:, np.newaxis]) and np.all(Y == y[np.newaxis, :]):
+            return x, y
+        return None
+
+    def _bin_data(self, x, y, z, binning):
+        """block-averages the data and coordinates (2D arrays) by binning x
+        binning pixels. Returns None if the data cannot be binned"""
+        if z.ndim != 2 or z.shape != x.shape or z.shape != y.shape:
+            return None
+        # trim to a multiple of the binning factor
+        nx = z.shape[0] // binning
+        ny = z.shape[1] // binning
+        if nx < 2 or ny < 2:
+            return None
+
+        def _bin(u):
+            u = u[: nx * binning, : ny * binning]
+            return u.reshape(nx, binning, ny, binning).mean(axis=(1, 3))
+
+        return _bin(x), _bin(y), _bin(z)
+
+    def _curve_fit(self, x, y, z, p0, **fit_options):
+        """fits z(x, y) with scipy.optimize.curve_fit, and returns (popt, pcov)"""
+        # ravel data, so that everything is 1D
+        z_rav = z.ravel()
+
+        # separable model on a rectilinear grid : use 1D coordinates
+        grid_axes = None
+        if self._fitfunc_grid is not None and z.shape == x.shape:
+            grid_axes = self._get_grid_axes(x, y)
+
+        if grid_axes is not None:
+            x_axis, y_axis = grid_axes
+
+            def fitfunc(x, *p):
+                return self._fitfunc_grid(x, y_axis, *p).ravel()
+
+            if self._jacobian_grid is not None:
+
+                def jacobian(x, *p):
+                    return self._jacobian_grid(x, y_axis, *p)
+
+                fit_options.setdefault("jac", jacobian)
+
+            xdata = x_axis
+
+        # otherwise : ravel coordinates
+        else:
+            fitfunc = self._fitfunc
+            # use analytic jacobian, if implemented
+            if self._jacobian is not None:
+                fit_options.setdefault("jac", self._jacobian)
+            xdata = (x.ravel(), y.ravel())
+
+        # do the fit
+        return opt.curve_fit(fitfunc, xdata, z_rav, p0=p0, **fit_options)
 
     def do_fit(self, **fit_options):
         """fits the data. Any keyword option is passed to the fitting routine
         (scipy.optimize.curve_fit)"""
 
         # -- check that the data and coordinates were provided
-        if self.z == [] or self.x == []:
+        if len(self.z) == 0 or len(self.x) == 0:
             return
 
         # -- prepare data
@@ -167,21 +284,28 @@ class Abstract2DFit(AbstractFit):
         y = np.asarray(y)
         z = np.asarray(z)
 
-        # ravel, so that everything is 1D
-        x_rav = x.ravel()
-        y_rav = y.ravel()
-        z_rav = z.ravel()
-
         # -- fit
         # guess
         p0 = self.guess  # guess
         if not p0:
             p0 = None
 
-        # do the fit
-        popt, pcov = opt.curve_fit(
-            self._fitfunc, (x_rav, y_rav), z_rav, p0=p0, **fit_options
-        )
+        # fit binned data
+        binned = None
+        if int(self.binning) > 1:
+            binned = self._bin_data(x, y, z, int(self.binning))
+        if binned is not None:
+            popt, pcov = self._curve_fit(*binned, p0, **fit_options)
+            # refine at full resolution
+            if self.binning_refinement:
+                try:
+                    popt, pcov = self._curve_fit(x, y, z, popt, **fit_options)
+                except RuntimeError as e:
+                    # keep the binned fit result
+                    logger.debug(f"full resolution refinement failed : {e}")
+        # or fit full resolution data
+        else:
+            popt, pcov = self._curve_fit(x, y, z, p0, **fit_options)
 
         # estimate standard dev
         perr = np.sqrt(np.diag(pcov))
@@ -305,9 +429,10 @@ class Abstract2DBellShaped(Abstract2DFit):
     and for all some methods (such as do_guess()) that will be shared by
     all fit models based such functions (that is, basically, all of them)"""
 
+    name = "Abstract2DBellShaped"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.name = "Abstract2DBellShaped"
 
     def guess_center_size_ampl_offset(self):
         """guess some parameters from preliminary data analysis. this is done
@@ -396,9 +521,10 @@ class Abstract2DBellShaped(Abstract2DFit):
 class Abstract1DFit(AbstractFit):
     """Abstract 1D fit object"""
 
+    name = "Abstract1DFit"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.name = "Abstract1DFit"
         self.short_name = "AbsFit"
         self.category = None
         self.x_unit = ""
@@ -409,7 +535,7 @@ class Abstract1DFit(AbstractFit):
         (scipy.optimize.curve_fit)"""
 
         # -- check that the data and coordinates were provided
-        if self.z == [] or self.x == []:
+        if len(self.z) == 0 or len(self.x) == 0:
             return
 
         # -- prepare data
@@ -427,6 +553,10 @@ class Abstract1DFit(AbstractFit):
         if not p0:
             p0 = None
 
+        # use analytic jacobian, if implemented
+        if self._jacobian is not None:
+            fit_options.setdefault("jac", self._jacobian)
+
         # do the fit
         popt, pcov = opt.curve_fit(self._fitfunc, x, z, p0=p0, **fit_options)
 
@@ -0,0 +1,775 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 09:12:40
+
+Comments : headless batch fitting engine. Fits a list of data files, given
+           a ROI / background definition and a fit class, without relying on
+           the gui. Fit results are saved with the same format as the one
+           used by the gui (see HAL.gui.fitting)
+"""
+
+# %% IMPORTS
+
+# -- global
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+
+# -- local
+from .abstract import Abstract2DFit, NumpyArrayEncoder
+from .store import FIT_FOLDER_NAME, save_fit_dic, load_saved_fit_dic
+from ..data.abstract import AbstractCameraPictureData
+
+# -- logger
+logger = logging.getLogger(__name__)
+
+# %% GLOBAL VARIABLES
+
+# default program info, used when no gui is available to provide it
+PROGRAM_INFO = {
+    "name": "HAL",
+    "version": "0.1-beta",
+    "url": "https://github.com/adareau/HAL",
+}
+
+# number of sequences of runs per worker process, for warm-started
+# parallel batch fitting, and maximum number of runs per sequence (which
+# sets the progress / cancellation granularity), see batch_fit()
+WARM_START_CHUNKS_PER_WORKER = 2
+WARM_START_MAX_CHUNK_SIZE = 10
+
+# period (s) at which a running parallel batch fit checks for cancellation
+CANCEL_POLLING_PERIOD = 0.2
+
+# status of the runs skipped by batch_fit(), since already fitted with the
+# same parameters. It is "truthy", so that the callers only checking for
+# failures handle it as a success
+SKIPPED = "skipped"
+
+
+# %% ROI / BACKGROUND TOOLS
+
+
+def get_roi_slices(shape, pos, size):
+    """returns the (x, y) slices of an image of a given shape covered by a
+    rectangular (non-rotated) roi. The roi boundaries are rounded to the
+    nearest pixel, and clipped to the image (the slices can be empty). The
+    display classes use the same rule (see AbstractImageDisplay), so that a
+    given roi always contains the same data, in the gui and in batch fits.
+
+    Parameters
+    ----------
+    shape : tuple
+        shape of the image, with the pyqtgraph (x, y) axis order
+    pos : list or tuple
+        position of the roi (lower left corner), in pixels
+    size : list or tuple
+        size of the roi, in pixels
+
+    Returns
+    -------
+    (sx, sy) : tuple of slices
+        slices of the image covered by the roi
+    """
+    nx, ny = shape[:2]
+    x0 = int(np.clip(round(pos[0]), 0, nx))
+    y0 = int(np.clip(round(pos[1]), 0, ny))
+    x1 = int(np.clip(round(pos[0] + size[0]), x0, nx))
+    y1 = int(np.clip(round(pos[1] + size[1]), y0, ny))
+    return slice(x0, x1), slice(y0, y1)
+
+
+def get_roi_data(image, pos, size):
+    """returns the data contained in a rectangular (non-rotated) roi, as well
+    as the corresponding pixel coordinates (see get_roi_slices()). This
+    mimics the output of getRegionData() used by the display classes.
+
+    Parameters
+    ----------
+    image : 2D array
+        the image, with the pyqtgraph (x, y) axis order
+    pos : list or tuple
+        position of the roi (lower left corner), in pixels
+    size : list or tuple
+        size of the roi, in pixels
+
+    Returns
+    -------
+    Z : 2D array
+        data in the roi
+    (X, Y) : tuple of 2D arrays
+        pixel coordinates of the data points
+    """
+    # -- get roi boundaries (clipped to the image)
+    sx, sy = get_roi_slices(np.shape(image), pos, size)
+
+    # -- get data and coordinates
+    Z = np.asarray(image[sx, sy], dtype=float)
+    X, Y = np.meshgrid(
+        np.arange(sx.start, sx.stop), np.arange(sy.start, sy.stop), indexing="ij"
+    )
+
+    return Z, (X, Y)
+
+
+def get_background_value(image, background=None):
+    """returns the mean value of the image in the background area, defined
+    as a dictionnary with 'pos' and 'size' keys (or None: no background)"""
+    if background is None:
+        return 0
+    Z, _ = get_roi_data(image, background["pos"], background["size"])
+    if Z.size == 0:
+        return 0
+    return np.mean(Z)
+
+
+# %% FIT HASH
+
+
+def get_fit_signature(
+    data_class,
+    fit_class,
+    roi_collection,
+    background=None,
+    binning=None,
+    refinement=None,
+):
+    """returns a string describing all the fit parameters that do not depend
+    on the data file : data class, fit class (name and version), rois and
+    background definitions, and binning options (see compute_fit_hash())"""
+    fit = fit_class()
+
+    def _box(box):
+        return {
+            "pos": [float(x) for x in box["pos"]],
+            "size": [float(x) for x in box["size"]],
+        }
+
+    signature = {
+        "data class": data_class().name,
+        "fit": [fit.name, fit._version],
+        "rois": {name: _box(roi) for name, roi in roi_collection.items()},
+        "background": None if background is None else _box(background),
+        "binning": [binning, refinement],
+    }
+    return json.dumps(signature, sort_keys=True, cls=NumpyArrayEncoder)
+
+
+def compute_fit_hash(data_path, fit_signature):
+    """returns a hash of the data file (name, size and modification time) and
+    of the fit signature (see get_fit_signature()), saved with the fit results
+    so that unchanged runs are not fitted again. Returns None if the data
+    file does not exist"""
+    try:
+        st = os.stat(data_path)
+    except OSError:
+        return None
+    key = "%s|%i|%i|%s" % (
+        Path(data_path).name,
+        st.st_size,
+        st.st_mtime_ns,
+        fit_signature,
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def get_saved_fit_hash(data_path, fit_folder_name=FIT_FOLDER_NAME):
+    """returns the fit hash saved with the fit of a given data file (None if
+    the file was not fitted, or fitted before the hash was introduced)"""
+    fit_dic = load_saved_fit_dic(data_path, fit_folder_name)
+    if not fit_dic:
+        return None
+    return fit_dic.get("__fit_info__", {}).get("fit hash", None)
+
+
+def is_fit_up_to_date(data_path, fit_signature, fit_folder_name=FIT_FOLDER_NAME):
+    """checks whether a data file was already fitted with the same parameters
+    (see compute_fit_hash()), and was not modified since"""
+    saved_hash = get_saved_fit_hash(data_path, fit_folder_name)
+    if saved_hash is None:
+        return False
+    return saved_hash == compute_fit_hash(data_path, fit_signature)
+
+
+# %% FIT TOOLS
+
+
+def _fit_diverged(fit):
+    """checks whether a fit result is unusable (non finite parameters or
+    uncertainties)"""
+    popt = np.asarray(fit.popt, dtype=float)
+    perr = np.asarray(fit.perr, dtype=float)
+    if popt.size == 0:
+        return True
+    return not (np.all(np.isfinite(popt)) and np.all(np.isfinite(perr)))
+
+
+def _init_2D_fit(Z, XY, data_object, fit_class, binning=None, refinement=None):
+    """initializes a 2D fit object, with the data object pixel sizes / units,
+    and the binning options (if not None)"""
+    # -- init fit object
+    fit = fit_class(x=XY, z=Z)
+    # binning
+    if binning is not None:
+        fit.binning = binning
+    if refinement is not None:
+        fit.binning_refinement = refinement
+    # get sizes / units from data object
+    px_size_x, px_size_y = data_object.pixel_scale
+    unit_x, unit_y = data_object.pixel_unit
+    # update sizes / units in fit object
+    fit.pixel_size_x = px_size_x
+    fit.pixel_size_y = px_size_y
+    fit.pixel_size_x_unit = unit_x
+    fit.pixel_size_y_unit = unit_y
+    return fit
+
+
+def fit_2D_data(
+    Z, XY, data_object, fit_class, guess=None, binning=None, refinement=None
+):
+    """fits 2D data with the requested fit class. Returns the fit object,
+    or None if the fit failed.
+
+    If binning is provided, the data is block-averaged by binning x binning
+    pixels before fitting, and then refined at full resolution if refinement
+    is True (see Abstract2DFit.do_fit()). If None, the fit class defaults
+    are used.
+
+    If a guess is provided (for instance, the result of the fit of the previous
+    run of a sequence), it is used as the starting point of the fit, and
+    fit.do_guess() is skipped. If this 'warm-started' fit fails or diverges,
+    the fit is done again, starting from fit.do_guess()"""
+    # -- warm start
+    if guess is not None:
+        fit = _init_2D_fit(Z, XY, data_object, fit_class, binning, refinement)
+        fit.guess = list(guess)
+        try:
+            fit.do_fit()
+        except Exception as e:
+            logger.debug(e)
+        else:
+            if not _fit_diverged(fit):
+                fit.compute_values()
+                return fit
+        logger.debug("warm-started fit failed, starting again from guess")
+
+    # -- guess / fit / compute values
+    fit = _init_2D_fit(Z, XY, data_object, fit_class, binning, refinement)
+    fit.do_guess()
+    try:
+        fit.do_fit()
+    except Exception as e:
+        logger.debug(e)
+        return None
+    fit.compute_values()
+
+    return fit
+
+
+def fit_2D_rois(
+    roi_data,
+    data_object,
+    fit_class,
+    guess_collection=None,
+    binning=None,
+    refinement=None,
+    max_workers=None,
+):
+    """fits the data of several rois of the same image, given as
+    roi_data = {roi_name: (Z, XY)}. The rois are fitted concurrently, over a
+    thread pool (most of the fit time is spent in numpy / scipy routines,
+    that release the GIL), unless max_workers is 1. See fit_2D_data() for
+    the other parameters ; guess_collection = {roi_name: guess}.
+
+    Returns a dictionnary {roi_name: fit object (None if the fit failed)},
+    with the same order as roi_data
+    """
+    # -- prepare
+    if guess_collection is None:
+        guess_collection = {}
+    if max_workers is None or max_workers <= 0:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(roi_data))
+
+    def _fit(roi_name):
+        Z, XY = roi_data[roi_name]
+        guess = guess_collection.get(roi_name, None)
+        return fit_2D_data(Z, XY, data_object, fit_class, guess, binning, refinement)
+
+    # -- serial
+    if max_workers <= 1:
+        return {roi_name: _fit(roi_name) for roi_name in roi_data}
+
+    # -- parallel
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {roi_name: executor.submit(_fit, roi_name) for roi_name in roi_data}
+    return {roi_name: future.result() for roi_name, future in futures.items()}
+
+
+def generate_roi_result_dic(pos, size, fit):
+    """generates a dictionnary with the fit results for a given roi,
+    including information about the roi itself, in order to be
+    saved as part of the global fit result"""
+
+    # -- initialize the dictionnary
+    roi_dic = {}
+
+    # -- store roi info
+    # position
+    roi_dic["pos"] = {
+        "value": list(pos),
+        "unit": "px",
+        "comment": "roi position (lower left corner)",
+    }
+    # size
+    roi_dic["size"] = {
+        "value": list(size),
+        "unit": "px",
+        "comment": "roi size",
+    }
+
+    # -- store fit info
+    roi_dic["result"] = fit.export_dic()
+
+    return roi_dic
+
+
+def generate_fit_result_dic(
+    roi_collection,
+    fit,
+    data_object,
+    background=None,
+    program_info=None,
+    fit_hash=None,
+):
+    """generates the global fit dictionnary, to be exported/saved. If provided,
+    the fit hash (see compute_fit_hash()) is saved with the fit info"""
+
+    # -- initialize
+    fit_dic = {}
+    if program_info is None:
+        program_info = PROGRAM_INFO
+
+    # -- store comments
+    name = program_info["name"]
+    version = program_info["version"]
+    url = program_info["url"]
+    com_str = f"Generated with {name} v{version} (need help? check {url})"
+    fit_dic["__comment__"] = com_str
+    fit_dic["__program__"] = name
+    fit_dic["__version__"] = version
+    fit_dic["__url__"] = url
+
+    # -- fit info
+    fit_info = {}
+
+    # generic fit info
+    fit_info["fit name"] = fit.name
+    fit_info["fit formula"] = fit.formula_help
+    fit_info["fit parameters"] = fit.parameters_help
+    fit_info["fit version"] = fit._version
+    fit_info["generated on"] = datetime.now().strftime("%y-%m-%d %H:%M:%S")
+    if fit_hash is not None:
+        fit_info["fit hash"] = fit_hash
+
+    # specific to 2D fits
+    if isinstance(fit, Abstract2DFit):
+        fit_info["pixel_size_x"] = {
+            "value": fit.pixel_size_x,
+            "unit": fit.pixel_size_x_unit,
+            "comment": "physical size of a pixel (x axis)",
+        }
+        fit_info["pixel_size_y"] = {
+            "value": fit.pixel_size_y,
+            "unit": fit.pixel_size_y_unit,
+            "comment": "physical size of a pixel (y axis)",
+        }
+        fit_info["count_conversion_factor"] = {
+            "value": fit.count_conversion_factor,
+            "unit": fit.converted_count_unit,
+            "comment": "converts image counts into physically meaning quantity \
+            (e.g. atom number)",
+        }
+
+    # background
+    if background is not None:
+        back = {}
+        back["pos"] = {
+            "value": list(background["pos"]),
+            "unit": "px",
+            "comment": "background position (lower left corner)",
+        }
+        back["size"] = {
+            "value": list(background["size"]),
+            "unit": "px",
+            "comment": "background size",
+        }
+        fit_info["background"] = back
+
+    # store
+    fit_dic["__fit_info__"] = fit_info
+
+    # -- data info
+    data_info = {}
+
+    # generic data info
+    data_info["data path"] = str(data_object.path)
+    data_info["data type"] = data_object.name
+    data_info["data dimension"] = data_object.dimension
+    data_info["pixel scale"] = data_object.pixel_scale
+    data_info["pixel unit"] = data_object.pixel_unit
+
+    # specific to camera pictures
+    if isinstance(data_object, AbstractCameraPictureData):
+        data_info["data class"] = "camera picture"
+        data_info["camera pixel size"] = {
+            "value": data_object.pixel_size,
+            "unit": data_object.pixel_size_unit,
+        }
+        data_info["magnification"] = data_object.magnification
+
+    # store
+    fit_dic["__data_info__"] = data_info
+
+    # -- store roi collection
+    fit_dic["collection"] = roi_collection
+
+    return fit_dic
+
+
+# %% SAVED FITS
+
+
+def save_fit_result_as_json(
+    fit_dic,
+    data_path,
+    fit_folder_name=FIT_FOLDER_NAME,
+    use_store=False,
+    json_format="indent",
+):
+    """saves all fit information as a json file (or in the folder fit store
+    if use_store is True, see HAL.classes.fit.store)"""
+    save_fit_dic(fit_dic, data_path, fit_folder_name, use_store, json_format)
+
+
+# %% BATCH FITTING
+
+
+def fit_file(
+    path,
+    data_class,
+    fit_class,
+    roi_collection,
+    background=None,
+    fit_folder_name=FIT_FOLDER_NAME,
+    program_info=None,
+    use_store=False,
+    json_format="indent",
+    binning=None,
+    refinement=None,
+    guess_collection=None,
+):
+    """loads a data file, fits all the rois and saves the result.
+    Returns True if the fit was saved, False otherwise.
+
+    Parameters
+    ----------
+    path : str or Path
+        path to the data file
+    data_class : class
+        data class used to load the file (child of AbstractData)
+    fit_class : class
+        fit class used to fit the data (child of Abstract2DFit)
+    roi_collection : dict
+        roi definitions, as {roi_name: {"pos": [x, y], "size": [w, h]}}
+    background : dict, optional
+        background definition, as {"pos": [x, y], "size": [w, h]}
+    fit_folder_name : str, optional
+        name of the folder where fits are saved
+    program_info : dict, optional
+        "name", "version" and "url" of the program, saved with the fit
+    use_store : bool, optional
+        if True, the fit is saved in the folder fit store instead of a json
+        file (see HAL.classes.fit.store)
+    json_format : str, optional
+        format of the saved json file (see abstract.JSON_FORMATS)
+    binning, refinement : int and bool, optional
+        binning options (see fit_2D_data())
+    guess_collection : dict, optional
+        fit starting points for the rois, as {roi_name: p0}, for instance the
+        fit results of the previous run (see fit_2D_data() and
+        fit_file_sequence())
+    """
+    success, _ = _fit_file(
+        path,
+        data_class,
+        fit_class,
+        roi_collection,
+        background,
+        fit_folder_name,
+        program_info,
+        use_store,
+        json_format,
+        binning,
+        refinement,
+        guess_collection,
+    )
+    return success
+
+
+def _fit_file(
+    path,
+    data_class,
+    fit_class,
+    roi_collection,
+    background,
+    fit_folder_name,
+    program_info,
+    use_store,
+    json_format,
+    binning,
+    refinement,
+    guess_collection,
+):
+    """implements fit_file(). Returns (success, popt_collection), where
+    popt_collection contains the fit results as {roi_name: popt}"""
+    # -- hash of the fit parameters (before loading the data)
+    fit_signature = get_fit_signature(
+        data_class, fit_class, roi_collection, background, binning, refinement
+    )
+    fit_hash = compute_fit_hash(path, fit_signature)
+
+    # -- load data
+    data_object = data_class()
+    data_object.path = Path(path)
+    if not data_object.filter():
+        logger.debug(f"'{path}' filtered out by '{data_object.name}'")
+        return False, None
+    if data_object.dimension != 2:
+        logger.warning("fit only implemented for 2D data !")
+        return False, None
+    data_object.load()
+    if data_object.data is None or len(data_object.data) == 0:
+        logger.warning(f"could not load '{path}'")
+        return False, None
+
+    # -- background
+    image = np.asarray(data_object.data, dtype=float)
+    image = image - get_background_value(image, background)
+
+    # -- fit all rois
+    if guess_collection is None:
+        guess_collection = {}
+    fit_collection = {}
+    popt_collection = {}
+    fit = None
+    for roi_name, roi in roi_collection.items():
+        # get roi data
+        Z, XY = get_roi_data(image, roi["pos"], roi["size"])
+        if Z.size == 0:
+            continue
+        # fit the data
+        guess = guess_collection.get(roi_name, None)
+        fit = fit_2D_data(Z, XY, data_object, fit_class, guess, binning, refinement)
+        if fit is None:
+            return False, None
+        popt_collection[roi_name] = fit.popt
+        # prepare dictionnary with results for the current roi
+        fit_collection[roi_name] = generate_roi_result_dic(roi["pos"], roi["size"], fit)
+
+    if fit is None:
+        return False, None
+
+    # -- save fit
+    fit_dic = generate_fit_result_dic(
+        fit_collection, fit, data_object, background, program_info, fit_hash
+    )
+    save_fit_result_as_json(
+        fit_dic, data_object.path, fit_folder_name, use_store, json_format
+    )
+
+    return True, popt_collection
+
+
+def fit_file_sequence(path_list, *args, callback=None, cancel_event=None):
+    """fits a sequence of data files one by one, using the fit results of
+    each run as the starting point for the next one ('warm start'). *args
+    are the fit_file() parameters (after path). If a callback is provided, it
+    is called as callback(path, success) each time a file is processed. If
+    a cancel_event (threading.Event) is provided, the sequence is stopped
+    as soon as it is set.
+
+    Returns a dictionnary {path: success} for the processed files
+    """
+    results = {}
+    guess_collection = None
+    for path in path_list:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        try:
+            success, popt_collection = _fit_file(path, *args, guess_collection)
+        except Exception as e:
+            logger.warning(f"error while fitting '{path}' : {e}")
+            success, popt_collection = False, None
+        results[path] = success
+        # if the fit failed, the next run starts from a standard guess
+        guess_collection = popt_collection
+        if callback is not None:
+            callback(path, success)
+    return results
+
+
+def batch_fit(
+    path_list,
+    data_class,
+    fit_class,
+    roi_collection,
+    background=None,
+    fit_folder_name=FIT_FOLDER_NAME,
+    program_info=None,
+    use_store=False,
+    json_format="indent",
+    binning=None,
+    refinement=None,
+    warm_start=False,
+    max_workers=None,
+    callback=None,
+    cancel_event=None,
+    skip_unchanged=False,
+):
+    """fits a list of data files over a process pool. See fit_file() for the
+    description of the parameters. If max_workers is 1, the files are fitted
+    one by one in the current process. If a callback is provided, it is called
+    as callback(path, success) each time a file is processed.
+
+    If warm_start is True, each fit starts from the result of the previous
+    run in path_list (see fit_file_sequence()). For parallel fitting, the list
+    is then split in contiguous chunks, each one being fitted sequentially in
+    a worker process.
+
+    If a cancel_event (threading.Event) is provided, the batch fit can be
+    stopped by setting it (for instance from another thread) : the files that
+    are not being fitted yet are skipped.
+
+    If skip_unchanged is True, the files that were already fitted with the
+    same parameters, and not modified since (see is_fit_up_to_date()), are not
+    fitted again. Their status is then SKIPPED (instead of True / False).
+
+    Returns a dictionnary {path: success} for the processed files
+    """
+    # -- prepare
+    path_list = [Path(p) for p in path_list]
+    results = {}
+    if skip_unchanged:
+        fit_signature = get_fit_signature(
+            data_class, fit_class, roi_collection, background, binning, refinement
+        )
+        to_fit = []
+        for path in path_list:
+            if is_fit_up_to_date(path, fit_signature, fit_folder_name):
+                results[path] = SKIPPED
+                if callback is not None:
+                    callback(path, SKIPPED)
+            else:
+                to_fit.append(path)
+        logger.debug(f"{len(results)} unchanged runs skipped")
+        path_list = to_fit
+    if not path_list:
+        return results
+    if max_workers is None or max_workers <= 0:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, max(len(path_list), 1))
+    args = (
+        data_class,
+        fit_class,
+        roi_collection,
+        background,
+        fit_folder_name,
+        program_info,
+        use_store,
+        json_format,
+        binning,
+        refinement,
+    )
+
+    # -- serial
+    if max_workers == 1:
+        if warm_start:
+            res = fit_file_sequence(
+                path_list, *args, callback=callback, cancel_event=cancel_event
+            )
+            results.update(res)
+            return results
+        for path in path_list:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            try:
+                success = fit_file(path, *args)
+            except Exception as e:
+                logger.warning(f"error while fitting '{path}' : {e}")
+                success = False
+            results[path] = success
+            if callback is not None:
+                callback(path, success)
+        return results
+
+    # -- parallel
+    if warm_start:
+        # contiguous chunks (a few per worker, to balance the load)
+        n_chunks = WARM_START_CHUNKS_PER_WORKER * max_workers
+        n_chunks = max(n_chunks, -(-len(path_list) // WARM_START_MAX_CHUNK_SIZE))
+        n_chunks = min(n_chunks, len(path_list))
+        bounds = np.linspace(0, len(path_list), n_chunks + 1).astype(int)
+        chunk_list = [path_list[i:j] for i, j in zip(bounds[:-1], bounds[1:])]
+    else:
+        chunk_list = [[path] for path in path_list]
+
+    # (spawn : forking from a QThread, while the Qt event loop runs, can
+    # deadlock the worker processes)
+    spawn_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=spawn_context
+    ) as executor:
+        futures = {}
+        for chunk in chunk_list:
+            if warm_start:
+                future = executor.submit(fit_file_sequence, chunk, *args)
+            else:
+                future = executor.submit(fit_file, chunk[0], *args)
+            futures[future] = chunk
+
+        pending = set(futures)
+        while pending:
+            # wait for results, and check for cancellation
+            done, pending = wait(
+                pending, timeout=CANCEL_POLLING_PERIOD, return_when=FIRST_COMPLETED
+            )
+            if cancel_event is not None and cancel_event.is_set():
+                for future in pending:
+                    future.cancel()
+            for future in done:
+                if future.cancelled():
+                    continue
+                chunk = futures[future]
+                try:
+                    res = future.result()
+                    if not warm_start:
+                        res = {chunk[0]: res}
+                except Exception as e:
+                    logger.warning(f"error while fitting '{chunk[0]}' : {e}")
+                    res = {path: False for path in chunk}
+                for path, success in res.items():
+                    results[path] = success
+                    if callback is not None:
+                        callback(path, success)
+
+    return results
@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 14:26:51
+
+Comments : saved fits storage. Fits are saved in the fit folder of each data
+           folder (see FIT_DEFAULTS["fit folder name"]), either as one json
+           file per data file (historical format), or in a single sqlite
+           database per folder (the 'fit store'), which avoids creating
+           thousands of small files.
+           The store contains one row per data name (stem) : saving a fit
+           replaces the previous row (with a new id), and deleting a fit
+           removes it, so that the store size does not grow when runs are
+           fitted again. All the reading functions below look in the store
+           first, and then for a json file, so that both formats can coexist.
+"""
+
+# %% IMPORTS
+
+# -- global
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# -- local
+from .abstract import NumpyArrayEncoder, format_json
+
+# -- logger
+logger = logging.getLogger(__name__)
+
+# %% GLOBAL VARIABLES
+
+FIT_FOLDER_NAME = ".HAL_fits"
+FIT_STORE_NAME = "fits.sqlite"
+
+# opened stores, stored by path
+_OPENED_STORES = {}
+_OPENED_STORES_LOCK = threading.Lock()
+
+
+# %% STORE CLASS
+
+
+class FitStore(object):
+    """sqlite-based fit store for one data folder.
+
+    Parameters
+    ----------
+    fit_folder : str or Path
+        the fit folder in which the store is located
+    create : bool, optional
+        if False (default), the store is not created if it does not exist yet,
+        and the store is then not available (see self.available)
+    """
+
+    def __init__(self, fit_folder, create=False):
+        self.path = Path(fit_folder) / FIT_STORE_NAME
+        self._connection = None
+        self._lock = threading.Lock()
+        if create or self.path.is_file():
+            self._open()
+
+    def _open(self):
+        """opens (and initializes if needed) the database"""
+        try:
+            self.path.parent.mkdir(exist_ok=True)
+            # long timeout : the store can be written by several processes
+            # during a batch fit
+            con = sqlite3.connect(str(self.path), timeout=60, check_same_thread=False)
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS fits ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "stem TEXT NOT NULL, saved_on REAL, fit TEXT)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS fits_stem ON fits (stem, id)")
+            con.commit()
+            self._connection = con
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"could not open fit store '{self.path}' : {e}")
+            self._connection = None
+
+    @property
+    def available(self):
+        return self._connection is not None
+
+    def _execute(self, query, args=(), commit=False, many=False):
+        """executes a query, and returns the fetched rows (or None if the
+        store is not available / on error)"""
+        if not self.available:
+            return None
+        with self._lock:
+            try:
+                if many:
+                    cursor = self._connection.executemany(query, args)
+                else:
+                    cursor = self._connection.execute(query, args)
+                rows = cursor.fetchall()
+                if commit:
+                    self._connection.commit()
+                return rows
+            except sqlite3.Error as e:
+                logger.warning(f"error with fit store '{self.path}' : {e}")
+                return None
+
+    def _execute_many(self, queries):
+        """executes a list of (query, args list) in a single transaction.
+        Returns True on success"""
+        if not self.available:
+            return False
+        with self._lock:
+            try:
+                with self._connection:  # commit, or rollback on error
+                    for query, args in queries:
+                        self._connection.executemany(query, args)
+                return True
+            except sqlite3.Error as e:
+                logger.warning(f"error with fit store '{self.path}' : {e}")
+                return False
+
+    # == READ
+
+    def stems(self):
+        """returns the set of data names (stems) with a saved fit"""
+        rows = self._execute(
+            "SELECT stem FROM fits WHERE id IN (SELECT MAX(id) FROM fits GROUP BY stem)"
+            " AND fit IS NOT NULL"
+        )
+        return {r[0] for r in rows} if rows else set()
+
+    def contains(self, stem):
+        """is there a saved fit for a given data name (stem) ?"""
+        rows = self._execute(
+            "SELECT fit IS NOT NULL FROM fits WHERE stem=? ORDER BY id DESC LIMIT 1",
+            (stem,),
+        )
+        return bool(rows[0][0]) if rows else False
+
+    def version(self, stem):
+        """returns a string identifying the saved fit for a given data name
+        (stem), or an empty string if there is none. It changes each time the
+        fit of this stem is saved or deleted (the row ids are never reused)"""
+        rows = self._execute(
+            "SELECT id, saved_on FROM fits WHERE stem=? ORDER BY id DESC LIMIT 1",
+            (stem,),
+        )
+        return "%i:%r" % rows[0] if rows else ""
+
+    def load(self, stem):
+        """returns the saved fit dictionnary for a given data name (stem), or
+        None if there is no saved fit"""
+        rows = self._execute(
+            "SELECT fit FROM fits WHERE stem=? ORDER BY id DESC LIMIT 1", (stem,)
+        )
+        if not rows or rows[0][0] is None:
+            return None
+        return json.loads(rows[0][0])
+
+    # == WRITE
+
+    def save(self, stem, fit_dic, saved_on=None):
+        """saves a fit dictionnary for a given data name (stem). Returns True
+        if the fit was saved"""
+        return self.save_many([(stem, fit_dic, saved_on)])
+
+    def save_many(self, entries):
+        """saves a list of (stem, fit_dic, saved_on) entries, in a single
+        transaction (saved_on is a timestamp, the current time if None). The
+        previous fits of these stems are replaced. Returns True if the fits
+        were saved"""
+        now = time.time()
+        rows = []
+        for stem, fit_dic, saved_on in entries:
+            fit_str = json.dumps(fit_dic, ensure_ascii=False, cls=NumpyArrayEncoder)
+            rows.append((stem, now if saved_on is None else saved_on, fit_str))
+        return self._execute_many(
+            [
+                ("DELETE FROM fits WHERE stem=?", [(r[0],) for r in rows]),
+                ("INSERT INTO fits (stem, saved_on, fit) VALUES (?, ?, ?)", rows),
+            ]
+        )
+
+    def delete(self, stem_list):
+        """deletes the saved fits for a list of data names (stems)"""
+        if isinstance(stem_list, str):
+            stem_list = [stem_list]
+        self._execute_many(
+            [("DELETE FROM fits WHERE stem=?", [(stem,) for stem in stem_list])]
+        )
+
+    def compact(self):
+        """removes the outdated rows (overwritten or deleted fits, written by
+        the former append-only store), and shrinks the database file"""
+        self._execute(
+            "DELETE FROM fits WHERE id NOT IN (SELECT MAX(id) FROM fits GROUP BY stem)"
+            " OR fit IS NULL",
+            commit=True,
+        )
+        self._execute("VACUUM")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def get_store(fit_folder, create=False):
+    """returns the fit store of a given fit folder (opened only once). If the
+    store does not exist, and create is False, returns None"""
+    key = Path(fit_folder)
+    with _OPENED_STORES_LOCK:
+        store = _OPENED_STORES.get(key, None)
+        if store is None or not store.available:
+            store = FitStore(key, create=create)
+            if not store.available:
+                return None
+            _OPENED_STORES[key] = store
+    return store
+
+
+def close_all_stores():
+    """closes all opened stores"""
+    with _OPENED_STORES_LOCK:
+        for store in _OPENED_STORES.values():
+            store.close()
+        _OPENED_STORES.clear()
+
+
+# %% SAVED FITS FUNCTIONS
+
+
+def gen_saved_fit_path(data_path, fit_folder_name=FIT_FOLDER_NAME):
+    """generates a saved fit path (json file) from data path"""
+
+    # take data path
+    data_path = Path(data_path)  # ensure we have a Path() object
+    data_root = data_path.parent  # data folder
+    data_stem = data_path.stem  # data name (without extension !)
+
+    # gen fit folder path
+    fit_folder = data_root / fit_folder_name
+
+    # get fit file path
+    fit_file = fit_folder / (data_stem + ".json")
+    return fit_file
+
+
+def gen_fit_store_path(data_folder, fit_folder_name=FIT_FOLDER_NAME):
+    """returns the path of the fit store of a data folder"""
+    return Path(data_folder) / fit_folder_name / FIT_STORE_NAME
+
+
+def load_saved_fit_dic(data_path, fit_folder_name=FIT_FOLDER_NAME):
+    """returns the saved fit dictionnary for a given data file (from the fit
+    store, or from the json file), or None if there is no saved fit"""
+    data_path = Path(data_path)
+    fit_folder = data_path.parent / fit_folder_name
+    # -- look in the store
+    store = get_store(fit_folder)
+    if store is not None:
+        fit_dic = store.load(data_path.stem)
+        if fit_dic is not None:
+            return fit_dic
+    # -- json file
+    fit_file = fit_folder / (data_path.stem + ".json")
+    try:
+        json_str = fit_file.read_text(encoding="utf8")
+    except OSError:
+        return None
+    return json.loads(json_str)
+
+
+def get_saved_fit_version(data_path, fit_folder_name=FIT_FOLDER_NAME):
+    """returns a string identifying the saved fit of a given data file in the
+    fit store (see FitStore.version()), or an empty string if there is no
+    fit store. The json fit files are not taken into account"""
+    data_path = Path(data_path)
+    store = get_store(data_path.parent / fit_folder_name)
+    if store is None:
+        return ""
+    return store.version(data_path.stem)
+
+
+def saved_fit_exist(data_path, fit_folder_name=FIT_FOLDER_NAME):
+    """checks whether there is a saved fit for a given data file"""
+    data_path = Path(data_path)
+    fit_folder = data_path.parent / fit_folder_name
+    store = get_store(fit_folder)
+    if store is not None and store.contains(data_path.stem):
+        return True
+    return (fit_folder / (data_path.stem + ".json")).is_file()
+
+
+def get_saved_fit_stems(data_folder, fit_folder_name=FIT_FOLDER_NAME):
+    """returns the set of data names (without extension) for which a saved
+    fit exists in a given data folder, using a single listing of the fit
+    folder (and a single query of the fit store)"""
+    fit_folder = Path(data_folder) / fit_folder_name
+    stems = set()
+    has_store = False
+    try:
+        with os.scandir(fit_folder) as it:
+            for entry in it:
+                if entry.name == FIT_STORE_NAME:
+                    has_store = True
+                elif entry.name.endswith(".json") and entry.is_file():
+                    stems.add(entry.name[: -len(".json")])
+    except OSError:
+        pass
+    if has_store:
+        store = get_store(fit_folder)
+        if store is not None:
+            stems |= store.stems()
+    return stems
+
+
+def save_fit_dic(
+    fit_dic,
+    data_path,
+    fit_folder_name=FIT_FOLDER_NAME,
+    use_store=False,
+    json_format="indent",
+):
+    """saves a fit dictionnary, in the fit store of the data folder if
+    use_store is True, or as a json file otherwise (formatted with json_format,
+    see HAL.classes.fit.abstract.JSON_FORMATS). Any previous fit saved with
+    the other method is removed"""
+    data_path = Path(data_path)
+    fit_folder = data_path.parent / fit_folder_name
+    fit_file = fit_folder / (data_path.stem + ".json")
+
+    if use_store:
+        store = get_store(fit_folder, create=True)
+        if store is None:
+            raise OSError(f"could not open the fit store in '{fit_folder}'")
+        if not store.save(data_path.stem, fit_dic):
+            raise OSError(f"could not save the fit in '{store.path}'")
+        # remove old json file
+        if fit_file.is_file():
+            fit_file.unlink()
+    else:
+        fit_folder.mkdir(exist_ok=True)
+        fit_file.write_text(format_json(fit_dic, json_format), encoding="utf8")
+        # remove fit from the store (if any)
+        store = get_store(fit_folder)
+        if store is not None and store.contains(data_path.stem):
+            store.delete(data_path.stem)
+
+
+def delete_saved_fits(path_list, fit_folder_name=FIT_FOLDER_NAME):
+    """deletes the saved fits (store and json) for a list of data files"""
+    # -- group by folder
+    folders = {}
+    for path in path_list:
+        path = Path(path)
+        folders.setdefault(path.parent, []).append(path.stem)
+    # -- delete
+    for folder, stem_list in folders.items():
+        fit_folder = folder / fit_folder_name
+        store = get_store(fit_folder)
+        if store is not None:
+            store_stems = store.stems()
+            store.delete([s for s in stem_list if s in store_stems])
+        for stem in stem_list:
+            fit_file = fit_folder / (stem + ".json")
+            if fit_file.is_file():
+                fit_file.unlink()
+
+
+def migrate_json_fits(data_folder, fit_folder_name=FIT_FOLDER_NAME, remove_json=True):
+    """imports all the json saved fits of a data folder into its fit store.
+    If remove_json is True, the json files are deleted once imported.
+    Returns the number of imported fits"""
+    fit_folder = Path(data_folder) / fit_folder_name
+    json_files = sorted(fit_folder.glob("*.json"))
+    if not json_files:
+        return 0
+    store = get_store(fit_folder, create=True)
+    if store is None:
+        return 0
+    # -- read
+    entries = []
+    for fit_file in json_files:
+        try:
+            fit_dic = json.loads(fit_file.read_text(encoding="utf8"))
+            entries.append((fit_file.stem, fit_dic, fit_file.stat().st_mtime))
+        except (OSError, ValueError) as e:
+            logger.warning(f"could not import '{fit_file}' : {e}")
+    # -- write (one transaction)
+    if not store.save_many(entries):
+        return 0
+    store.compact()
+    # -- clean
+    if remove_json:
+        imported = {e[0] for e in entries}
+        for fit_file in json_files:
+            if fit_file.stem in imported:
+                fit_file.unlink()
+    return len(entries)
+
+
+# %% BENCHMARK
+if __name__ == "__main__":
+    # save throughput for the different saving methods, for a typical 2D fit
+    # run with : python -m HAL.classes.fit.store
+    import tempfile
+    import numpy as np
+    from .abstract import JSON_FORMATS
+    from .batch import generate_fit_result_dic, generate_roi_result_dic
+    from HAL.default_modules.data.rawCamera import RawCamData
+    from HAL.default_modules.fit.gauss2D import Gauss2DFit
+
+    # -- generate a fit result
+    x, y = np.meshgrid(np.arange(100), np.arange(80), indexing="ij")
+    z = 1000 * np.exp(-((x - 50) ** 2) / 200 - (y - 40) ** 2 / 100)
+    fit = Gauss2DFit(x=(x, y), z=z)
+    fit.do_guess()
+    fit.do_fit()
+    fit.compute_values()
+    roi_collection = {"ROI 0": generate_roi_result_dic([0, 0], [100, 80], fit)}
+    fit_dic = generate_fit_result_dic(roi_collection, fit, RawCamData())
+
+    # -- benchmark
+    n_fits = 500
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        methods = [("json", fmt, False) for fmt in JSON_FORMATS]
+        methods += [("store", "-", True)]
+        for name, json_format, use_store in methods:
+            folder = Path(tmp_dir) / f"{name}_{json_format}"
+            folder.mkdir()
+            t0 = time.perf_counter()
+            for i in range(n_fits):
+                data_path = folder / f"run_{i:04d}.png"
+                save_fit_dic(
+                    fit_dic, data_path, use_store=use_store, json_format=json_format
+                )
+            dt = time.perf_counter() - t0
+            print(
+                f"{name:>5} / {json_format:>8} : {n_fits / dt:8.0f} fits/s "
+                f"({1e3 * dt / n_fits:.3f} ms per fit)"
+            )
+        close_all_stores()
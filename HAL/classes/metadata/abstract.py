@@ -12,6 +12,9 @@ import logging
 from numbers import Number
 from pathlib import Path
 
+# -- local
+from ..settings import get_shared_settings
+
 # -- logger
 logger = logging.getLogger(__name__)
 
@@ -20,12 +23,33 @@ logger = logging.getLogger(__name__)
 class AbstractMetaData(object):
     """Abstract Data object, to use as a model"""
 
+    # metadata name : declared at the class level, so that it can be read
+    # without instantiating the class (see HAL.loader.modules)
+    name = "Abstract Meta Data"
+
+    # settings : by default, the process-wide shared settings are used
+    _settings = None
+
     def __init__(self):
 
-        self.name = "Abstract Meta Data"
         self.path = Path(".")
         self._data = []
 
+    # == MANAGE SETTINGS ==
+
+    @property
+    def settings(self):
+        """HAL settings. Unless set explicitly, the process-wide settings are
+        used (see HAL.classes.settings.get_shared_settings()), so that the
+        configuration file is not parsed again for each instance"""
+        if self._settings is not None:
+            return self._settings
+        return get_shared_settings()
+
+    @settings.setter
+    def settings(self, settings):
+        self._settings = settings
+
     # == MANAGE DATA PROPERTY ==
 
     @property
@@ -89,6 +113,20 @@ class AbstractMetaData(object):
         """gather metadata"""
         pass
 
+    def dependencies(self):
+        """return the list of paths (other than self.path) the metadata
+        analysis depends on. Used by the persistent metadata index to
+        decide whether the metadata should be analyzed again"""
+        return []
+
+    def signature(self):
+        """return a string describing anything else (than the dependencies
+        files) the metadata analysis depends on, for instance some settings
+        values. Used by the persistent metadata index, together with the
+        dependencies, to decide whether the metadata should be analyzed
+        again"""
+        return ""
+
     def get_numeric_keys(self):
         """return the list of names of the 'numeric' parameters"""
         numeric_keys = [p["name"] for p in self._data if isinstance(p["value"], Number)]
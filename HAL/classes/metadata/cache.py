@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 18:41:27
+
+Comments : in-memory metadata cache, shared by the metadata display and the
+           metadata plots / export. Each cached file is stored with the
+           signature of the file and of the files its metadata depends on
+           (see AbstractMetaData.dependencies()), so that it is analyzed again
+           (through the persistent index, see HAL.classes.metadata.index) only
+           when one of them changed. The cached values are also stored in a
+           columnar table (see HAL.classes.metadata.table), used to get the
+           metadata of whole selections (plots, statistics...).
+"""
+
+# %% IMPORTS
+
+# -- global
+import logging
+from pathlib import Path
+
+# -- local
+from .index import StatCache, analyze_files, get_signature
+from .table import MetadataTable
+
+# -- logger
+logger = logging.getLogger(__name__)
+
+# %% GLOBAL VARIABLES
+
+# below this number of files, the files signatures are computed file by file
+# instead of scanning their folders
+STAT_MAX_FILES = 20
+
+
+# %% CLASS DEFINITION
+
+
+class MetadataCache(object):
+    """in-memory metadata cache. Behaves as a read-only dictionnary
+    {path: OrderedDict({metadata name: metadata object})}, filled with get().
+    The columnar version of the cached metadata is available in self.table"""
+
+    def __init__(self):
+        self._metadata = {}  # {path: OrderedDict({name: metadata})}
+        self._signatures = {}  # {path: {name: signature}}
+        self.table = MetadataTable()
+
+    # == DICT-LIKE API
+
+    def __contains__(self, path):
+        return path in self._metadata
+
+    def __getitem__(self, path):
+        return self._metadata[path]
+
+    def __len__(self):
+        return len(self._metadata)
+
+    def __iter__(self):
+        return iter(self._metadata)
+
+    def keys(self):
+        return self._metadata.keys()
+
+    def items(self):
+        return self._metadata.items()
+
+    def pop(self, path, default=None):
+        self._signatures.pop(path, None)
+        self.table.remove(path)
+        return self._metadata.pop(path, default)
+
+    def clear(self):
+        self._metadata.clear()
+        self._signatures.clear()
+        self.table.clear()
+
+    # == CACHE MANAGEMENT
+
+    def _getSignatures(self, path, meta_list, stat_cache):
+        """returns the signatures {name: signature} of a given file, for a
+        list of metadata objects (see index.analyze_files())"""
+        signatures = {}
+        for meta in meta_list:
+            meta.path = path
+            signatures[meta.name] = get_signature(meta, stat_cache)
+        return signatures
+
+    def isUpToDate(self, path, meta_list, stat_cache):
+        """checks whether a file is cached for all the metadata objects in
+        meta_list, and was not modified since"""
+        if path not in self._signatures:
+            return False
+        return (
+            self._getSignatures(path, meta_list, stat_cache) == self._signatures[path]
+        )
+
+    def get(self, path_list, metadata_classes, reset=False, **analyze_options):
+        """returns the metadata of a list of files, as a dictionnary
+        {path: OrderedDict({metadata name: metadata object})}. The files that
+        are not cached, or that changed since they were cached, are analyzed
+        (see index.analyze_files() for the analyze_options) and cached. If
+        reset is True, all the files are analyzed again, ignoring the
+        persistent index"""
+        path_list = [Path(p) for p in path_list]
+        meta_list = [meta_class() for meta_class in metadata_classes]
+        stat_cache = StatCache(scan_folders=len(path_list) > STAT_MAX_FILES)
+
+        # -- find the files to analyze
+        if reset:
+            to_analyze = list(path_list)
+        else:
+            to_analyze = [
+                p for p in path_list if not self.isUpToDate(p, meta_list, stat_cache)
+            ]
+
+        # -- analyze them
+        if to_analyze:
+            logger.debug(f"analyzing metadata of {len(to_analyze)} files")
+            new_metadata = analyze_files(
+                to_analyze,
+                metadata_classes,
+                reset_index=reset,
+                stat_cache=stat_cache,
+                **analyze_options,
+            )
+            for path, metadata_dic in new_metadata.items():
+                self._metadata[path] = metadata_dic
+                self.table.add(path, metadata_dic)
+                # (no signature for the failed analyses : tried again next time)
+                signatures = self._getSignatures(path, meta_list, stat_cache)
+                self._signatures[path] = {
+                    name: sig
+                    for name, sig in signatures.items()
+                    if name in metadata_dic
+                }
+
+        return {p: self._metadata[p] for p in path_list if p in self._metadata}
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 17:24:50
+
+Comments : metadata export functions (csv / hdf5), used by the gui (see
+           HAL.gui.export) and the command line interface (see HAL.cli)
+"""
+
+# %% IMPORTS
+
+# -- global
+import h5py
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+
+# -- local
+from ..fit.batch import PROGRAM_INFO
+
+# %% FUNCTIONS
+
+
+def export_as_csv(dic, file_out, program_info=None):
+    """exports a data dictionnary {dataset: {name: {"val": values, "info":
+    info_dic}}} as a csv file (one line per run, one column per variable)"""
+    if program_info is None:
+        program_info = PROGRAM_INFO
+    # -- gather all data from dic
+    # get variable names
+    variables = set()
+    for dataset, meta_dic in dic.items():
+        variables.update(meta_dic.keys())
+    # gather all values
+    dic_out = {"dataset": []}
+    dic_out.update({name: [] for name in variables})
+    for dataset, meta_dic in dic.items():
+        if not meta_dic:
+            continue
+        n_runs = len(next(iter(meta_dic.values()))["val"])
+        dataset_name = dataset.replace(" ", "_")
+        dic_out["dataset"] += [dataset_name for i in range(n_runs)]
+        for name, value in meta_dic.items():
+            dic_out[name] += list(value["val"])
+    # -- prepare output array
+    set_name_length = np.max([len(name) for name in dic.keys()])
+    dtype = [("dataset", f"U{set_name_length}")] + [(name, float) for name in variables]
+    fmt = ["%s"] + ["%.8e" for name in variables]
+    array_out = np.zeros(len(dic_out["dataset"]), dtype=dtype)
+    for key, value in dic_out.items():
+        array_out[key] = value
+    # -- prepare header
+    sep = "-" * 48 + "\n"
+    header = f"Generated by {program_info['name']} v{program_info['version']}"
+    header += f" on {datetime.now():%Y-%m-%d %H:%M:%S} \n"
+    header += sep
+    header += "data info : \n"
+    header += "----------- \n"
+    for name, value in meta_dic.items():
+        info = value["info"]
+        info_str = ""
+        for field in ["name", "unit", "comment"]:
+            if field in info and info[field]:
+                info_str += f"     - {field} : {info[field]} \n"
+        if info_str:
+            header += f"  + {name} \n" + info_str
+    header += sep
+    header += "data order : " + ", ".join([d[0] for d in dtype]) + "\n"
+    header += sep[:-1]
+    # -- save
+    np.savetxt(file_out, array_out, header=header, comments="# ", fmt=" ".join(fmt))
+
+
+def export_as_hdf5(dic, file_out, program_info=None):
+    """exports a data dictionnary (see export_as_csv()) as a hdf5 file, with
+    one group per dataset"""
+    if program_info is None:
+        program_info = PROGRAM_INFO
+    with h5py.File(str(file_out), "w") as f:
+        # set global attributes
+        f.attrs["software name"] = program_info["name"]
+        f.attrs["software version"] = program_info["version"]
+        f.attrs["software url"] = program_info["url"]
+        f.attrs["created on"] = f"{datetime.now():%Y-%m-%d %H:%M:%S}"
+        # store data for each dataset
+        for dataset, meta_dic in dic.items():
+            group = f.create_group(dataset)
+            for name, value in meta_dic.items():
+                dset = group.create_dataset(name, data=value["val"])
+                for k, v in value["info"].items():
+                    if k in ["unit", "comment", "name"]:
+                        dset.attrs[k] = v
+
+
+# available export formats {suffix: export function}, see export_data_dict()
+EXPORT_FORMATS = {
+    ".csv": export_as_csv,
+    ".hdf5": export_as_hdf5,
+    ".h5": export_as_hdf5,
+}
+
+
+def export_data_dict(dic, file_out, program_info=None):
+    """exports a data dictionnary (see export_as_csv()), with a format
+    depending on the output file suffix (see EXPORT_FORMATS)"""
+    suffix = Path(file_out).suffix.lower()
+    if suffix not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format '{suffix}'")
+    EXPORT_FORMATS[suffix](dic, str(file_out), program_info)
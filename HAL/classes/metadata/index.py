@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 10:02:11
+
+Comments : persistent (on-disk) metadata index. The metadata parameters
+           analyzed for each file are stored in a sqlite database (one per
+           data folder, located in the user index folder, ~/.HAL/metadata_index
+           by default, so that the data folders are never modified), together
+           with a 'signature' of the file and of the other files it depends on
+           (modification time + size). The metadata is only re-analyzed when
+           this signature changes.
+"""
+
+# %% IMPORTS
+
+# -- global
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+# -- local
+from .abstract import AbstractMetaData
+
+# -- logger
+logger = logging.getLogger(__name__)
+
+# %% GLOBAL VARIABLES
+
+INDEX_FOLDER = Path().home() / ".HAL" / "metadata_index"
+INDEX_VERSION = "1"
+
+# below this number of files per folder, the index is queried file by file
+# instead of being read as a whole
+INDEX_QUERY_MAX_FILES = 50
+
+# opened indexes, stored by folder
+_OPENED_INDEXES = {}
+
+
+# %% TOOLS
+
+
+def _json_default(obj):
+    """converts numpy scalars / arrays for json serialization"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _scan_folder(folder):
+    """returns a {file name: (mtime_ns, size)} dictionnary for all the files
+    in a folder, using a single os.scandir() call"""
+    stats = {}
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                stats[entry.name] = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        pass
+    return stats
+
+
+class StatCache(object):
+    """caches the stat results of whole folders, so that the signature of many
+    files located in the same folders only costs one scandir() per folder. If
+    scan_folders is False, the files are stat'ed one by one (faster for a few
+    files located in large folders)"""
+
+    def __init__(self, scan_folders=True):
+        self.scan_folders = scan_folders
+        self._folders = {}
+        self._files = {}
+
+    def stat(self, path):
+        """returns (mtime_ns, size) for a given path, or None if not found"""
+        path = Path(path)
+        if not self.scan_folders:
+            if path not in self._files:
+                try:
+                    st = os.stat(path)
+                    self._files[path] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    self._files[path] = None
+            return self._files[path]
+        folder = path.parent
+        if folder not in self._folders:
+            self._folders[folder] = _scan_folder(folder)
+        return self._folders[folder].get(path.name, None)
+
+    def signature(self, path_list):
+        """returns a signature string for a list of paths"""
+        sig = []
+        for path in path_list:
+            st = self.stat(path)
+            sig.append("-" if st is None else "%i:%i" % st)
+        return "|".join(sig)
+
+
+def get_signature(meta, stat_cache):
+    """returns the signature of a metadata object (for its current path) :
+    the stat signature of the file and of its dependencies, and the metadata
+    own signature (see AbstractMetaData.signature())"""
+    signature = stat_cache.signature([meta.path] + meta.dependencies())
+    meta_signature = meta.signature()
+    if meta_signature:
+        signature += "|" + meta_signature
+    return signature
+
+
+def gen_index_path(folder, index_folder=INDEX_FOLDER):
+    """returns the path of the index database of a given data folder : it is
+    stored in index_folder, and named after a hash of the data folder path"""
+    folder = Path(folder).absolute()
+    folder_hash = hashlib.sha1(str(folder).encode()).hexdigest()
+    return Path(index_folder).expanduser() / (folder_hash + ".sqlite")
+
+
+# %% INDEX CLASS
+
+
+class MetadataIndex(object):
+    """sqlite-based persistent metadata index, for one folder"""
+
+    def __init__(self, folder, index_folder=INDEX_FOLDER):
+        self.folder = Path(folder)
+        self.path = gen_index_path(folder, index_folder)
+        self._connection = None
+        self._open()
+
+    def _open(self):
+        """opens (and initializes if needed) the database"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            con = sqlite3.connect(str(self.path), check_same_thread=False)
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                "path TEXT, name TEXT, signature TEXT, data TEXT, "
+                "PRIMARY KEY (path, name))"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            # check version : reset if needed
+            res = con.execute("SELECT value FROM info WHERE key='version'").fetchone()
+            if res is None or res[0] != INDEX_VERSION:
+                con.execute("DELETE FROM metadata")
+                con.execute(
+                    "INSERT OR REPLACE INTO info VALUES ('version', ?)",
+                    (INDEX_VERSION,),
+                )
+            con.execute(
+                "INSERT OR REPLACE INTO info VALUES ('folder', ?)",
+                (str(self.folder),),
+            )
+            con.commit()
+            self._connection = con
+        except (sqlite3.Error, OSError) as e:
+            logger.debug(f"could not open metadata index '{self.path}' : {e}")
+            self._connection = None
+
+    @property
+    def available(self):
+        return self._connection is not None
+
+    def get_all(self):
+        """returns the whole index content, as a
+        {(path, name): (signature, data)} dictionnary"""
+        if not self.available:
+            return {}
+        try:
+            rows = self._connection.execute(
+                "SELECT path, name, signature, data FROM metadata"
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.debug(f"could not read metadata index '{self.path}' : {e}")
+            return {}
+        return {(p, n): (s, d) for p, n, s, d in rows}
+
+    def get_many(self, path_list):
+        """same as get_all(), restricted to a list of paths"""
+        if not self.available:
+            return {}
+        path_list = [str(p) for p in path_list]
+        out = {}
+        try:
+            # (sqlite limits the number of variables per query)
+            for i in range(0, len(path_list), 500):
+                chunk = path_list[i : i + 500]
+                query = "SELECT path, name, signature, data FROM metadata "
+                query += "WHERE path IN (%s)" % ",".join("?" * len(chunk))
+                for p, n, s, d in self._connection.execute(query, chunk):
+                    out[(p, n)] = (s, d)
+        except sqlite3.Error as e:
+            logger.debug(f"could not read metadata index '{self.path}' : {e}")
+            return {}
+        return out
+
+    def set_many(self, entries):
+        """stores a list of (path, name, signature, data) entries, where data
+        is the list of metadata parameters"""
+        if not self.available or not entries:
+            return
+        rows = []
+        for path, name, signature, data in entries:
+            try:
+                data_str = json.dumps(data, default=_json_default)
+            except (TypeError, ValueError) as e:
+                logger.debug(f"could not serialize metadata '{name}' ({path}) : {e}")
+                continue
+            rows.append((str(path), name, signature, data_str))
+        try:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?)", rows
+            )
+            self._connection.commit()
+        except sqlite3.Error as e:
+            logger.debug(f"could not write metadata index '{self.path}' : {e}")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def get_index(folder, index_folder=INDEX_FOLDER):
+    """returns the metadata index of a given folder (opened only once)"""
+    key = (Path(folder), str(index_folder))
+    if key not in _OPENED_INDEXES:
+        _OPENED_INDEXES[key] = MetadataIndex(folder, index_folder)
+    return _OPENED_INDEXES[key]
+
+
+def close_all_indexes():
+    """closes all opened indexes"""
+    for index in _OPENED_INDEXES.values():
+        index.close()
+    _OPENED_INDEXES.clear()
+
+
+# %% METADATA ANALYSIS
+
+
+def _restore_metadata(name, path, data):
+    """generates a metadata object from indexed data"""
+    meta = AbstractMetaData()
+    meta.name = name
+    meta.path = path
+    meta._data = data  # already checked when stored
+    return meta
+
+
+def _analyze_file(path, metadata_classes):
+    """analyzes one file with a list of metadata classes. If the analysis of
+    one metadata class fails, the error is logged and the corresponding
+    element of the returned list is None (the other classes are kept)"""
+    metadata_list = []
+    for meta_class in metadata_classes:
+        meta = meta_class()
+        meta.path = path
+        try:
+            meta.analyze()
+        except Exception as e:
+            msg = f"error while analyzing '{path}' with '{meta.name}' : {e}"
+            logger.warning(msg)
+            meta = None
+        metadata_list.append(meta)
+    return metadata_list
+
+
+def analyze_files(
+    path_list,
+    metadata_classes,
+    use_index=True,
+    index_folder=INDEX_FOLDER,
+    reset_index=False,
+    max_workers=None,
+    callback=None,
+    stat_cache=None,
+):
+    """analyzes the metadata of a list of files, using the persistent index
+    when available. The files that are not (or no longer) indexed are analyzed
+    in parallel, over a thread pool.
+
+    Parameters
+    ----------
+    path_list : list of Path
+        files to analyze
+    metadata_classes : list
+        metadata classes (children of AbstractMetaData) to use
+    use_index : bool, optional
+        if False, the index is neither read nor written
+    index_folder : str or Path, optional
+        folder where the indexes (one per data folder) are stored
+    reset_index : bool, optional
+        if True, all the files are re-analyzed (and the index updated)
+    max_workers : int, optional
+        number of threads used for the analysis (None or 0 : python default,
+        1 : no thread pool)
+    callback : function, optional
+        called as callback(n_done, n_total) each time a file is analyzed
+    stat_cache : StatCache, optional
+        used to compute the files signatures (a new one is created if None)
+
+    Returns
+    -------
+    dict
+        {path: OrderedDict({metadata name: metadata object})}, without the
+        metadata whose analysis failed
+    """
+    # -- init one object per metadata class, to get names and dependencies
+    meta_list = [meta_class() for meta_class in metadata_classes]
+
+    # -- group files by folder
+    folders = OrderedDict()
+    for path in path_list:
+        path = Path(path)
+        folders.setdefault(path.parent, []).append(path)
+
+    # -- get metadata from index
+    if stat_cache is None:
+        stat_cache = StatCache()
+    found = {}  # {path: {name: meta}}
+    to_analyze = OrderedDict()  # {path: [(meta_class, signature), ...]}
+    for folder, folder_paths in folders.items():
+        # get index content (one query per folder)
+        index = get_index(folder, index_folder) if use_index else None
+        if index is None or reset_index:
+            indexed = {}
+        elif len(folder_paths) <= INDEX_QUERY_MAX_FILES:
+            indexed = index.get_many(folder_paths)
+        else:
+            indexed = index.get_all()
+        for path in folder_paths:
+            found[path] = {}
+            for meta_class, meta_ref in zip(metadata_classes, meta_list):
+                # get signature
+                meta_ref.path = path
+                signature = get_signature(meta_ref, stat_cache)
+                # found in index ?
+                key = (str(path), meta_ref.name)
+                if key in indexed and indexed[key][0] == signature:
+                    data = json.loads(indexed[key][1])
+                    meta = _restore_metadata(meta_ref.name, path, data)
+                    found[path][meta.name] = meta
+                # otherwise : to be analyzed !
+                else:
+                    to_analyze.setdefault(path, []).append((meta_class, signature))
+
+    # -- analyze the others
+    n_total = len(to_analyze)
+    new_entries = {}  # {folder: [(path, name, signature, data), ...]}
+
+    def _store(path, metadata_list, i_done):
+        for (_, signature), meta in zip(to_analyze[path], metadata_list):
+            # (failed analysis : not stored, so that it is tried again)
+            if meta is None:
+                continue
+            found[path][meta.name] = meta
+            entry = (path, meta.name, signature, meta.data)
+            new_entries.setdefault(path.parent, []).append(entry)
+        if callback is not None:
+            callback(i_done, n_total)
+
+    if n_total > 0 and max_workers == 1:
+        for i_done, (path, tasks) in enumerate(to_analyze.items()):
+            metadata_list = _analyze_file(path, [t[0] for t in tasks])
+            _store(path, metadata_list, i_done + 1)
+    elif n_total > 0:
+        with ThreadPoolExecutor(max_workers=max_workers or None) as executor:
+            futures = {
+                executor.submit(_analyze_file, path, [t[0] for t in tasks]): path
+                for path, tasks in to_analyze.items()
+            }
+            for i_done, future in enumerate(as_completed(futures)):
+                path = futures[future]
+                _store(path, future.result(), i_done + 1)
+
+    # -- update indexes
+    if use_index:
+        for folder, entries in new_entries.items():
+            get_index(folder, index_folder).set_many(entries)
+
+    # -- sort results, following the metadata classes order
+    results = {}
+    for path, metadata_dic in found.items():
+        results[path] = OrderedDict(
+            (m.name, metadata_dic[m.name]) for m in meta_list if m.name in metadata_dic
+        )
+
+    return results
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 18:52:40
+
+Comments : columnar metadata table. The values of each metadata parameter
+           (for instance ('fit', 'ROI 0::N')) are stored in a numpy array,
+           with one row per file. Numeric parameters are stored in float
+           arrays, the others in object arrays. The table is updated
+           incrementally, when files enter or leave the metadata cache (see
+           HAL.classes.metadata.cache), so that getting the metadata of a
+           selection of files only costs one array indexing per parameter.
+"""
+
+# %% IMPORTS
+
+# -- global
+import logging
+from numbers import Number, Real
+
+import numpy as np
+
+# -- logger
+logger = logging.getLogger(__name__)
+
+# %% GLOBAL VARIABLES
+
+# initial number of rows of the table (doubled when full)
+INITIAL_CAPACITY = 256
+
+# row 0 is never used : it is filled with NaNs, and returned for files that
+# are not in the table
+MISSING_ROW = 0
+
+
+# %% CLASS DEFINITION
+
+
+class MetadataTable(object):
+    """columnar metadata table, with one row per file and one column per
+    (metadata name, parameter name)"""
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._capacity = max(capacity, 2)
+        self.clear()
+
+    def clear(self):
+        """removes all the files (and columns) from the table"""
+        self._rows = {}  # {path: row}
+        self._free_rows = list(range(self._capacity - 1, MISSING_ROW, -1))
+        self._columns = {}  # {(meta name, param name): values array}
+        self._present = {}  # {(meta name, param name): boolean array}
+        self._info = {}  # {(meta name, param name): last param dic}
+        self._count = {}  # {(meta name, param name): number of values}
+        self._numeric_count = {}  # {(meta name, param name): numeric values}
+
+    def __contains__(self, path):
+        return path in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    # == COLUMNS
+
+    def columns(self):
+        """returns the list of available columns (meta name, param name)"""
+        return list(self._columns.keys())
+
+    def isNumeric(self, column):
+        """returns True if at least one value of the column is a number"""
+        return self._numeric_count.get(column, 0) > 0
+
+    def getInfo(self, column):
+        """returns the parameter dictionnary (unit, display, comment...) of
+        the last value stored in a given column"""
+        return self._info.get(column, None)
+
+    def _newColumn(self, numeric):
+        if numeric:
+            return np.full(self._capacity, np.nan)
+        column = np.empty(self._capacity, dtype=object)
+        column[:] = np.nan
+        return column
+
+    def _addColumn(self, key, numeric):
+        self._columns[key] = self._newColumn(numeric)
+        self._present[key] = np.zeros(self._capacity, dtype=bool)
+        self._count[key] = 0
+        self._numeric_count[key] = 0
+
+    def _removeColumn(self, key):
+        for dic in [
+            self._columns,
+            self._present,
+            self._info,
+            self._count,
+            self._numeric_count,
+        ]:
+            dic.pop(key, None)
+
+    def _grow(self):
+        """doubles the number of rows of the table"""
+        old_capacity = self._capacity
+        self._capacity *= 2
+        for key, column in self._columns.items():
+            new_column = self._newColumn(column.dtype != object)
+            new_column[:old_capacity] = column
+            self._columns[key] = new_column
+            present = np.zeros(self._capacity, dtype=bool)
+            present[:old_capacity] = self._present[key]
+            self._present[key] = present
+        self._free_rows = list(range(self._capacity - 1, old_capacity - 1, -1))
+
+    # == ROWS
+
+    def add(self, path, metadata_dic):
+        """adds (or replaces) the metadata of one file, given as a dictionnary
+        {metadata name: metadata object}"""
+        if path in self._rows:
+            self.remove(path)
+        if not self._free_rows:
+            self._grow()
+        row = self._free_rows.pop()
+        self._rows[path] = row
+        for meta_name, meta in metadata_dic.items():
+            for param in meta.data:
+                key = (meta_name, param["name"])
+                value = param["value"]
+                is_real = isinstance(value, Real)
+                if key not in self._columns:
+                    self._addColumn(key, is_real)
+                elif not is_real and self._columns[key].dtype != object:
+                    # a non-numeric value : convert to an object column
+                    self._columns[key] = self._columns[key].astype(object)
+                column = self._columns[key]
+                if self._present[key][row]:
+                    # duplicated parameter name : keep the last value
+                    if isinstance(column[row], Number):
+                        self._numeric_count[key] -= 1
+                else:
+                    self._present[key][row] = True
+                    self._count[key] += 1
+                column[row] = value
+                self._info[key] = param
+                if isinstance(value, Number):
+                    self._numeric_count[key] += 1
+
+    def remove(self, path):
+        """removes the metadata of one file"""
+        row = self._rows.pop(path, None)
+        if row is None:
+            return
+        for key in list(self._columns.keys()):
+            present = self._present[key]
+            if not present[row]:
+                continue
+            column = self._columns[key]
+            if isinstance(column[row], Number):
+                self._numeric_count[key] -= 1
+            column[row] = np.nan
+            present[row] = False
+            self._count[key] -= 1
+            # remove empty columns
+            if self._count[key] == 0:
+                self._removeColumn(key)
+        self._free_rows.append(row)
+
+    # == SELECTION
+
+    def select(self, path_list):
+        """returns the metadata of a list of files, as a dictionnary
+        {meta name: {param name: values array}}. The values of the files
+        that are not in the table are NaNs. The parameter dictionnaries
+        (unit, display, comment...) are stored in the '_<param name>_info'
+        entries"""
+        rows = np.fromiter(
+            (self._rows.get(p, MISSING_ROW) for p in path_list),
+            dtype=int,
+            count=len(path_list),
+        )
+        metadata = {}
+        for key, column in self._columns.items():
+            meta_name, param_name = key
+            meta_dic = metadata.setdefault(meta_name, {})
+            meta_dic[param_name] = column[rows]
+            meta_dic["_%s_info" % param_name] = self._info[key]
+        return metadata
@@ -12,23 +12,9 @@ Comments : implements the Settings class, that manages user settings
 import os
 import configparser
 import logging
-from pathlib import Path
+import threading
 from io import StringIO
-from PyQt5.QtGui import QKeySequence
-from PyQt5.QtWidgets import (
-    QDialogButtonBox,
-    QVBoxLayout,
-    QHBoxLayout,
-    QSpacerItem,
-    QGridLayout,
-    QLabel,
-    QDialog,
-    QPlainTextEdit,
-    QPushButton,
-    QSizePolicy,
-    QMessageBox,
-    QShortcut,
-)
+from pathlib import Path
 
 # -- logger
 logger = logging.getLogger(__name__)
@@ -44,11 +30,32 @@ DATA_DEFAULTS = {
     "day folder": "%d",
     "month folder": "%m",
     "year folder": "%Y",
+    "cache size": 500,  # memory budget for loaded data (MB)
+    "prefetch runs": 2,  # number of next / previous runs loaded in advance
+    "watch folder": True,  # update the run list when new files are written
+    "watch polling period": 0,  # (s) if > 0, poll instead of using notifications
 }
 
-METADATA_DEFAULTS = {"autorefresh cache": True, "do not display": "com_x, com_y"}
+METADATA_DEFAULTS = {
+    "autorefresh cache": True,
+    "do not display": "com_x, com_y",
+    "persistent index": True,
+    "index folder": "~/.HAL/metadata_index",  # one index per data folder
+    "analysis workers": 0,  # number of threads for metadata analysis (0 = auto)
+}
 
-FIT_DEFAULTS = {"fit folder name": ".HAL_fits", "custom guess": "false"}
+FIT_DEFAULTS = {
+    "fit folder name": ".HAL_fits",
+    "custom guess": "false",
+    "batch workers": 0,  # number of processes for batch fitting (0 = all cores)
+    "roi workers": 0,  # number of threads for multi-roi fits (0 = auto)
+    "batch warm start": False,  # start each fit from the previous run result
+    "skip unchanged fits": True,  # do not fit again runs fitted with same params
+    "binning": 1,  # fit binned data (binning x binning pixels blocks)
+    "binning refinement": True,  # refine binned fits at full resolution
+    "use fit store": False,  # save fits in one database per folder (not json)
+    "json format": "indent",  # saved fits format : indent, compact or beautify
+}
 
 GUI_DEFAULT = {
     "font family": "Sans Serif",
@@ -59,100 +66,11 @@ DEV_DEFAULT = {
     "log callbacks": False,
 }
 
+DEFAULT_CONFIG_PATH = Path().home() / ".HAL" / "global.conf"
 
-# %% SETTINGS EDITOR DIALG CLASS
-
-
-class SettingsEditor(QDialog):
-    def __init__(self, user_config_path, default_config="", parent=None):
-        super().__init__(parent)
-
-        self.setWindowTitle("Config editor")
-        self.resize(800, 600)
-        # -- Config editors
-        # create
-        self.defaultConfigDisplay = QPlainTextEdit()
-        self.defaultConfigDisplay.setPlainText(default_config)
-        self.defaultConfigDisplay.setReadOnly(True)
-        self.userConfigEdit = QPlainTextEdit()
-        # titles
-        default_title = QLabel("Default config")
-        user_title = QLabel("User config (overrides default)")
-        # join in layout
-        self.configLayout = QGridLayout()
-        self.configLayout.addWidget(default_title, 0, 0)
-        self.configLayout.addWidget(self.defaultConfigDisplay, 1, 0)
-        self.configLayout.addWidget(user_title, 0, 1)
-        self.configLayout.addWidget(self.userConfigEdit, 1, 1)
-
-        # -- Buttons
-        # check button
-        self.checkButton = QPushButton("Check config")
-        self.checkButton.clicked.connect(self.checkConfig)
-        # cancel / save
-        QBtn = QDialogButtonBox.Cancel | QDialogButtonBox.Save
-        # create dialog button box & connect callbacks
-        self.buttonBox = QDialogButtonBox(QBtn)
-        self.buttonBox.accepted.connect(self.checkBeforeAccept)
-        self.buttonBox.rejected.connect(self.reject)
-        # button layout
-        self.buttonLayout = QHBoxLayout()
-        self.buttonLayout.addWidget(self.checkButton)
-        spacer = QSpacerItem(40, 20, QSizePolicy.Preferred, QSizePolicy.Minimum)
-        self.buttonLayout.addItem(spacer)
-        self.buttonLayout.addWidget(self.buttonBox)
-
-        # -- Setting up main layout
-        self.layout = QVBoxLayout()
-        self.layout.addLayout(self.configLayout)
-        message = QLabel("user config path: %s" % user_config_path)
-        self.layout.addWidget(message)
-        self.layout.addLayout(self.buttonLayout)
-        self.setLayout(self.layout)
-
-        # -- keyboard shortcut
-        self.ctrlS = QShortcut(QKeySequence("Ctrl+S"), self)
-        self.ctrlS.activated.connect(self.checkBeforeAccept)
-
-        # -- load user config
-        self.config_path = Path(user_config_path)
-        if self.config_path.is_file():
-            current_config_text = self.config_path.read_text()
-            self.userConfigEdit.setPlainText(current_config_text)
-        else:
-            placeholder = "edit here to create a custom settings file"
-            self.userConfigEdit.setPlaceholderText(placeholder)
-
-    def checkConfig(self, show_sucess=True):
-        """checks that the config will be parsed by configparser"""
-        # create parser
-        parser = configparser.RawConfigParser()
-        # get user config
-        user_config = self.userConfigEdit.toPlainText()
-        # try / catch
-        try:
-            parser.read_string(user_config)
-        except Exception as e:
-            msg = "Parsing the current config as raised the following exception :"
-            msg += "\n\n"
-            msg += repr(e)
-            QMessageBox.warning(self, "Exception caught while parsing", msg)
-            return False
-
-        if show_sucess:
-            QMessageBox.information(self, "Good boi", "Config parsed sucessfully !")
-
-        return True
-
-    def checkBeforeAccept(self):
-        """checks the config before accepting"""
-        #  check
-        if not self.checkConfig(show_sucess=False):
-            return
-        #  write
-        self.config_path.write_text(self.userConfigEdit.toPlainText())
-        # close window with "accept()"
-        self.accept()
+# process-wide settings, shared by the modules (see get_shared_settings())
+_shared_settings = None
+_shared_settings_lock = threading.Lock()
 
 
 # %% MAIN CLASS DEFINITION
@@ -165,6 +83,7 @@ class Settings(object):
         super(Settings, self).__init__()
 
         self.conf_file_path = path
+        self._conf_file_mtime = None
 
         # initialize config parser
         self.config = configparser.RawConfigParser()
@@ -179,13 +98,23 @@ class Settings(object):
         # load
         self.load()
 
-    def initDefaults(self):
-        self.config["data"] = DATA_DEFAULTS
-        self.config["global"] = GLOBAL_DEFAULTS
-        self.config["fit"] = FIT_DEFAULTS
-        self.config["gui"] = GUI_DEFAULT
-        self.config["dev"] = DEV_DEFAULT
-        self.config["metadata"] = METADATA_DEFAULTS
+    def initDefaults(self, config=None):
+        if config is None:
+            config = self.config
+        config["data"] = DATA_DEFAULTS
+        config["global"] = GLOBAL_DEFAULTS
+        config["fit"] = FIT_DEFAULTS
+        config["gui"] = GUI_DEFAULT
+        config["dev"] = DEV_DEFAULT
+        config["metadata"] = METADATA_DEFAULTS
+
+    def _getConfFileMtime(self):
+        """returns the modification time of the configuration file (None if
+        it does not exist)"""
+        try:
+            return os.stat(self.conf_file_path).st_mtime_ns
+        except OSError:
+            return None
 
     def load(self):
         """load the configuration file and parse it"""
@@ -197,8 +126,30 @@ class Settings(object):
             return
 
         # load
+        self._conf_file_mtime = self._getConfFileMtime()
         self.config.read(self.conf_file_path)
 
+    def reload(self):
+        """reloads the settings from scratch (defaults + configuration file).
+        The new config is built before replacing the current one, so that it
+        can safely be read from other threads in the meantime"""
+        logger.debug("reloading settings from %s" % self.conf_file_path)
+        config = configparser.RawConfigParser()
+        self.initDefaults(config)
+        mtime = self._getConfFileMtime()
+        if mtime is not None:
+            config.read(self.conf_file_path)
+        self.config = config
+        self._conf_file_mtime = mtime
+
+    def reloadIfModified(self):
+        """reloads the settings if the configuration file was modified since
+        it was loaded. Returns True if the settings were reloaded"""
+        if self._getConfFileMtime() == self._conf_file_mtime:
+            return False
+        self.reload()
+        return True
+
     def save(self, out_file=None):
         if out_file is None:
             out_file = self.conf_file_path
@@ -207,6 +158,9 @@ class Settings(object):
 
     def openGuiEditor(self, parent=None):
         """opens a gui settings editor"""
+        # imported here, so that the settings can be used without PyQt5
+        from .settingseditor import SettingsEditor
+
         logger.debug("edit settings in gui")
         # execute gui
         default_config = self._default_settings_as_string
@@ -219,9 +173,7 @@ class Settings(object):
         # take results
         if res:
             logger.debug("settings changed, reload !")
-            self.config = configparser.RawConfigParser()
-            self.initDefaults()
-            self.load()
+            self.reload()
             return True
         else:
             return False
@@ -237,6 +189,32 @@ class Settings(object):
         return out_str
 
 
+# %% SHARED SETTINGS
+
+
+def set_shared_settings(settings):
+    """sets the process-wide settings, shared by the modules (the gui and the
+    command line interface share their own settings)"""
+    global _shared_settings
+    with _shared_settings_lock:
+        _shared_settings = settings
+
+
+def get_shared_settings():
+    """returns the process-wide settings, shared by the modules (for instance
+    the metadata classes), instead of parsing the configuration file for each
+    module instance. Unless set with set_shared_settings(), they are loaded
+    from ~/.HAL/global.conf. They are reloaded when the configuration file is
+    modified."""
+    global _shared_settings
+    with _shared_settings_lock:
+        if _shared_settings is None:
+            _shared_settings = Settings(path=DEFAULT_CONFIG_PATH)
+        settings = _shared_settings
+    settings.reloadIfModified()
+    return settings
+
+
 # %% TEST
 if __name__ == "__main__":
     from pathlib import Path
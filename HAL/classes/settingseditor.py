@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 17:02:11
+
+Comments : implements the SettingsEditor dialog, used to edit the user
+           settings from the gui (see Settings.openGuiEditor())
+"""
+
+# %% IMPORTS
+
+# -- global
+import configparser
+from pathlib import Path
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtWidgets import (
+    QDialogButtonBox,
+    QVBoxLayout,
+    QHBoxLayout,
+    QSpacerItem,
+    QGridLayout,
+    QLabel,
+    QDialog,
+    QPlainTextEdit,
+    QPushButton,
+    QSizePolicy,
+    QMessageBox,
+    QShortcut,
+)
+
+# %% SETTINGS EDITOR DIALG CLASS
+
+
+class SettingsEditor(QDialog):
+    def __init__(self, user_config_path, default_config="", parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle("Config editor")
+        self.resize(800, 600)
+        # -- Config editors
+        # create
+        self.defaultConfigDisplay = QPlainTextEdit()
+        self.defaultConfigDisplay.setPlainText(default_config)
+        self.defaultConfigDisplay.setReadOnly(True)
+        self.userConfigEdit = QPlainTextEdit()
+        # titles
+        default_title = QLabel("Default config")
+        user_title = QLabel("User config (overrides default)")
+        # join in layout
+        self.configLayout = QGridLayout()
+        self.configLayout.addWidget(default_title, 0, 0)
+        self.configLayout.addWidget(self.defaultConfigDisplay, 1, 0)
+        self.configLayout.addWidget(user_title, 0, 1)
+        self.configLayout.addWidget(self.userConfigEdit, 1, 1)
+
+        # -- Buttons
+        # check button
+        self.checkButton = QPushButton("Check config")
+        self.checkButton.clicked.connect(self.checkConfig)
+        # cancel / save
+        QBtn = QDialogButtonBox.Cancel | QDialogButtonBox.Save
+        # create dialog button box & connect callbacks
+        self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.accepted.connect(self.checkBeforeAccept)
+        self.buttonBox.rejected.connect(self.reject)
+        # button layout
+        self.buttonLayout = QHBoxLayout()
+        self.buttonLayout.addWidget(self.checkButton)
+        spacer = QSpacerItem(40, 20, QSizePolicy.Preferred, QSizePolicy.Minimum)
+        self.buttonLayout.addItem(spacer)
+        self.buttonLayout.addWidget(self.buttonBox)
+
+        # -- Setting up main layout
+        self.layout = QVBoxLayout()
+        self.layout.addLayout(self.configLayout)
+        message = QLabel("user config path: %s" % user_config_path)
+        self.layout.addWidget(message)
+        self.layout.addLayout(self.buttonLayout)
+        self.setLayout(self.layout)
+
+        # -- keyboard shortcut
+        self.ctrlS = QShortcut(QKeySequence("Ctrl+S"), self)
+        self.ctrlS.activated.connect(self.checkBeforeAccept)
+
+        # -- load user config
+        self.config_path = Path(user_config_path)
+        if self.config_path.is_file():
+            current_config_text = self.config_path.read_text()
+            self.userConfigEdit.setPlainText(current_config_text)
+        else:
+            placeholder = "edit here to create a custom settings file"
+            self.userConfigEdit.setPlaceholderText(placeholder)
+
+    def checkConfig(self, show_sucess=True):
+        """checks that the config will be parsed by configparser"""
+        # create parser
+        parser = configparser.RawConfigParser()
+        # get user config
+        user_config = self.userConfigEdit.toPlainText()
+        # try / catch
+        try:
+            parser.read_string(user_config)
+        except Exception as e:
+            msg = "Parsing the current config as raised the following exception :"
+            msg += "\n\n"
+            msg += repr(e)
+            QMessageBox.warning(self, "Exception caught while parsing", msg)
+            return False
+
+        if show_sucess:
+            QMessageBox.information(self, "Good boi", "Config parsed sucessfully !")
+
+        return True
+
+    def checkBeforeAccept(self):
+        """checks the config before accepting"""
+        #  check
+        if not self.checkConfig(show_sucess=False):
+            return
+        #  write
+        self.config_path.write_text(self.userConfigEdit.toPlainText())
+        # close window with "accept()"
+        self.accept()
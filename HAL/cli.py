@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 17:35:42
+
+Comments : headless command line interface, to fit / analyze data without
+           the gui (e.g. for reprocessing on a compute node). PyQt5 is never
+           imported : the modules are loaded in headless mode (no display
+           classes, see HAL.loader.modules.load).
+
+           usage : python -m HAL {fit, export, index} [options] PATH [PATH ...]
+
+           PATH can be a data file, a data folder (with all its runs), or a
+           dataset json file (see HAL.classes.data.datasets)
+"""
+
+# %% IMPORTS
+
+# -- global
+import argparse
+import logging
+import sys
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+
+# -- local
+from . import loader
+from .classes.settings import Settings, set_shared_settings
+from .classes.data import scan
+from .classes.data.datasets import read_dataset
+from .classes.fit import batch
+from .classes.fit.store import load_saved_fit_dic
+from .classes.metadata import index as metadata_index
+from .classes.metadata.export import EXPORT_FORMATS, export_data_dict
+
+# -- logger
+logger = logging.getLogger(__name__)
+
+
+# %% HEADLESS 'GUI'
+
+
+class HeadlessHAL(object):
+    """minimal replacement for the gui main window (HAL.gui.main.MainWindow),
+    that holds the settings and the loaded modules"""
+
+    def __init__(self, settings_path=None, user_modules=True):
+        # -- Hidden
+        self._version = batch.PROGRAM_INFO["version"]
+        self._name = batch.PROGRAM_INFO["name"]
+        self._url = batch.PROGRAM_INFO["url"]
+        self._settings_folder = Path().home() / ".HAL"
+        self._user_modules_folder = self._settings_folder / "user_modules"
+
+        # -- load settings
+        if settings_path is None:
+            settings_path = self._settings_folder / "global.conf"
+        self.settings = Settings(path=settings_path)
+        set_shared_settings(self.settings)  # used by the modules
+
+        # -- load modules (without displays)
+        if not self._user_modules_folder.is_dir():
+            user_modules = False
+        loader.modules.load(self, headless=True, user_modules=user_modules)
+
+    def getDataClass(self, name=None):
+        """returns the data class with a given name (default : the first one)"""
+        if name is None:
+            return self.data_classes[0]
+        for data_class in self.data_classes:
+            if data_class.name == name:
+                return data_class
+        names = ", ".join(data_class.name for data_class in self.data_classes)
+        raise ValueError(f"unknown data type '{name}' (available : {names})")
+
+    def getFitClass(self, name):
+        """returns the (2D) fit class with a given name"""
+        if name not in self.fit_classes_dic:
+            names = ", ".join(self.fit_classes_dic)
+            raise ValueError(f"unknown fit '{name}' (available : {names})")
+        return self.fit_classes_dic[name]
+
+    def getMetadataClasses(self, names=None):
+        """returns the metadata classes with the given names (default : all)"""
+        if not names:
+            return list(self.metadata_classes)
+        metadata_classes = [m for m in self.metadata_classes if m.name in names]
+        found = {m.name for m in metadata_classes}
+        for name in names:
+            if name not in found:
+                logger.warning(f"unknown metadata '{name}'")
+        return metadata_classes
+
+
+# %% TOOLS
+
+
+def _parse_box(spec):
+    """parses a 'x,y,width,height' string into a {"pos", "size"} dictionnary"""
+    values = [float(v) for v in spec.split(",")]
+    if len(values) != 4:
+        raise ValueError(f"'{spec}' should have the 'x,y,width,height' format")
+    return {"pos": values[:2], "size": values[2:]}
+
+
+def _parse_roi(spec):
+    """parses a 'name=x,y,width,height' roi definition"""
+    name, sep, box = spec.rpartition("=")
+    if not sep or not name:
+        raise ValueError(f"'{spec}' should have the 'name=x,y,width,height' format")
+    return name, _parse_box(box)
+
+
+def _get_saved_fit_definitions(path, fit_folder_name):
+    """returns the roi collection, background and fit name saved with the fit
+    of a given run"""
+    fit_dic = load_saved_fit_dic(path, fit_folder_name)
+    if not fit_dic:
+        raise ValueError(f"no saved fit found for '{path}'")
+    roi_collection = {
+        roi_name: {"pos": roi["pos"]["value"], "size": roi["size"]["value"]}
+        for roi_name, roi in fit_dic["collection"].items()
+    }
+    fit_info = fit_dic.get("__fit_info__", {})
+    background = None
+    if "background" in fit_info:
+        background = {
+            "pos": fit_info["background"]["pos"]["value"],
+            "size": fit_info["background"]["size"]["value"],
+        }
+    return roi_collection, background, fit_info.get("fit name", None)
+
+
+def get_path_lists(self, path_list, data_class=None, recursive=False):
+    """converts a list of paths (data files, data folders or dataset json
+    files) into an ordered dictionnary {set name: list of data files}. Single
+    data files are gathered in the "files" set"""
+    data_root = self.settings.config["data"]["root"]
+    path_lists = OrderedDict()
+    for path in path_list:
+        path = Path(path).expanduser()
+        # folder : all the runs (and the runs of its subfolders if recursive)
+        if path.is_dir():
+            if recursive:
+                for content in scan.scan_day_folder(path, data_class):
+                    name = path.name if content["name"] == "." else content["name"]
+                    path_lists[name] = content["file_list"][::-1]
+            else:
+                file_list, _ = scan.scan_folder(path, data_class)
+                path_lists[path.name] = file_list[::-1]
+        # dataset
+        elif path.suffix == ".json":
+            path_lists[path.stem] = read_dataset(path, data_root)
+        # data file
+        elif path.is_file():
+            path_lists.setdefault("files", []).append(path)
+        else:
+            logger.warning(f"'{path}' not found")
+    return path_lists
+
+
+def _analyze_files(self, path_list, args, reset_index=False, callback=None):
+    """analyzes the metadata of a list of files (see
+    HAL.classes.metadata.index.analyze_files)"""
+    conf = self.settings.config["metadata"]
+    return metadata_index.analyze_files(
+        path_list,
+        self.getMetadataClasses(args.metadata),
+        use_index=eval(conf["persistent index"]),
+        index_folder=conf["index folder"],
+        reset_index=reset_index,
+        max_workers=int(conf["analysis workers"]),
+        callback=callback,
+    )
+
+
+def _progress_printer(quiet, fmt):
+    """returns a progress callback, printing fmt % (n_done, n_total)"""
+
+    def _progress(n_done, n_total):
+        if not quiet:
+            print(fmt % (n_done, n_total), end="\r" if n_done < n_total else "\n")
+
+    return _progress
+
+
+# %% COMMANDS
+
+
+def fit(self, args):
+    """fits all the runs of the requested paths"""
+    conf = self.settings.config["fit"]
+    fit_folder_name = conf["fit folder name"]
+    data_class = self.getDataClass(args.data)
+
+    # -- rois, background and fit
+    fit_name = args.fit
+    background = None
+    if args.rois_from is not None:
+        saved = _get_saved_fit_definitions(Path(args.rois_from), fit_folder_name)
+        roi_collection, background, saved_fit_name = saved
+        fit_name = fit_name or saved_fit_name
+    else:
+        roi_collection = dict(_parse_roi(spec) for spec in args.roi)
+    if args.background is not None:
+        background = _parse_box(args.background)
+    if not roi_collection:
+        raise ValueError("no ROI defined (use --roi or --rois-from)")
+    if fit_name is None:
+        raise ValueError("no fit selected (use --fit)")
+    fit_class = self.getFitClass(fit_name)
+
+    # -- options (from settings, unless overriden)
+    binning = int(conf["binning"]) if args.binning is None else args.binning
+    refinement = eval(conf["binning refinement"])
+    warm_start = args.warm_start or eval(conf["batch warm start"])
+    max_workers = int(conf["batch workers"]) if args.workers is None else args.workers
+    skip_unchanged = eval(conf["skip unchanged fits"]) and not args.force
+
+    # -- fit
+    path_list = []
+    path_lists = get_path_lists(self, args.paths, data_class, args.recursive)
+    for file_list in path_lists.values():
+        path_list += file_list
+    n_total = len(path_list)
+    progress = _progress_printer(args.quiet, "fitting run %i / %i")
+    n_done = 0
+
+    def _callback(path, success):
+        nonlocal n_done
+        n_done += 1
+        if not success:
+            logger.warning(f"fit failed for '{path}'")
+        progress(n_done, n_total)
+
+    results = batch.batch_fit(
+        path_list,
+        data_class,
+        fit_class,
+        roi_collection,
+        background=background,
+        fit_folder_name=fit_folder_name,
+        program_info=batch.PROGRAM_INFO,
+        use_store=eval(conf["use fit store"]),
+        json_format=conf["json format"],
+        binning=binning,
+        refinement=refinement,
+        warm_start=warm_start,
+        max_workers=max_workers,
+        callback=_callback,
+        skip_unchanged=skip_unchanged,
+    )
+
+    # -- done
+    n_failed = len([success for success in results.values() if not success])
+    n_skipped = len([s for s in results.values() if s == batch.SKIPPED])
+    n_fitted = len(results) - n_failed - n_skipped
+    if not args.quiet:
+        print(f"{n_fitted} runs fitted, {n_skipped} skipped, {n_failed} failed")
+    return 1 if n_failed else 0
+
+
+def export(self, args):
+    """exports the metadata of the requested paths"""
+    # -- get metadata
+    data_class = self.getDataClass(args.data)
+    path_lists = get_path_lists(self, args.paths, data_class, args.recursive)
+    all_paths = [path for path_list in path_lists.values() for path in path_list]
+    progress = _progress_printer(args.quiet, "analyzing file %i / %i")
+    metadata = _analyze_files(self, all_paths, args, callback=progress)
+
+    # -- get numeric parameters, and their info
+    info = OrderedDict()
+    for path in all_paths:
+        for meta_name, meta in metadata.get(path, {}).items():
+            numeric_keys = set(meta.get_numeric_keys())
+            for param in meta.data:
+                name = "%s.%s" % (meta_name, param["name"])
+                if param["name"] in numeric_keys and name not in info:
+                    info[name] = param
+
+    # -- prepare output dictionnary
+    output = OrderedDict()
+    for set_name, path_list in path_lists.items():
+        values = {name: np.full(len(path_list), np.nan) for name in info}
+        for i_path, path in enumerate(path_list):
+            for meta_name, meta in metadata.get(path, {}).items():
+                for param in meta.data:
+                    name = "%s.%s" % (meta_name, param["name"])
+                    if name in values:
+                        values[name][i_path] = param["value"]
+        output[set_name] = {
+            name: {"val": values[name], "info": info[name]} for name in info
+        }
+
+    # -- save
+    if not info:
+        logger.warning("no metadata found")
+        return 1
+    export_data_dict(output, args.output, batch.PROGRAM_INFO)
+    if not args.quiet:
+        print(f"{len(all_paths)} runs exported to '{args.output}'")
+    return 0
+
+
+def index(self, args):
+    """updates the persistent metadata index of the requested paths"""
+    data_class = self.getDataClass(args.data)
+    path_lists = get_path_lists(self, args.paths, data_class, args.recursive)
+    all_paths = [path for path_list in path_lists.values() for path in path_list]
+    progress = _progress_printer(args.quiet, "analyzing file %i / %i")
+    metadata = _analyze_files(self, all_paths, args, args.reset, callback=progress)
+    if not args.quiet:
+        print(f"{len(metadata)} runs indexed")
+    return 0
+
+
+# %% ARGUMENT PARSER
+
+
+def get_parser():
+    """returns the command line argument parser"""
+    # -- init parser
+    parser = argparse.ArgumentParser(
+        prog="python -m HAL",
+        description="HAL, the Atom Locator : headless command line interface",
+    )
+    parser.add_argument("--settings", help="settings file (default: HAL settings)")
+    parser.add_argument(
+        "--no-user-modules", action="store_true", help="do not load user modules"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # -- common arguments
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-d", "--debug", action="store_true", help="debug mode on")
+    common.add_argument("-q", "--quiet", action="store_true", help="no output")
+    common.add_argument(
+        "paths", nargs="+", help="data files, data folders or dataset json files"
+    )
+    common.add_argument("--data", help="data type (default: the first one)")
+    common.add_argument(
+        "-r", "--recursive", action="store_true", help="include subfolders"
+    )
+
+    # -- fit
+    fit_parser = subparsers.add_parser(
+        "fit", parents=[common], help="fit data files, and save the results"
+    )
+    fit_parser.add_argument("--fit", help="fit name (e.g. 'Gauss2D')")
+    fit_parser.add_argument(
+        "--roi",
+        action="append",
+        default=[],
+        metavar="NAME=X,Y,W,H",
+        help="roi definition, in pixels (can be repeated)",
+    )
+    fit_parser.add_argument(
+        "--rois-from",
+        metavar="RUN",
+        help="use the rois, background and fit saved with the fit of RUN",
+    )
+    fit_parser.add_argument(
+        "--background", metavar="X,Y,W,H", help="background definition, in pixels"
+    )
+    fit_parser.add_argument("--binning", type=int, help="fit binning")
+    fit_parser.add_argument(
+        "--warm-start", action="store_true", help="start from the previous run fit"
+    )
+    fit_parser.add_argument("--workers", type=int, help="number of processes")
+    fit_parser.add_argument(
+        "--force", action="store_true", help="fit again the unchanged runs"
+    )
+
+    # -- export
+    export_parser = subparsers.add_parser(
+        "export", parents=[common], help="export metadata (csv or hdf5)"
+    )
+    export_parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="output file (%s)" % ", ".join(EXPORT_FORMATS),
+    )
+    export_parser.add_argument(
+        "--metadata", nargs="+", help="metadata to export (default: all)"
+    )
+
+    # -- index
+    index_parser = subparsers.add_parser(
+        "index", parents=[common], help="update the persistent metadata index"
+    )
+    index_parser.add_argument(
+        "--metadata", nargs="+", help="metadata to index (default: all)"
+    )
+    index_parser.add_argument(
+        "--reset", action="store_true", help="analyze all the files again"
+    )
+
+    return parser
+
+
+# %% MAIN FUNCTION
+
+COMMANDS = {"fit": fit, "export": export, "index": index}
+
+
+def main(argv=None):
+    # -- parse
+    args = get_parser().parse_args(argv)
+
+    # -- setup logger
+    fmt = "[%(asctime)s] - %(name)s - %(levelname)s - %(message)s"
+    logging.basicConfig(format=fmt, datefmt="%H:%M:%S", level=logging.WARNING)
+    if args.debug:
+        logging.getLogger("HAL").setLevel(logging.DEBUG)
+
+    # -- run
+    hal = HeadlessHAL(args.settings, user_modules=not args.no_user_modules)
+    try:
+        return COMMANDS[args.command](hal, args)
+    except ValueError as e:
+        logger.error(e)
+        return 2
+    finally:
+        metadata_index.close_all_indexes()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -29,10 +29,9 @@ from .fit.polynomial1D import polyfit_generator
 # -- data
 from .data.rawCamera import RawCamData
 
-# -- display
-from .display.basicImageDisplay import BasicImageDisplay
-from .display.imageOnlyDisplay import ImageOnlyDisplay
-from .display.focusOnFit2D import FocusOnFit2D
+# NB : the display classes (that require PyQt5) are listed separately, in
+#      the display subpackage, so that the other modules can be loaded
+#      without a gui (see HAL.loader.modules.load)
 
 # %% STORE
 user_modules = [
@@ -45,10 +44,6 @@ user_modules = [
     ThomasFermi2DFit,
     # data
     RawCamData,
-    # display
-    BasicImageDisplay,
-    ImageOnlyDisplay,
-    FocusOnFit2D,
     # fits (1D)
     Gauss1DFit,
     Lorentz1DFit,
@@ -20,11 +20,14 @@ from HAL.classes.data.abstract import AbstractCameraPictureData
 class RawCamData(AbstractCameraPictureData):
     """docstring for Dummy"""
 
+    name = "Camera"
+
+    file_suffixes = (".png",)
+
     def __init__(self, path=Path(".")):
         super().__init__()
 
         # - general
-        self.name = "Camera"
         self.dimension = 2  # should be 1, 2 or 3
         self.path = path
 
@@ -40,10 +43,6 @@ class RawCamData(AbstractCameraPictureData):
         self.pixel_unit = (self.pixel_size_unit, self.pixel_size_unit)
         self.data = []
 
-    def filter(self):
-        """check whether path is compatible with extension / naming"""
-        return self.path.suffix == ".png"
-
     def load(self):
         """loads data"""
         # load (as 16bit array)
@@ -6,3 +6,15 @@ Modified : 2021-06-10 10:29:00
 
 Comments :
 """
+
+# %% IMPORT
+from .basicImageDisplay import BasicImageDisplay
+from .imageOnlyDisplay import ImageOnlyDisplay
+from .focusOnFit2D import FocusOnFit2D
+
+# %% STORE
+user_modules = [
+    BasicImageDisplay,
+    ImageOnlyDisplay,
+    FocusOnFit2D,
+]
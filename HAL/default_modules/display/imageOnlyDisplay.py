@@ -11,7 +11,6 @@ Comments : a basic (2D) image display. Can be used as an example when building
 
 # -- global
 import pyqtgraph as pg
-import numpy as np
 
 # -- local
 from HAL.classes.display.abstractImage import AbstractImageDisplay
@@ -91,19 +90,11 @@ class ImageOnlyDisplay(AbstractImageDisplay):
             xMin=0, yMin=0, xMax=image.shape[0], yMax=image.shape[1]
         )
         """
-        # get background
-        if self.background is not None:
-            background, _ = self.background.getArrayRegion(
-                image, self.current_image, returnMappedCoords=True
-            )
-            background_value = np.mean(background)
-        else:
-            background_value = 0
+        # subtract background (once, in the current data buffer)
+        data = self.setCurrentData(image)
 
         # update image
-        self.current_image.updateImage(image=image - background_value, levels=levels)
-        self.current_data = image - background_value
-        self._data_in = image
+        self.current_image.updateImage(image=data, levels=levels)
         self._current_levels = levels
         # set colormap
         self.updateColormap(colormap)
@@ -21,6 +21,21 @@ def DampedOscillation1D(x, *p):
     return p[0] + p[1] * np.sin(2 * np.pi * p[2] * x + p[3]) * np.exp(-x / p[4])
 
 
+def DampedOscillation1D_jac(x, *p):
+    """jacobian of DampedOscillation1D() with respect to p"""
+    phase = 2 * np.pi * p[2] * x + p[3]
+    damping = np.exp(-x / p[4])
+    sin_damped = np.sin(phase) * damping
+    cos_damped = np.cos(phase) * damping
+    jac = np.empty((np.size(phase), 5))
+    jac[:, 0] = 1
+    jac[:, 1] = sin_damped
+    jac[:, 2] = p[1] * cos_damped * 2 * np.pi * x
+    jac[:, 3] = p[1] * cos_damped
+    jac[:, 4] = p[1] * sin_damped * x / p[4] ** 2
+    return jac
+
+
 # %% CLASS DEFINITION
 class DampedOscillation1DFit(Abstract1DFit):
     """a 1D Gauss fit"""
@@ -42,6 +57,9 @@ class DampedOscillation1DFit(Abstract1DFit):
     def _fitfunc(self, x, *p):
         return DampedOscillation1D(x, *p)
 
+    def _jacobian(self, x, *p):
+        return DampedOscillation1D_jac(x, *p)
+
     def do_guess(self):
         """guess fit parameters"""
 
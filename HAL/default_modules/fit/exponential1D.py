@@ -21,6 +21,16 @@ def Exponential1D(x, *p):
     return p[0] * np.exp(-(x - p[1]) / p[2])
 
 
+def Exponential1D_jac(x, *p):
+    """jacobian of Exponential1D() with respect to p"""
+    E = np.exp(-(x - p[1]) / p[2])
+    jac = np.empty((np.size(E), 3))
+    jac[:, 0] = E
+    jac[:, 1] = p[0] * E / p[2]
+    jac[:, 2] = p[0] * E * (x - p[1]) / p[2] ** 2
+    return jac
+
+
 # %% CLASS DEFINITION
 class Exponential1DFit(Abstract1DFit):
     """a 1D Gauss fit"""
@@ -39,6 +49,9 @@ class Exponential1DFit(Abstract1DFit):
     def _fitfunc(self, x, *p):
         return Exponential1D(x, *p)
 
+    def _jacobian(self, x, *p):
+        return Exponential1D_jac(x, *p)
+
     def do_guess(self):
         """guess fit parameters"""
 
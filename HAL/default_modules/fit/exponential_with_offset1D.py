@@ -21,6 +21,17 @@ def Exponentialoffset1D(x, *p):
     return p[0] * np.exp(-(x - p[1]) / p[2]) + p[3]
 
 
+def Exponentialoffset1D_jac(x, *p):
+    """jacobian of Exponentialoffset1D() with respect to p"""
+    E = np.exp(-(x - p[1]) / p[2])
+    jac = np.empty((np.size(E), 4))
+    jac[:, 0] = E
+    jac[:, 1] = p[0] * E / p[2]
+    jac[:, 2] = p[0] * E * (x - p[1]) / p[2] ** 2
+    jac[:, 3] = 1
+    return jac
+
+
 # %% CLASS DEFINITION
 class ExponentialOffset1DFit(Abstract1DFit):
     """a 1D Gauss fit"""
@@ -39,6 +50,9 @@ class ExponentialOffset1DFit(Abstract1DFit):
     def _fitfunc(self, x, *p):
         return Exponentialoffset1D(x, *p)
 
+    def _jacobian(self, x, *p):
+        return Exponentialoffset1D_jac(x, *p)
+
     def do_guess(self):
         """guess fit parameters"""
 
@@ -21,6 +21,18 @@ def Gauss1D(x, *p):
     return p[0] + p[1] * np.exp(-((x - p[3]) ** 2) / 2 / p[2] ** 2)
 
 
+def Gauss1D_jac(x, *p):
+    """jacobian of Gauss1D() with respect to p"""
+    dx = x - p[3]
+    G = np.exp(-(dx**2) / 2 / p[2] ** 2)
+    jac = np.empty((np.size(G), 4))
+    jac[:, 0] = 1
+    jac[:, 1] = G
+    jac[:, 2] = p[1] * G * dx**2 / p[2] ** 3
+    jac[:, 3] = p[1] * G * dx / p[2] ** 2
+    return jac
+
+
 # %% CLASS DEFINITION
 class Gauss1DFit(Abstract1DFit):
     """a 1D Gauss fit"""
@@ -40,6 +52,9 @@ class Gauss1DFit(Abstract1DFit):
     def _fitfunc(self, x, *p):
         return Gauss1D(x, *p)
 
+    def _jacobian(self, x, *p):
+        return Gauss1D_jac(x, *p)
+
     def do_guess(self):
         """guess fit parameters"""
 
@@ -31,27 +31,76 @@ def Gauss2D(xy, *p):
     return p[0] + p[1] * Gauss(x, 1, p[2], p[4]) * Gauss(y, 1, p[3], p[5])
 
 
+def Gauss2D_jac(xy, *p):
+    """jacobian of Gauss2D() with respect to p"""
+    (x, y) = xy
+    dx = x - p[4]
+    dy = y - p[5]
+    G = Gauss(x, 1, p[2], p[4]) * Gauss(y, 1, p[3], p[5])
+    AG = p[1] * G
+    jac = np.empty((np.size(G), 6))
+    jac[:, 0] = 1
+    jac[:, 1] = G
+    jac[:, 2] = AG * dx**2 / p[2] ** 3
+    jac[:, 3] = AG * dy**2 / p[3] ** 3
+    jac[:, 4] = AG * dx / p[2] ** 2
+    jac[:, 5] = AG * dy / p[3] ** 2
+    return jac
+
+
+def Gauss2D_grid(x, y, *p):
+    """Gauss2D() evaluated on the grid defined by 1D coordinates x and y"""
+    return p[0] + p[1] * np.outer(Gauss(x, 1, p[2], p[4]), Gauss(y, 1, p[3], p[5]))
+
+
+def Gauss2D_grid_jac(x, y, *p):
+    """jacobian of Gauss2D_grid() with respect to p"""
+    dx = x - p[4]
+    dy = y - p[5]
+    gx = Gauss(x, 1, p[2], p[4])
+    gy = Gauss(y, 1, p[3], p[5])
+    Agx = p[1] * gx
+    jac = np.empty((np.size(gx) * np.size(gy), 6))
+    jac[:, 0] = 1
+    jac[:, 1] = np.outer(gx, gy).ravel()
+    jac[:, 2] = np.outer(Agx * dx**2 / p[2] ** 3, gy).ravel()
+    jac[:, 3] = np.outer(Agx, gy * dy**2 / p[3] ** 3).ravel()
+    jac[:, 4] = np.outer(Agx * dx / p[2] ** 2, gy).ravel()
+    jac[:, 5] = np.outer(Agx, gy * dy / p[3] ** 2).ravel()
+    return jac
+
+
 # %% CLASS DEFINITION
 class Gauss2DFit(Abstract2DBellShaped):
     """a 2D Gauss fit. Inherits methods from the Abstract2DBellShaped
     (for instance the do_guess() one)"""
 
+    name = "Gauss2D"
+    _version = "1.0"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         # -- attributes specific to 2D Gauss fit
-        self.name = "Gauss2D"
         self.formula_help = "f(x) = p[0] "
         self.formula_help += "+ p[1] * exp(-(x - p[4]) ** 2 / (2 * p[2]**2))"
         self.formula_help += " * exp(-(x - p[5]) ** 2 / (2 * p[3]**2))"
         self.parameters_help = (
             "p = [offset, amplitude, size_x, size_y, center_x, center_y]"
         )
-        self._version = "1.0"
 
     def _fitfunc(self, x, *p):
         return Gauss2D(x, *p)
 
+    def _jacobian(self, x, *p):
+        return Gauss2D_jac(x, *p)
+
+    def _fitfunc_grid(self, x, y, *p):
+        return Gauss2D_grid(x, y, *p)
+
+    def _jacobian_grid(self, x, y, *p):
+        return Gauss2D_grid_jac(x, y, *p)
+
     def do_guess(self):
         """guess fit parameters. use the guess_center_size_ampl_offset()
         method defined in the Abstract2DBellShaped class"""
@@ -29,20 +29,44 @@ def Gauss2D_cutted(xy, *p):
     """p = [offset, amplitude, size_x, size_y, center_x, center_y, tanh_position, slope_tanh]"""
     (x, y) = xy
     return p[0] + p[1] * Gauss(x, 1, p[2], p[4]) * Gauss(y, 1, p[3], p[5]) * 0.5 * (
-        1 + tanh((x - p[6]) / p[7])
+        1 + np.tanh((x - p[6]) / p[7])
     )
 
 
+def Gauss2D_cutted_jac(xy, *p):
+    """jacobian of Gauss2D_cutted() with respect to p"""
+    (x, y) = xy
+    dx = x - p[4]
+    dy = y - p[5]
+    G = Gauss(x, 1, p[2], p[4]) * Gauss(y, 1, p[3], p[5])
+    th = np.tanh((x - p[6]) / p[7])
+    GT = G * 0.5 * (1 + th)
+    AGT = p[1] * GT
+    dAGT_dth = p[1] * G * 0.5 * (1 - th**2)  # derivative of tanh part
+    jac = np.empty((np.size(G), 8))
+    jac[:, 0] = 1
+    jac[:, 1] = GT
+    jac[:, 2] = AGT * dx**2 / p[2] ** 3
+    jac[:, 3] = AGT * dy**2 / p[3] ** 3
+    jac[:, 4] = AGT * dx / p[2] ** 2
+    jac[:, 5] = AGT * dy / p[3] ** 2
+    jac[:, 6] = -dAGT_dth / p[7]
+    jac[:, 7] = -dAGT_dth * (x - p[6]) / p[7] ** 2
+    return jac
+
+
 # %% CLASS DEFINITION
 class Gauss2D_cuttedFit(Abstract2DBellShaped):
     """a 2D Gauss cutted fit. Inherits methods from the Abstract2DBellShaped
     (for instance the do_guess() one)"""
 
+    name = "Gauss2D"
+    _version = "1.0"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         # -- attributes specific to 2D Gauss fit
-        self.name = "Gauss2D"
         self.formula_help = "f(x) = p[0] "
         self.formula_help += "+ p[1] * exp(-(x - p[4]) ** 2 / (2 * p[2]**2))"
         self.formula_help += " * exp(-(x - p[5]) ** 2 / (2 * p[3]**2))"
@@ -50,10 +74,12 @@ class Gauss2D_cuttedFit(Abstract2DBellShaped):
         self.parameters_help = (
             "p = [offset, amplitude, size_x, size_y, center_x, center_y]"
         )
-        self._version = "1.0"
 
     def _fitfunc(self, x, *p):
-        return Gauss2D(x, *p)
+        return Gauss2D_cutted(x, *p)
+
+    def _jacobian(self, x, *p):
+        return Gauss2D_cutted_jac(x, *p)
 
     def do_guess(self):
         """guess fit parameters. use the guess_center_size_ampl_offset()
@@ -21,6 +21,18 @@ def Hyperbolictangent1D(x, *p):
     return p[0] + p[1] * np.tanh((x - p[2]) / p[3])
 
 
+def Hyperbolictangent1D_jac(x, *p):
+    """jacobian of Hyperbolictangent1D() with respect to p"""
+    th = np.tanh((x - p[2]) / p[3])
+    sech2 = 1 - th**2
+    jac = np.empty((np.size(th), 4))
+    jac[:, 0] = 1
+    jac[:, 1] = th
+    jac[:, 2] = -p[1] * sech2 / p[3]
+    jac[:, 3] = -p[1] * sech2 * (x - p[2]) / p[3] ** 2
+    return jac
+
+
 # %% CLASS DEFINITION
 class Hyperbolictangent1DFit(Abstract1DFit):
     """a 1D Gauss fit"""
@@ -39,6 +51,9 @@ class Hyperbolictangent1DFit(Abstract1DFit):
     def _fitfunc(self, x, *p):
         return Hyperbolictangent1D(x, *p)
 
+    def _jacobian(self, x, *p):
+        return Hyperbolictangent1D_jac(x, *p)
+
     def do_guess(self):
         """guess fit parameters"""
 
@@ -21,6 +21,18 @@ def Lorentz(x, *p):
     return p[0] + p[1] /(1+((x-p[3])*2/p[2])**2)
 
 
+def Lorentz_jac(x, *p):
+    """jacobian of Lorentz() with respect to p"""
+    u = (x - p[3]) * 2 / p[2]
+    L = 1 / (1 + u**2)
+    jac = np.empty((np.size(L), 4))
+    jac[:, 0] = 1
+    jac[:, 1] = L
+    jac[:, 2] = 2 * p[1] * u**2 * L**2 / p[2]
+    jac[:, 3] = 4 * p[1] * u * L**2 / p[2]
+    return jac
+
+
 # %% CLASS DEFINITION
 class Lorentz1DFit(Abstract1DFit):
     """a 1D Lorentz fit"""
@@ -40,6 +52,9 @@ class Lorentz1DFit(Abstract1DFit):
     def _fitfunc(self, x, *p):
         return Lorentz(x, *p)
 
+    def _jacobian(self, x, *p):
+        return Lorentz_jac(x, *p)
+
     def do_guess(self):
         """guess fit parameters"""
 
@@ -21,6 +21,17 @@ def Oscillation1D(x, *p):
     return p[0] + p[1] * np.sin(2 * np.pi * p[2] * x + p[3])
 
 
+def Oscillation1D_jac(x, *p):
+    """jacobian of Oscillation1D() with respect to p"""
+    phase = 2 * np.pi * p[2] * x + p[3]
+    jac = np.empty((np.size(phase), 4))
+    jac[:, 0] = 1
+    jac[:, 1] = np.sin(phase)
+    jac[:, 2] = p[1] * np.cos(phase) * 2 * np.pi * x
+    jac[:, 3] = p[1] * np.cos(phase)
+    return jac
+
+
 # %% CLASS DEFINITION
 class Oscillation1DFit(Abstract1DFit):
     """a 1D Gauss fit"""
@@ -40,6 +51,9 @@ class Oscillation1DFit(Abstract1DFit):
     def _fitfunc(self, x, *p):
         return Oscillation1D(x, *p)
 
+    def _jacobian(self, x, *p):
+        return Oscillation1D_jac(x, *p)
+
     def do_guess(self):
         """guess fit parameters"""
 
@@ -51,6 +51,9 @@ class Polynomial1D(Abstract1DFit):
     def _fitfunc(self, x, *p):
         return np.polyval(p[::-1], x)
 
+    def _jacobian(self, x, *p):
+        return np.vander(np.ravel(x), len(p), increasing=True)
+
     def do_guess(self):
         """guess fit parameters / not needed here"""
         pass
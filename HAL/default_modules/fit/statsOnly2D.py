@@ -18,14 +18,15 @@ from HAL.classes.fit.abstract import Abstract2DBellShaped
 class StatsOnly2D(Abstract2DBellShaped):
     """a void 2D fit, only returning spatial stats"""
 
+    name = "StatsOnly2D"
+    _version = "1.0"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         # -- attributes specific to 2D Gauss fit
-        self.name = "StatsOnly2D"
         self.formula_help = "no formula, only stats"
         self.parameters_help = ""
-        self._version = "1.0"
 
     def _fitfunc(self, x, *p):
         X, Y = x
@@ -28,26 +28,48 @@ def ThomasFermi2D(xy, *p):
     )
 
 
+def ThomasFermi2D_jac(xy, *p):
+    """jacobian of ThomasFermi2D() with respect to p"""
+    (x, y) = xy
+    dx = x - p[4]
+    dy = y - p[5]
+    # TF profile, set to zero outside of the cloud
+    TF_profile = np.clip(TFParab(x, y, p[2], p[3], p[4], p[5]), 0, None)
+    sqrt_TF = np.sqrt(TF_profile)
+    jac = np.empty((np.size(TF_profile), 6))
+    jac[:, 0] = 1
+    jac[:, 1] = TF_profile * sqrt_TF
+    jac[:, 2] = 3 * p[1] * sqrt_TF * dx**2 / p[2] ** 3
+    jac[:, 3] = 3 * p[1] * sqrt_TF * dy**2 / p[3] ** 3
+    jac[:, 4] = 3 * p[1] * sqrt_TF * dx / p[2] ** 2
+    jac[:, 5] = 3 * p[1] * sqrt_TF * dy / p[3] ** 2
+    return jac
+
+
 # %% CLASS DEFINITION
 class ThomasFermi2DFit(Abstract2DBellShaped):
     """a 2D Thomas Fermi fit. Inherits methods from the Abstract2DBellShaped
     (for instance the do_guess() one)"""
 
+    name = "ThomasFermi2D"
+    _version = "1.0"
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         # -- attributes specific to 2D Gauss fit
-        self.name = "ThomasFermi2D"
         self.formula_help = "f(x) = p[0] + p[1] * (1 - (x - p[4])**2 / p[2]**2"
         self.formula_help += " - (x - p[5])**2 / p[3]**2)**(3/2)"
         self.parameters_help = (
             "p = [offset, amplitude, size_x, size_y, center_x, center_y]"
         )
-        self._version = "1.0"
 
     def _fitfunc(self, x, *p):
         return ThomasFermi2D(x, *p)
 
+    def _jacobian(self, x, *p):
+        return ThomasFermi2D_jac(x, *p)
+
     def do_guess(self):
         """guess fit parameters. use the guess_center_size_ampl_offset()
         method defined in the Abstract2DBellShaped class"""
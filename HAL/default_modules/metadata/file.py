@@ -20,11 +20,12 @@ from HAL.classes.metadata.abstract import AbstractMetaData
 class FileData(AbstractMetaData):
     """docstring for Dummy"""
 
+    name = "file"
+
     def __init__(self, path=Path(".")):
         super().__init__()
 
         # - general
-        self.name = "file"
         self.path = path
 
     def analyze(self):
@@ -9,49 +9,59 @@ Comments : Imports fit information, as saved by HAL
 
 # -- global
 
-import json
+import hashlib
 from pathlib import Path
-from ...classes.settings import Settings
 
 # -- local
 from HAL.classes.metadata.abstract import AbstractMetaData
-
-# %% DECLARATIONS
-# FIXME : can we link this to the actual user settings ?
-FIT_FOLDER_NAME = ".HAL_fits"
+from HAL.classes.fit.store import (
+    gen_saved_fit_path,
+    get_saved_fit_version,
+    load_saved_fit_dic,
+)
 
 
 # %% CLASS DEFINITION
 class HALFitData(AbstractMetaData):
     """docstring for Dummy"""
 
+    name = "fit"
+
     def __init__(self, path=Path(".")):
         super().__init__()
 
         # - general
-        self.name = "fit"
         self.path = path
-        self._settings_folder = Path().home() / ".HAL"
-        global_config_path = self._settings_folder / "global.conf"
-        self.settings = Settings(path=global_config_path)
+
+    @property
+    def fit_folder_name(self):
+        return self.settings.config["fit"]["fit folder name"]
+
+    def dependencies(self):
+        # the saved fit file (json)
+        return [gen_saved_fit_path(self.path, self.fit_folder_name)]
+
+    def signature(self):
+        # the saved fit for this file in the fit store (and not the whole
+        # store), and the "do not display" list (and not the whole settings)
+        settings = self.settings
+        fit_folder_name = settings.config["fit"]["fit folder name"]
+        do_not_display = settings.config["metadata"]["do not display"]
+        do_not_display_hash = hashlib.sha1(do_not_display.encode()).hexdigest()
+        fit_version = get_saved_fit_version(self.path, fit_folder_name)
+        return "fit:%s|settings:%s" % (fit_version, do_not_display_hash)
 
     def analyze(self):
         # - init / reset data
         self.data = []
         data = []
 
-        # - find HAL-generated fit file
-        # (this is a json file)
-        # generate file path
-        fit_folder = self.path.parent / FIT_FOLDER_NAME
-        fit_file = fit_folder / (self.path.stem + ".json")
-        # check that file exists
-        if not fit_file.is_file():
+        # - load HAL-generated fit
+        # (from the json file, or the folder fit store)
+        json_data = load_saved_fit_dic(self.path, self.fit_folder_name)
+        if json_data is None:
             return
 
-        # - load json
-        json_data = json.loads(fit_file.read_text())
-
         # - general info
         fit_info = json_data["__fit_info__"]
         data_info = json_data["__data_info__"]
@@ -95,10 +105,8 @@ class HALFitData(AbstractMetaData):
 
         # - get values
         fit_collection = json_data["collection"]
+        do_not_display = self.settings.config["metadata"]["do not display"].split(", ")
         for roi, fitres in fit_collection.items():
-            do_not_display = self.settings.config["metadata"]["do not display"].split(
-                ", "
-            )
             for value in fitres["result"]["values"]:
                 param = {k: v for k, v in value.items()}
                 if param["name"] in do_not_display:
@@ -219,7 +219,7 @@ class Ui_mainWindow(object):
         self.seqList.setSizePolicy(sizePolicy)
         self.seqList.setObjectName("seqList")
         self.gridLayout.addWidget(self.seqList, 1, 0, 1, 1)
-        self.runList = QtWidgets.QListWidget(self.runBrowserBox)
+        self.runList = RunListView(self.runBrowserBox)
         sizePolicy = QtWidgets.QSizePolicy(
             QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Expanding
         )
@@ -766,3 +766,4 @@ class Ui_mainWindow(object):
 
 
 from pyqtgraph import GraphicsLayoutWidget
+from HAL.gui.runlist import RunListView
@@ -9,6 +9,8 @@ Comments : Implement the "Advanced data analysis"
 # %% IMPORTS
 
 # -- global
+import ast
+import builtins
 import logging
 import re
 import pyqtgraph as pg
@@ -43,6 +45,7 @@ PLOT_FORMULA_REGEXP_FORMAT = "[\w\+\-.\*/\(\)]*"  # to allow math formulaes
 VARIABLE_REGEXP_FORMAT = "[\w_\-:.\s]*"
 VARIABLE_SPLIT_FORMAT = "^([\w_\-:\s]*)\.([\w_\-:\s]*)$"
 CONF_SAVE_SUFOLDER = "advanced_plot_saved_configurations"
+FORMULA_GLOBALS = {"np": np}  # names available in the plot formulaes
 
 TITLE_STR = "[%s]\n"
 VAR_STR = "  > %s\n"
@@ -263,23 +266,33 @@ def refreshMetaDataList(self):
     table.blockSignals(False)
 
 
-def mapVariables(self, metadata_dic):
+def _getTableTexts(table, n_col):
+    """returns the texts of the n_col first columns of a table, as a tuple of
+    tuples (used to detect changes in the tables)"""
+    texts = []
+    for row in range(table.rowCount()):
+        items = [table.item(row, col) for col in range(n_col)]
+        texts.append(tuple("" if item is None else item.text() for item in items))
+    return tuple(texts)
+
+
+def parseVariableDeclarations(self):
+    """
+    Parses the content of the variableDeclarationTable. Returns a list of
+    (name, metadata name, parameter name) tuples. The result is cached, and
+    the table is only parsed again when its content changes.
+    """
     global VARIABLE_SPLIT_FORMAT
-    """map the variables names to their values, using the declarations from
-      the variableDeclarationTable"""
-    # -- get table object and row number
-    table = self.variableDeclarationTable
-    n_row = table.rowCount()
 
-    # -- loop on all rows
-    mapped_variables = {}
+    # -- check cache
+    table_texts = _getTableTexts(self.variableDeclarationTable, 2)
+    cached = self.live_plot_cache.get("declarations", None)
+    if cached is not None and cached[0] == table_texts:
+        return cached[1]
 
-    if table.item(0, 0).text() == "":
-        logger.warning("Configure stats in the advanced analysis tab")
-    for row in range(n_row):
-        # get variable names
-        name = table.item(row, 0).text()
-        varname = table.item(row, 1).text()
+    # -- parse
+    declarations = []
+    for name, varname in table_texts:
         if not varname or not name:
             continue
         # parse the requested variable name
@@ -288,6 +301,21 @@ def mapVariables(self, metadata_dic):
             logger.warning("varname '%s' could not be parsed !" % varname)
             continue
         meta_name, meta_parname = res.groups()
+        declarations.append((name, meta_name, meta_parname))
+
+    self.live_plot_cache["declarations"] = (table_texts, declarations)
+    return declarations
+
+
+def mapVariables(self, metadata_dic):
+    """map the variables names to their values, using the declarations from
+    the variableDeclarationTable"""
+    # -- loop on all declared variables
+    mapped_variables = {}
+
+    if self.variableDeclarationTable.item(0, 0).text() == "":
+        logger.warning("Configure stats in the advanced analysis tab")
+    for name, meta_name, meta_parname in parseVariableDeclarations(self):
         # check that medata is present
         if meta_name not in metadata_dic:
             logger.debug("metadata class name '%s' not found" % meta_name)
@@ -348,6 +376,66 @@ def parseSubplotContent(self):
     return requested_content
 
 
+def _compileFormula(formula, variable_names):
+    """compiles a plot formula, after checking that it only uses declared
+    variables, python builtins (abs, max...) and numpy (as 'np'). Returns None
+    if the formula is not valid"""
+    try:
+        tree = ast.parse(formula, mode="eval")
+    except SyntaxError:
+        logger.warning("formula '%s' could not be parsed !" % formula)
+        return None
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    unknown = names - set(variable_names) - set(FORMULA_GLOBALS) - set(dir(builtins))
+    if unknown:
+        msg = "formula '%s' uses undeclared variables : %s"
+        logger.warning(msg % (formula, ", ".join(sorted(unknown))))
+        return None
+    return compile(tree, "<formula '%s'>" % formula, "eval")
+
+
+def getCompiledSubplotContent(self):
+    """
+    Returns the content of the subplotContentTable (see parseSubplotContent())
+    with the formulaes compiled, as a {row: [(formula_x, formula_y, code_x,
+    code_y)]} dictionnary. The formulaes using undeclared variables are
+    skipped. The result is cached, and the formulaes are only parsed and
+    compiled again when the subplotContentTable or the variableDeclarationTable
+    content changes.
+    """
+    # -- check cache
+    variable_names = tuple(d[0] for d in parseVariableDeclarations(self))
+    table_texts = _getTableTexts(self.subplotContentTable, 1)
+    cache_key = (table_texts, variable_names)
+    cached = self.live_plot_cache.get("content", None)
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+
+    # -- parse and compile
+    compiled_content = {}
+    for row, content in parseSubplotContent(self).items():
+        compiled_content[row] = []
+        for formula_x, formula_y in content:
+            code_x = _compileFormula(formula_x, variable_names)
+            code_y = _compileFormula(formula_y, variable_names)
+            if code_x is None or code_y is None:
+                continue
+            compiled_content[row].append((formula_x, formula_y, code_x, code_y))
+
+    self.live_plot_cache["content"] = (cache_key, compiled_content)
+    return compiled_content
+
+
+def _evalFormula(formula, code, mapped_variables, results):
+    """evaluates a compiled formula on the (array) variables. The results are
+    stored in the 'results' dictionnary, so that a formula used in several
+    subplots is only evaluated once"""
+    if formula not in results:
+        value = eval(code, FORMULA_GLOBALS, mapped_variables)
+        results[formula] = np.asarray(value)
+    return results[formula]
+
+
 # %% PLOT DATA
 
 
@@ -367,8 +455,14 @@ def refreshMetadataLivePlot(self):
             subplot.removeItem(plot_item)
         subplot.plotted_data = []
 
-    # -- get requested content
-    requested_content = parseSubplotContent(self)
+    # -- get requested content (compiled formulaes)
+    requested_content = getCompiledSubplotContent(self)
+
+    # -- map the variables of each set (only once for all subplots)
+    mapped_sets = {}
+    for setname, metadata_dic in metadata.items():
+        mapped_sets[setname] = mapVariables(self, metadata_dic)
+    formula_results = {setname: {} for setname in metadata}
 
     # -- plot
     for subplot_number, content in requested_content.items():
@@ -378,26 +472,23 @@ def refreshMetadataLivePlot(self):
             "x": {"name": "x", "unit": ""},
             "y": {"name": "y", "unit": ""},
         }
-        for setname, metadata_dic in metadata.items():
-            mapped_variables = mapVariables(self, metadata_dic)
+        for setname, mapped_variables in mapped_sets.items():
             n_content = len(content)
             for i_content, c in enumerate(content):
                 # get formulaes
-                formula_x, formula_y = c
+                formula_x, formula_y, code_x, code_y = c
                 # update name, just in case
                 for ax, formula in zip(["x", "y"], [formula_x, formula_y]):
                     if info[ax]["name"] == ax:
                         info[ax]["name"] = formula
                 # get values
+                results = formula_results[setname]
                 try:
-                    x = eval(formula_x, {"np": np}, mapped_variables)
-                    y = eval(formula_y, {"np": np}, mapped_variables)
+                    x = _evalFormula(formula_x, code_x, mapped_variables, results)
+                    y = _evalFormula(formula_y, code_y, mapped_variables, results)
                 except Exception as e:
                     logger.debug(e)
                     continue
-                # convert to array
-                x = np.asarray(x)
-                y = np.asarray(y)
                 # remove NaNs
                 i_good = np.isfinite(x) * np.isfinite(y)
                 x = x[i_good]
@@ -64,7 +64,10 @@ BUILTIN_COMMAND_LIST = [
     ("HAL", "get online help", "_getOnlineHelp"),
     # -- data related
     ("data", "fit", "_fitButtonClicked"),
+    ("data", "fit:cancel", "_cancelBatchFit"),
+    ("data", "fit:force refit", "_forceFitSelectedData"),
     ("data", "fit:delete", "_deleteFitButtonClicked"),
+    ("data", "fit:move to fit store", "_migrateSavedFits"),
     ("data", "open current folder", "_openDataFolder"),
     # -- display related
     ("display", "add ROI", "_addRoiButtonClicked"),
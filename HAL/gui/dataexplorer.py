@@ -12,7 +12,6 @@ Comments : Functions related to (meta)data exploration
 import json
 import logging
 import re
-from numpy import NaN
 from random import choice
 from collections import OrderedDict
 from pathlib import Path
@@ -74,7 +73,7 @@ def setupUi(self):
     # add all metadata classes names
     for metadata in self.metadata_classes:
         item = QListWidgetItem()
-        item.setText(metadata().name)
+        item.setText(metadata.name)
         self.metaDataList.addItem(item)
     # select all
     self.metaDataList.blockSignals(True)
@@ -96,40 +95,50 @@ def setupUi(self):
 # %% META DATA MANAGEMENT
 
 
-def _loadFileMetaData(self, path):
+def getFilesMetaData(
+    self, path_list, reset_index=False, max_workers=None, callback=None
+):
     """
-    Subfunction, loads the metadata linked to one file
+    Returns the metadata of a list of files, as a {path: OrderedDict} dictionnary,
+    for the selected metadata classes. The metadata is taken from the metadata
+    cache, and only the files that are not cached, or that changed, are analyzed
+    (see HAL.classes.metadata.cache and HAL.classes.metadata.index)
     """
-    # -- get metadata
-    # get selected metadata sources
+    conf = self.settings.config["metadata"]
     selected_metadata = [item.text() for item in self.metaDataList.selectedItems()]
+    metadata_classes = [m for m in self.metadata_classes if m.name in selected_metadata]
+    if max_workers is None:
+        max_workers = int(conf["analysis workers"])
+    return self.metadata_cache.get(
+        path_list,
+        metadata_classes,
+        reset=reset_index,
+        use_index=eval(conf["persistent index"]),
+        index_folder=conf["index folder"],
+        max_workers=max_workers,
+        callback=callback,
+    )
 
-    # values are then sorted in an ordered dict
-    metadata_dic = OrderedDict()
-    for meta_class in self.metadata_classes:
-        # init metadata object
-        meta = meta_class()
-        # only keep the selected ones
-        if meta.name not in selected_metadata:
-            continue
-        # load metadata
-        meta.path = path
-        meta.analyze()
-        # store in dic
-        metadata_dic[meta.name] = meta
 
-    return metadata_dic
+def _loadFileMetaData(self, path):
+    """
+    Subfunction, loads the metadata linked to one file
+    """
+    metadata = getFilesMetaData(self, [path], max_workers=1)
+    return metadata.get(path, OrderedDict())
 
 
-def updateMetadataCache(self, reset_cache=False):
+def updateMetadataCache(self, reset_cache=False, reset_index=False):
     """
-    Updates the metadata cache
+    Updates the metadata cache. The metadata is read from the persistent
+    metadata index (see HAL.classes.metadata.index) when up to date. If
+    reset_index is True, all the files are analyzed again.
     """
     # logger.debug("update metadata cache")
 
     # -- reset ?
     if reset_cache:
-        self.metadata_cache = {}
+        self.metadata_cache.clear()
 
     # -- get list of selected runs and datasets
     # total selection
@@ -147,22 +156,9 @@ def updateMetadataCache(self, reset_cache=False):
     for dataset in selected_datasets:
         if dataset is None:
             continue
-        if dataset.is_file():
-            # load json
-            set_json = json.loads(dataset.read_text())
-            # get list of paths
-            json_paths = set_json.get("paths", [])
-            # get "data root" tag, and replace it by the local data root
-            if "root tag" in set_json:
-                conf = self.settings.config
-                root = Path(conf["data"]["root"])
-                root = str(root.expanduser())
-                tag = set_json["root tag"]
-                pattern = "^%s" % tag
-                json_paths = [re.sub(pattern, root, p) for p in json_paths]
-            # convert to path objects
-            for path in json_paths:
-                all_selected_files.add(Path(path))
+        json_paths = _getDataSetPaths(self, dataset)
+        if json_paths is not None:
+            all_selected_files.update(json_paths)
 
     # -- remove from cache
     for cached_file in list(self.metadata_cache.keys()):
@@ -170,30 +166,44 @@ def updateMetadataCache(self, reset_cache=False):
             self.metadata_cache.pop(cached_file)
 
     # -- update cache
-    for i_file, file_to_cache in enumerate(all_selected_files):
-        if file_to_cache in self.metadata_cache:
-            # ignore
-            continue
-        if not file_to_cache.is_file():
-            logger.debug("'%s' does not exist." % file_to_cache)
-            continue
-        file_metadata = _loadFileMetaData(self, file_to_cache)
-        self.metadata_cache[file_to_cache] = file_metadata
+    # only the new or modified files are analyzed (using the persistent
+    # metadata index), the others are already in the cache
+    files_to_cache = [
+        file for file in all_selected_files if file is not None and file.is_file()
+    ]
+    progress = {"started": False}
+
+    def _progress(n_done, n_total):
+        # progress bar (only shown if some files are analyzed)
+        if not progress["started"]:
+            progress["started"] = True
+            self.progressBar.setFormat("analyzing file %v / %m")
+            self.progressBar.setTextVisible(True)
+        self.progressBar.setRange(0, n_total)
+        self.progressBar.setValue(n_done)
+
+    getFilesMetaData(self, files_to_cache, reset_index=reset_index, callback=_progress)
+
+    if progress["started"]:
+        # done
+        self.progressBar.setFormat("DONE")
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setValue(100)
 
     # logger.debug("Files in cache : %i" % len(self.metadata_cache))
 
     # -- update available metadata lists
     # init new list
-    meta_names = [m().name for m in self.metadata_classes]
+    meta_names = [m.name for m in self.metadata_classes]
     available_metadata = OrderedDict([(m, set()) for m in meta_names])
     available_numeric_metadata = OrderedDict([(m, set()) for m in meta_names])
-    # loop
-    for cached_file, metadata in self.metadata_cache.items():
-        for name, meta in metadata.items():
-            keys = {p["name"] for p in meta.data}
-            num_keys = {k for k in meta.get_numeric_keys()}
-            available_metadata[name] |= keys  # set union !!
-            available_numeric_metadata[name] |= num_keys  # set union !!
+    # loop on the columns of the metadata table
+    table = self.metadata_cache.table
+    for column in table.columns():
+        name, param_name = column
+        available_metadata[name].add(param_name)
+        if table.isNumeric(column):
+            available_numeric_metadata[name].add(param_name)
 
     # store
     self.available_metadata = available_metadata
@@ -206,41 +216,20 @@ def updateMetadataCache(self, reset_cache=False):
     correlations.refreshMetaDataList(self)
 
 
-def _generateMetadaListFromCache(self, path_list):
+def updateFileMetadata(self, path):
     """
-    Subfunction, generates a list of metadata from cache
+    Updates the cached metadata of one file (e.g. after it was fitted), if
+    it belongs to the selected datasets. The metadata lists are not updated.
     """
-    # -- initialize output dictionnary, populated with 'NaNs'
-    meta_dic = {}
-    for meta_name, meta_param_list in self.available_metadata.items():
-        meta_dic[meta_name] = {}
-        for param_name in meta_param_list:
-            meta_dic[meta_name][param_name] = [NaN for p in path_list]
-
-    # -- populate from cache
-    for i_file, file_path in enumerate(path_list):
-        # if file not cached : skip
-        # NB : this should not happen, due to the way the programm is
-        #      structured...
-        if file_path not in self.metadata_cache:
-            logger.warning("file %s not cached" % file_path)
-            continue
-        # get cached metadata
-        cached_metadata = self.metadata_cache[file_path]
-        for meta_name, meta in cached_metadata.items():
-            for param in meta.data:
-                # store value
-                meta_dic[meta_name][param["name"]][i_file] = param["value"]
-                # store param to get info
-                meta_dic[meta_name]["_%s_info" % param["name"]] = param
-
-    return meta_dic
+    if path not in self.metadata_cache:
+        return
+    getFilesMetaData(self, [path], max_workers=1)
 
 
 def getSelectionMetaDataFromCache(self, update_cache=False):
     """
-    returns a dictionnary of metadata lists for all the selected runs and
-    datasets
+    returns a dictionnary of metadata arrays for all the selected runs and
+    datasets (see HAL.classes.metadata.table.MetadataTable.select())
     """
     # -- update cache if requested
     if update_cache:
@@ -256,22 +245,8 @@ def getSelectionMetaDataFromCache(self, update_cache=False):
     for dataset in selected_datasets:
         if dataset is None:
             continue
-        if dataset.is_file():
-            # load json
-            set_json = json.loads(dataset.read_text())
-            # get list of paths
-            json_paths = set_json.get("paths", [])
-            # get "data root" tag, and replace it by the local data root
-            if "root tag" in set_json:
-                conf = self.settings.config
-                root = Path(conf["data"]["root"])
-                root = str(root.expanduser())
-                tag = set_json["root tag"]
-                pattern = "^%s" % tag
-                json_paths = [re.sub(pattern, root, p) for p in json_paths]
-            # convert to path objects
-            json_paths = [Path(p) for p in json_paths]
-            # store
+        json_paths = _getDataSetPaths(self, dataset)
+        if json_paths is not None:
             dataset_list[dataset.stem] = json_paths
 
     # add the current selection
@@ -279,10 +254,12 @@ def getSelectionMetaDataFromCache(self, update_cache=False):
     if len(selected_runs) >= 1:
         dataset_list["current selection"] = selected_runs
 
-    # -- generate metadata lists from cache
+    # -- get metadata arrays from the cache (columnar) table
     metadata = {}
     for set_name, path_list in dataset_list.items():
-        metadata[set_name] = _generateMetadaListFromCache(self, path_list)
+        metadata[set_name] = self.metadata_cache.table.select(path_list)
+        for meta_name in self.available_metadata:
+            metadata[set_name].setdefault(meta_name, {})
 
     return metadata
 
@@ -337,6 +314,17 @@ def displayMetaData(self):
 # %% SET MANAGEMENT
 
 
+def _getDataSetPaths(self, dataset):
+    """
+    Subfunction, returns the list of paths of a dataset (json file), with the
+    data root tag replaced by the local data root. The datasets are cached in
+    the dataset registry (see HAL.classes.data.datasets), and only read again
+    when modified. Returns None if the dataset does not exist.
+    """
+    root = Path(self.settings.config["data"]["root"]).expanduser()
+    return self.dataset_registry.getPaths(dataset, root)
+
+
 def _writeDataSet(self, setname, selected_paths, overwrite_ok=False, dataset_dir=None):
     """
     Low-level function to write data sets. Called by createNewDataSet()
@@ -493,16 +481,8 @@ def addToDataSet(self):
     selected_paths = [str(s.data(Qt.UserRole)) for s in selected_runs]
 
     # - current path list
-    # prepare "root" substitution
-    conf = self.settings.config
-    root = Path(conf["data"]["root"])
-    root = str(root.expanduser())
-    with open(str(path)) as json_file:
-        data = json.load(json_file)
-        tag = data["root tag"]
-        pattern = "^%s" % tag
-        json_paths = [re.sub(pattern, root, p) for p in data["paths"]]
-        total_paths = json_paths + selected_paths
+    json_paths = [str(p) for p in _getDataSetPaths(self, path)]
+    total_paths = json_paths + selected_paths
 
     # -- save set
     _writeDataSet(
@@ -19,6 +19,8 @@ from PyQt5.QtGui import QKeySequence
 # -- local
 from . import fitting, advancedplot
 from ..classes.display import LiveMetaData
+from .runlist import RUN
+from ..classes.data.cache import DataCache
 
 # -- logger
 logger = logging.getLogger(__name__)
@@ -36,9 +38,13 @@ def setupUi(self):
 
     # -- setup data classes list selector
     for data_class in self.data_classes:
-        name = data_class().name
+        name = data_class.name
         self.dataTypeComboBox.addItem(name, data_class)
 
+    # -- setup data cache
+    cache_size = float(self.settings.config["data"]["cache size"])
+    self.data_cache = DataCache(max_size=int(cache_size * 1024**2))
+
     # -- setup min / max scale
     data_class = self.dataTypeComboBox.currentData()
     sc_min, sc_max = data_class().default_display_scale
@@ -174,19 +180,19 @@ def plotSelectedData(self, update_fit=True):
     if not selection:
         return
 
-    # -- init object data
+    # -- get object data
     # get object data type
     data_class = self.dataTypeComboBox.currentData()
-    data = data_class()
     # get path
     item = selection[0]
-    data.path = item.data(QtCore.Qt.UserRole)
-    # check
-    if not data.filter():
-        print("ERROR")
+    path = item.data(QtCore.Qt.UserRole)
+    # load (from cache, if available)
+    data = self.data_cache.get(data_class, path)
+    if data is None:
+        logger.debug(f"could not load '{path}'")
         return
-    # load
-    data.load()
+    # load next / previous runs in the background
+    prefetchNeighbourRuns(self, item, data_class)
 
     # -- get the selected roi
     selected_roi = self.selectRoiComboBox.currentText()
@@ -226,6 +232,29 @@ def plotSelectedData(self, update_fit=True):
             updateFitForSelectedData(self)
 
 
+def prefetchNeighbourRuns(self, item, data_class):
+    """
+    Loads the runs around the given runList item in the background, so that
+    they are already in the data cache when selected
+    """
+    n_prefetch = int(self.settings.config["data"]["prefetch runs"])
+    if n_prefetch <= 0:
+        return
+    # get next / previous runs, closest first
+    model = self.runList.model()
+    row = self.runList.row(item)
+    path_list = []
+    for shift in range(1, n_prefetch + 1):
+        for i_row in [row + shift, row - shift]:
+            if not 0 <= i_row < model.rowCount():
+                continue
+            entry = model.entry(i_row)
+            if entry.kind == RUN:
+                path_list.append(entry.path)
+    # prefetch
+    self.data_cache.prefetch(data_class, path_list)
+
+
 def updateFitForSelectedData(self):
     """
     Load a saved fit for the selected data (if exist), and update
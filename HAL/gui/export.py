@@ -10,14 +10,11 @@ Comments : (low-level) functions handling export of data / figures for HAL
 
 # -- global
 import logging
-import h5py
-import numpy as np
 from pathlib import Path
-from datetime import datetime
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 
 # -- local
-
+from ..classes.metadata import export as metadata_export
 
 # -- logger
 logger = logging.getLogger(__name__)
@@ -28,67 +25,16 @@ logger = logging.getLogger(__name__)
 # == LOW LEVEL
 
 
+def _getProgramInfo(self):
+    return {"name": self._name, "version": self._version, "url": self._url}
+
+
 def _exportDataDictAsCSV(self, dic, file_out):
-    # -- gather all data from dic
-    # get variable names
-    variables = set()
-    for dataset, meta_dic in dic.items():
-        variables.update(meta_dic.keys())
-    # gather all values
-    dic_out = {"dataset": []}
-    dic_out.update({name: [] for name in variables})
-    for dataset, meta_dic in dic.items():
-        if not meta_dic:
-            continue
-        n_runs = len(next(iter(meta_dic.values()))["val"])
-        dataset_name = dataset.replace(" ", "_")
-        dic_out["dataset"] += [dataset_name for i in range(n_runs)]
-        for name, value in meta_dic.items():
-            dic_out[name] += list(value["val"])
-    # -- prepare output array
-    set_name_length = np.max([len(name) for name in dic.keys()])
-    dtype = [("dataset", f"U{set_name_length}")] + [(name, float) for name in variables]
-    fmt = ["%s"] + ["%.8e" for name in variables]
-    array_out = np.zeros(len(dic_out["dataset"]), dtype=dtype)
-    for key, value in dic_out.items():
-        array_out[key] = value
-    # -- prepare header
-    sep = "-" * 48 + "\n"
-    header = f"Generated by {self._name} v{self._version}"
-    header += f" on {datetime.now():%Y-%m-%d %H:%M:%S} \n"
-    header += sep
-    header += "data info : \n"
-    header += "----------- \n"
-    for name, value in meta_dic.items():
-        info = value["info"]
-        info_str = ""
-        for field in ["name", "unit", "comment"]:
-            if field in info and info[field]:
-                info_str += f"     - {field} : {info[field]} \n"
-        if info_str:
-            header += f"  + {name} \n" + info_str
-    header += sep
-    header += "data order : " + ", ".join([d[0] for d in dtype]) + "\n"
-    header += sep[:-1]
-    # -- save
-    np.savetxt(file_out, array_out, header=header, comments="# ", fmt=" ".join(fmt))
+    metadata_export.export_as_csv(dic, file_out, _getProgramInfo(self))
 
 
 def _exportDataDictAsHDF5(self, dic, file_out):
-    with h5py.File(str(file_out), "w") as f:
-        # set global attributes
-        f.attrs["software name"] = self._name
-        f.attrs["software version"] = self._version
-        f.attrs["software url"] = self._url
-        f.attrs["created on"] = f"{datetime.now():%Y-%m-%d %H:%M:%S}"
-        # store data for each dataset
-        for dataset, meta_dic in dic.items():
-            group = f.create_group(dataset)
-            for name, value in meta_dic.items():
-                dset = group.create_dataset(name, data=value["val"])
-                for k, v in value["info"].items():
-                    if k in ["unit", "comment", "name"]:
-                        dset.attrs[k] = v
+    metadata_export.export_as_hdf5(dic, file_out, _getProgramInfo(self))
 
 
 # == HIGH LEVEL
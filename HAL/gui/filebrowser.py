@@ -12,14 +12,13 @@ Comments : Functions related to file browsing, i.e. select the right year,
 # -- global
 import logging
 import locale
+import os
 from datetime import datetime, date
 from pathlib import Path
 from PyQt5 import QtWidgets, QtGui, QtCore
-from PyQt5.QtCore import Qt, QSize, QDate
-from PyQt5.QtGui import QColor
+from PyQt5.QtCore import Qt, QSize, QDate, QFileSystemWatcher, QTimer
 from PyQt5.QtWidgets import (
     QListWidgetItem,
-    QStyle,
     QAbstractItemView,
     QSpacerItem,
     QSizePolicy,
@@ -27,6 +26,8 @@ from PyQt5.QtWidgets import (
 
 # -- local
 from . import fitting
+from .runlist import RunListEntry, FOLDER, RUN, MESSAGE
+from ..classes.data import scan
 
 # -- logger
 logger = logging.getLogger(__name__)
@@ -37,6 +38,7 @@ YEAR_DISPLAY_FMT = "%Y"
 MONTH_DISPLAY_FMT = "%m"
 DAY_DISPLAY_FMT = "%d"
 DEFAULT_LOCALE = "en_GB.UTF-8"
+WATCHER_DELAY = 500  # ms, delay before updating after a folder change
 
 # %% TOOLS
 
@@ -128,66 +130,21 @@ def refreshListContent(list, folder, date_format, display_format):
 
 
 def exploreDayFolder(folder, data_class=None):
-    # -- check that a directory is provided
-    if not folder.is_dir():
-        return []
+    """
+    lists the data files in a day folder and its subfolders (sequences),
+    see HAL.classes.data.scan.scan_day_folder()
+    """
+    return scan.scan_day_folder(folder, data_class)
 
-    # -- explore
-    # get list of files and subdirs
-    file_list = []
-    subdir_list = []
-    for content in folder.iterdir():
-        if content.is_dir():
-            # ignore hidden folders
-            if content.name.startswith("."):
-                continue
-            # otherwise, append
-            subdir_list.append(content)
-        elif content.is_file():
-            # if no data class is provided : take all !
-            if data_class is None:
-                good_file = True
-            # otherwise, use the filter() method
-            else:
-                data = data_class(path=content)
-                good_file = data.filter()
-            # append
-            if good_file:
-                file_list.append(content)
-    # sort
-    file_list.sort(reverse=True)
-    subdir_list.sort(reverse=True)
-    # get subdirs content
-    dir_content = []
-    # include current dir
-    dir_content.append({"name": ".", "path": folder, "file_list": file_list})
-    # loop on subdirs
-    for subdir in subdir_list:
-        content = {"name": subdir.name, "path": subdir}
-        file_list = []
-        for file in subdir.iterdir():
-            if file.is_file():
-                # if no data class is provided : take all !
-                if data_class is None:
-                    good_file = True
-                # otherwise, use the filter() method
-                else:
-                    data = data_class(path=file)
-                    good_file = data.filter()
-                # append
-                if good_file:
-                    file_list.append(file)
-        # sort
-        # old version : by name
-        # file_list.sort(reverse=True)
-        # new version : by timestamp
-        tmstp = [file.stat().st_mtime for file in file_list]
-        file_list = [file for _, file in sorted(zip(tmstp, file_list))]
-        file_list = file_list[::-1]  # most recent first !
-        content["file_list"] = file_list
-        dir_content.append(content)
-
-    return dir_content
+
+def getFolderMtime(folder):
+    """returns the modification time of a folder (in ns), or None if it does
+    not exist. The modification time of a folder changes when files are
+    added or removed"""
+    try:
+        return os.stat(folder).st_mtime_ns
+    except OSError:
+        return None
 
 
 # %% SETUP FUNCTIONS
@@ -230,6 +187,26 @@ def setupUi(self):
     self.runList.setContextMenuPolicy(Qt.CustomContextMenu)
     self.setList.setContextMenuPolicy(Qt.CustomContextMenu)
 
+    # -- folder watcher
+    # watches the current folder, so that the run list is updated when new
+    # files are written. On network drives, file system notifications might
+    # not be available : the folder can then be polled periodically
+    self.current_folder_state = {}
+    self.folder_watch_changed = set()
+    self.folderWatcher = QFileSystemWatcher(self)
+    self.folderWatcherTimer = QTimer(self)
+    watch_folder = eval(conf["data"]["watch folder"])
+    polling_period = float(conf["data"]["watch polling period"])
+    # use file system notifications ?
+    self.folder_watch_notifications = watch_folder and polling_period <= 0
+    if self.folder_watch_notifications:
+        self.folderWatcherTimer.setSingleShot(True)
+        self.folderWatcherTimer.setInterval(WATCHER_DELAY)
+    # or polling ?
+    elif watch_folder:
+        self.folderWatcherTimer.setInterval(int(polling_period * 1000))
+        self.folderWatcherTimer.start()
+
     # -- calendar
     self.dateEdit.setCalendarPopup(True)
     self.dateEdit.setDateTime(QtCore.QDateTime.currentDateTime())
@@ -311,23 +288,18 @@ def runListSelectionChanged(self):
     by another function !
     """
     self.runList.blockSignals(True)
+    model = self.runList.model()
     # get selected
     selection = self.runList.selectedItems()
     # find dirs
-    subdir_list = []
     for item in selection:
-        data = item.data(Qt.UserRole)
-        if data.is_dir():
-            subdir_list.append(data)
+        if model.entry(item.row()).kind != RUN:
             # unselect
             item.setSelected(False)
-
-    # select dir content
-    for i in range(self.runList.count()):
-        item = self.runList.item(i)
-        data = item.data(Qt.UserRole)
-        if data.parent in subdir_list:
-            item.setSelected(True)
+            # select dir content
+            folder_rows = model.rowsOfFolder(item.data(Qt.UserRole))
+            if folder_rows is not None:
+                self.runList.selectRows(*folder_rows)
 
     self.runList.blockSignals(False)
 
@@ -446,8 +418,11 @@ def refreshCurrentFolder(self, new_folder=None):
     self.seqList.addItem(item)
 
     # -- check that the folder exists
+    self.current_folder_state = {}
     if not self.current_folder.is_dir():
-        self.runList.addItems(["Folder does not exists"])
+        updateFolderWatcher(self)
+        message = RunListEntry(MESSAGE, name="Folder does not exists")
+        self.runList.model().setEntries([message])
         self.seqList.blockSignals(False)
         self.runList.blockSignals(False)
         return
@@ -456,7 +431,24 @@ def refreshCurrentFolder(self, new_folder=None):
     data_class = self.dataTypeComboBox.currentData()
     dir_content = exploreDayFolder(self.current_folder, data_class)
 
+    # run names are generated by the data class, when displayed
+    model = self.runList.model()
+    model.display_name_function = lambda path: data_class(path=path).getDisplayName()
+
+    run_entries = []
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
     for content in dir_content:
+        # - store folder state, for incremental updates
+        folder = content["path"]
+        # get list of saved fits (one listing per folder)
+        fitted_stems = fitting.get_saved_fit_stems(self, folder)
+        self.current_folder_state[folder] = {
+            "mtime": getFolderMtime(folder),
+            "fit_mtime": getFolderMtime(folder / fit_folder_name),
+            "file_list": content["file_list"],
+            "fitted": fitted_stems,
+        }
+
         # - skip if empty
         if not content["file_list"]:
             continue
@@ -473,50 +465,26 @@ def refreshCurrentFolder(self, new_folder=None):
             continue
 
         # special formatting > for runList
-        item = QListWidgetItem()
-        item.setText(content["name"])
-        item.setData(Qt.UserRole, content["path"])
-        item.setForeground(QColor(0, 0, 255))
-        # https://joekuan.files.wordpress.com/2015/09/screen3.png
-        item.setIcon(self.style().standardIcon(QStyle.SP_DirIcon))
-        self.runList.addItem(item)
+        entry = RunListEntry(FOLDER, path=folder, name=content["name"])
+        run_entries.append(entry)
 
         # - add files items
         n_files = len(content["file_list"])
         for i, file in enumerate(content["file_list"]):
-            # good prefix
-            if i == n_files - 1:
-                prefix = "└─ "
-            else:
-                prefix = "├─ "
-
-            # is there a fit ?
-            suffix = ""
-            if fitting.saved_fit_exist(self, file):
-                # ideas for markers :
-                # 🟩, ✳️ ✔️
-                # see https://emojipedia.org
-                suffix += " ✔️"
-
-            # format display name with the data object
-            data = data_class(path=file)
-            display_name = data.getDisplayName()
-            # add item
-            item = QListWidgetItem()
-            # NB: use file.stem to remove ext
-            item.setText(prefix + display_name + suffix)
-            item.setData(Qt.UserRole, file)
-            self.runList.addItem(item)
+            entry = RunListEntry(
+                RUN,
+                path=file,
+                is_last=(i == n_files - 1),
+                has_fit=(file.stem in fitted_stems),
+            )
+            run_entries.append(entry)
+
+    # - update run list
+    model.setEntries(run_entries)
 
     # -- restore selections
     # run list
-    for i in range(self.runList.count()):
-        item = self.runList.item(i)
-        data = item.data(Qt.UserRole)
-        if data in selected_runs:
-            item.setSelected(True)
-        if data == current_run:
-            self.runList.setCurrentItem(item)
+    self.runList.selectPaths(selected_runs, current_run)
     # seq list
     for i in range(self.seqList.count()):
         item = self.seqList.item(i)
@@ -533,3 +501,175 @@ def refreshCurrentFolder(self, new_folder=None):
     # -- restore focus
     if focus_widget is not None:
         focus_widget.setFocus()
+
+    # -- watch the new folders
+    updateFolderWatcher(self)
+
+
+def updateCurrentFolder(self, force=False, changed_folders=()):
+    """
+    Incremental version of refreshCurrentFolder() : only the folders that
+    changed since the last refresh are scanned again, the new runs are
+    inserted in the run list and the fit markers updated, without clearing
+    the lists (so that the selection is kept). If runs or sequences were
+    removed, falls back to a full refresh. The folders in changed_folders
+    (or all the folders, if force is True) are scanned again even if their
+    modification time did not change.
+    """
+    # -- check
+    if self.current_folder is None:
+        return
+    state = self.current_folder_state
+    if not state or self.current_folder not in state:
+        refreshCurrentFolder(self)
+        return
+
+    # -- find changed folders
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
+    changed = {}
+    for folder, folder_state in state.items():
+        mtime = getFolderMtime(folder)
+        fit_mtime = getFolderMtime(folder / fit_folder_name)
+        if mtime is None:
+            # folder was removed
+            refreshCurrentFolder(self)
+            return
+        unchanged = (
+            mtime == folder_state["mtime"] and fit_mtime == folder_state["fit_mtime"]
+        )
+        if unchanged and not force and folder not in changed_folders:
+            continue
+        changed[folder] = {"mtime": mtime, "fit_mtime": fit_mtime}
+    if not changed:
+        return
+
+    # -- scan changed folders
+    data_class = self.dataTypeComboBox.currentData()
+    for folder, new_state in changed.items():
+        old_state = state[folder]
+        # scan
+        if folder == self.current_folder:
+            file_list, subdir_list = scan.scan_folder(folder, data_class)
+            # new / removed sequence folder : full refresh
+            if set(subdir_list) != set(state) - {folder}:
+                refreshCurrentFolder(self)
+                return
+        else:
+            file_list, _ = scan.scan_folder(folder, data_class, sort_by_time=True)
+        # removed or reordered runs, or new sequence : full refresh
+        old_file_list = old_state["file_list"]
+        old_files = set(old_file_list)
+        if [f for f in file_list if f in old_files] != old_file_list:
+            refreshCurrentFolder(self)
+            return
+        if file_list and not old_file_list:
+            refreshCurrentFolder(self)
+            return
+        # store
+        new_state["file_list"] = file_list
+        new_state["fitted"] = fitting.get_saved_fit_stems(self, folder)
+
+    # -- update run list
+    self.runList.blockSignals(True)
+    model = self.runList.model()
+    # get rows of the folders items
+    folder_rows = {}
+    for folder in changed:
+        row = model.rowOfPath(folder)
+        if row is not None:
+            folder_rows[folder] = row
+    # update, starting from the bottom, so that rows stay valid
+    for folder in sorted(folder_rows, key=folder_rows.get, reverse=True):
+        old_files = set(state[folder]["file_list"])
+        file_list = changed[folder]["file_list"]
+        fitted_stems = changed[folder]["fitted"]
+        n_files = len(file_list)
+        for i, file in enumerate(file_list):
+            row = folder_rows[folder] + 1 + i
+            is_last = i == n_files - 1
+            has_fit = file.stem in fitted_stems
+            if file in old_files:
+                model.updateEntry(row, is_last=is_last, has_fit=has_fit)
+            else:
+                entry = RunListEntry(RUN, path=file, is_last=is_last, has_fit=has_fit)
+                model.insertEntries(row, [entry])
+    self.runList.blockSignals(False)
+
+    # -- store new state
+    for folder, new_state in changed.items():
+        state[folder] = new_state
+
+    # -- watch new fit folders
+    updateFolderWatcher(self)
+
+
+def setRunFitMarker(self, path, has_fit=True):
+    """
+    Sets the fit marker of a run in the run list (e.g. when the run was just
+    fitted), without scanning its folder again
+    """
+    # -- update folder state
+    folder_state = self.current_folder_state.get(path.parent, None)
+    if folder_state is not None:
+        if has_fit:
+            folder_state["fitted"].add(path.stem)
+        else:
+            folder_state["fitted"].discard(path.stem)
+    # -- update run list
+    model = self.runList.model()
+    row = model.rowOfPath(path)
+    if row is not None:
+        model.updateEntry(row, has_fit=has_fit)
+
+
+def updateFolderWatcher(self):
+    """
+    Updates the list of folders watched for changes : the current folder,
+    its subfolders and their fit folders
+    """
+    # -- check
+    if not self.folder_watch_notifications:
+        return
+
+    # -- get folders to watch
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
+    folder_list = []
+    for folder in self.current_folder_state:
+        folder_list.append(str(folder))
+        fit_folder = folder / fit_folder_name
+        if fit_folder.is_dir():
+            folder_list.append(str(fit_folder))
+
+    # -- update watcher
+    watched = set(self.folderWatcher.directories())
+    to_remove = list(watched - set(folder_list))
+    to_add = [f for f in folder_list if f not in watched]
+    if to_remove:
+        self.folderWatcher.removePaths(to_remove)
+    if to_add:
+        self.folderWatcher.addPaths(to_add)
+
+
+def folderWatcherDirectoryChanged(self, path):
+    """
+    Triggered when a watched folder changes. The update is delayed, so that
+    the successive changes (e.g. when a file is being written) trigger only
+    one update
+    """
+    # store the changed data folder
+    path = Path(path)
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
+    if path.name == fit_folder_name:
+        path = path.parent
+    self.folder_watch_changed.add(path)
+    # (re)start timer
+    self.folderWatcherTimer.start()
+
+
+def folderWatcherTimerTimeout(self):
+    """
+    Updates the current folder, after a change or periodically (polling)
+    """
+    changed_folders = self.folder_watch_changed
+    self.folder_watch_changed = set()
+    updateCurrentFolder(self, changed_folders=changed_folders)
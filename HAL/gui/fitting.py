@@ -10,21 +10,54 @@ Comments : Functions related to data fitting
 
 # -- global
 import logging
-import json
-import time
-import jsbeautifier as jsb
-from datetime import datetime
+import threading
 from pathlib import Path
 from PyQt5.QtWidgets import QMessageBox, QInputDialog
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 
 # -- local
-from ..classes.fit.abstract import NumpyArrayEncoder, Abstract2DFit
-from ..classes.data.abstract import AbstractCameraPictureData
+from ..classes.fit import batch, store
 
 # -- logger
 logger = logging.getLogger(__name__)
 
+# %% CLASSES
+
+
+class BatchFitThread(QThread):
+    """runs a batch fit (see HAL.classes.fit.batch.batch_fit) in a separate
+    thread, so that the gui is not frozen. The runFitted(path, success) signal
+    is emitted each time a run is processed (success being True, False or
+    batch.SKIPPED), and the fit can be stopped with cancel()"""
+
+    runFitted = pyqtSignal(object, object)
+
+    def __init__(self, parent, path_list, **batch_fit_options):
+        super().__init__(parent)
+        self.path_list = path_list
+        self.batch_fit_options = batch_fit_options
+        self.cancel_event = threading.Event()
+        self.results = {}
+
+    def run(self):
+        try:
+            self.results = batch.batch_fit(
+                self.path_list,
+                callback=self.runFitted.emit,
+                cancel_event=self.cancel_event,
+                **self.batch_fit_options,
+            )
+        except Exception as e:
+            logger.error(f"batch fit failed : {e}")
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+
 # %% TOOLS
 
 
@@ -46,7 +79,7 @@ def updateFit(self, *args, **kwargs):
 def setupUi(self):
     # -- setup fit selection combo box
     for fit_class in self.fit_classes:
-        fit_name = fit_class().name
+        fit_name = fit_class.name
         self.fitTypeComboBox.addItem(fit_name, fit_class)
 
 
@@ -91,11 +124,9 @@ def removeROI(self):
         return
     # get path to datafile
     path = str(selected_run.data(Qt.UserRole))
-    # generate saved fit path
-    fit_file = _gen_saved_fit_path(self, path)
-    if fit_file.is_file():
-        # load
-        fit_json = json.loads(fit_file.read_text())
+    # load saved fit
+    fit_json = _load_saved_fit_dic(self, path)
+    if fit_json is not None:
         fit_collection = fit_json["collection"]
         # if fit exists for the ROI: ask confirmation -> deletion
         if selected_ROI in fit_collection:
@@ -109,7 +140,7 @@ def removeROI(self):
             if answer == QMessageBox.No:
                 return
             elif len(fit_collection) == 1:
-                fit_file.unlink()
+                _delete_saved_fits(self, [path])
             else:
                 fit_collection.pop(selected_ROI)
                 fit_json["collection"] = fit_collection
@@ -137,11 +168,9 @@ def renameROI(self):
 
         # get path to datafile
         path = str(selected_run.data(Qt.UserRole))
-        # generate saved fit path
-        fit_file = _gen_saved_fit_path(self, path)
-        if fit_file.is_file():
-            # load
-            fit_json = json.loads(fit_file.read_text())
+        # load saved fit
+        fit_json = _load_saved_fit_dic(self, path)
+        if fit_json is not None:
             fit_collection = fit_json["collection"]
             # if fit exists for the ROI: ask confirmation -> deletion
             if selected_ROI_name in fit_collection:
@@ -193,192 +222,117 @@ def removeBackground(self):
 # == low level functions
 
 
-def _fit_2D_data(self, Z, XY, data_object):
-    """handles data fitting"""
+def _fit_2D_rois(self, roi_data, data_object):
+    """handles data fitting, for a {roi_name: (Z, XY)} collection of rois
+    (fitted in parallel)"""
     # -- get selected fit
-    # selected_fit = self.fitTypeComboBox.currentText()
-    # if selected_fit not in self.fit_classes:
-    #     logger.error("fit '%s' is not implemented ?!" % selected_fit)
-    #     return
-    # fit_class = self.fit_classes[selected_fit]
     fit_class = self.fitTypeComboBox.currentData()
     # -- fit
-    # init fit object
-    fit = fit_class(x=XY, z=Z)
-    # get sizes / units from data object
-    px_size_x, px_size_y = data_object.pixel_scale
-    unit_x, unit_y = data_object.pixel_unit
-    # update sizez / units in fit object
-    fit.pixel_size_x = px_size_x
-    fit.pixel_size_y = px_size_y
-    fit.pixel_size_x_unit = unit_x
-    fit.pixel_size_y_unit = unit_y
-    # guess / fit / compute values
-    fit.do_guess()
-    try:
-        fit.do_fit()
-    except:
-        return
-    fit.compute_values()
+    binning, refinement = _get_binning_options(self)
+    max_workers = int(self.settings.config["fit"]["roi workers"])
+    return batch.fit_2D_rois(
+        roi_data,
+        data_object,
+        fit_class,
+        binning=binning,
+        refinement=refinement,
+        max_workers=max_workers,
+    )
 
-    return fit
 
+def _get_binning_options(self):
+    """returns the fit binning options (binning, refinement)"""
+    binning = int(self.settings.config["fit"]["binning"])
+    refinement = eval(self.settings.config["fit"]["binning refinement"])
+    return binning, refinement
 
-def _generate_roi_result_dic(display, roi_name, fit):
-    """generates a dictionnary with the fit results for a given roi,
-    including information about the roi itself, in order to be
-    saved as part of the global fit result"""
 
-    # -- initialize the dictionnary
-    roi_dic = {}
+def _get_program_info(self):
+    """returns the program info, to be saved with the fit results"""
+    return {"name": self._name, "version": self._version, "url": self._url}
 
-    # -- store roi info
-    # position
-    roi_dic["pos"] = {
-        "value": display.getROIPos(roi_name),
-        "unit": "px",
-        "comment": "roi position (lower left corner)",
-    }
-    # position
-    roi_dic["size"] = {
-        "value": display.getROISize(roi_name),
-        "unit": "px",
-        "comment": "roi size",
+
+def _get_background_definition(self):
+    """returns the current background definition (or None)"""
+    background = getattr(self.display, "background", None)
+    if background is None:
+        return None
+    return {
+        "pos": self.display.getBackgroundPos(),
+        "size": self.display.getBackgroundSize(),
     }
 
-    # -- store fit info
-    roi_dic["result"] = fit.export_dic()
 
-    return roi_dic
+def _generate_roi_result_dic(display, roi_name, fit):
+    """generates a dictionnary with the fit results for a given roi,
+    including information about the roi itself, in order to be
+    saved as part of the global fit result"""
+    pos = display.getROIPos(roi_name)
+    size = display.getROISize(roi_name)
+    return batch.generate_roi_result_dic(pos, size, fit)
 
 
-def _generate_fit_result_dic(self, roi_collection, fit, data_object):
+def _generate_fit_result_dic(self, roi_collection, fit, data_object, fit_hash=None):
     """generates the global fit dictionnary, to be exported/saved"""
-
-    # -- initialize
-    fit_dic = {}
-
-    # -- store comments
-    name = self._name
-    version = self._version
-    url = self._url
-    com_str = f"Generated with {name} v{version} (need help? check {url})"
-    fit_dic["__comment__"] = com_str
-    fit_dic["__program__"] = name
-    fit_dic["__version__"] = version
-    fit_dic["__url__"] = url
-
-    # -- fit info
-    fit_info = {}
-
-    # generic fit info
-    fit_info["fit name"] = fit.name
-    fit_info["fit formula"] = fit.formula_help
-    fit_info["fit parameters"] = fit.parameters_help
-    fit_info["fit version"] = fit._version
-    fit_info["generated on"] = datetime.now().strftime("%y-%m-%d %H:%M:%S")
-
-    # specific to 2D fits
-    if isinstance(fit, Abstract2DFit):
-        fit_info["pixel_size_x"] = {
-            "value": fit.pixel_size_x,
-            "unit": fit.pixel_size_x_unit,
-            "comment": "physical size of a pixel (x axis)",
-        }
-        fit_info["pixel_size_y"] = {
-            "value": fit.pixel_size_y,
-            "unit": fit.pixel_size_y_unit,
-            "comment": "physical size of a pixel (y axis)",
-        }
-        fit_info["count_conversion_factor"] = {
-            "value": fit.count_conversion_factor,
-            "unit": fit.converted_count_unit,
-            "comment": "converts image counts into physically meaning quantity \
-            (e.g. atom number)",
-        }
-
     # get background
-    background = getattr(self.display, "background", None)
+    background = _get_background_definition(self)
     if background is not None:
         logger.debug("saving background")
-        back = {}
-        back["pos"] = {
-            "value": self.display.getBackgroundPos(),
-            "unit": "px",
-            "comment": "background position (lower left corner)",
-        }
-        back["size"] = {
-            "value": self.display.getBackgroundSize(),
-            "unit": "px",
-            "comment": "background size",
-        }
-        fit_info["background"] = back
     else:
         logger.debug("NOT saving background")
+    # generate
+    program_info = _get_program_info(self)
+    return batch.generate_fit_result_dic(
+        roi_collection, fit, data_object, background, program_info, fit_hash
+    )
 
-    # store
-    fit_dic["__fit_info__"] = fit_info
-
-    # -- data info
-    data_info = {}
-
-    # generic data info
-    data_info["data path"] = str(data_object.path)
-    data_info["data type"] = data_object.name
-    data_info["data dimension"] = data_object.dimension
-    data_info["pixel scale"] = data_object.pixel_scale
-    data_info["pixel unit"] = data_object.pixel_unit
-
-    # specific to camera pictures
-    if isinstance(data_object, AbstractCameraPictureData):
-        data_info["data class"] = "camera picture"
-        data_info["camera pixel size"] = {
-            "value": data_object.pixel_size,
-            "unit": data_object.pixel_size_unit,
-        }
-        data_info["magnification"] = data_object.magnification
 
-    # store
-    fit_dic["__data_info__"] = data_info
+def _save_fit_result_as_json(self, fit_dic, data_object):
+    """saves all fit information as a json file (or in the fit store)"""
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
+    batch.save_fit_result_as_json(
+        fit_dic,
+        data_object.path,
+        fit_folder_name,
+        use_store=_use_fit_store(self),
+        json_format=self.settings.config["fit"]["json format"],
+    )
+
 
-    # -- store roi collection
-    fit_dic["collection"] = roi_collection
+def _get_fit_signature(self):
+    """returns the signature of the current fit parameters (rois, background,
+    fit class...), used to compute the fit hash (see batch.compute_fit_hash)"""
+    binning, refinement = _get_binning_options(self)
+    return batch.get_fit_signature(
+        self.dataTypeComboBox.currentData(),
+        self.fitTypeComboBox.currentData(),
+        _get_roi_definitions(self),
+        _get_background_definition(self),
+        binning,
+        refinement,
+    )
 
-    return fit_dic
 
+def _skip_unchanged_fits(self):
+    """should the runs already fitted with the current parameters be skipped ?"""
+    return eval(self.settings.config["fit"]["skip unchanged fits"])
 
-def _save_fit_result_as_json(self, fit_dic, data_object):
-    """saves all fit information as a json file"""
-    # -- format json
-    # normal json
-    json_str = json.dumps(fit_dic, ensure_ascii=False, cls=NumpyArrayEncoder)
-    # make it BeAUTiFuL !!!!
-    json_str = jsb.beautify(json_str)
-
-    # -- save it
-    # generate path
-    fit_file = _gen_saved_fit_path(self, data_object.path)
-    fit_folder = fit_file.parent
-    fit_folder.mkdir(exist_ok=True)
-    # write
-    fit_file.write_text(json_str, encoding="utf8")
-
-
-def _gen_saved_fit_path(self, data_path):
-    """generates a saved fit path from data path"""
-
-    # take data path
-    data_path = Path(data_path)  # ensure we have a Path() object
-    data_root = data_path.parent  # data folder
-    data_stem = data_path.stem  # data name (without extension !)
-
-    # gen fit folder path
+
+def _use_fit_store(self):
+    """should the fits be saved in the folder fit store ?"""
+    return eval(self.settings.config["fit"]["use fit store"])
+
+
+def _load_saved_fit_dic(self, data_path):
+    """loads the saved fit dictionnary (from json file or fit store)"""
     fit_folder_name = self.settings.config["fit"]["fit folder name"]
-    fit_folder = data_root / fit_folder_name
+    return store.load_saved_fit_dic(data_path, fit_folder_name)
 
-    # get fit file path
-    fit_file = fit_folder / (data_stem + ".json")
-    return fit_file
+
+def _delete_saved_fits(self, path_list):
+    """deletes the saved fits (json file or fit store) for a list of data"""
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
+    store.delete_saved_fits(path_list, fit_folder_name)
 
 
 def saved_fit_exist(self, data_path=None):
@@ -391,10 +345,26 @@ def saved_fit_exist(self, data_path=None):
         data_object = self.display.getCurrentDataObject()
         data_path = Path(data_object.path)
 
-    # generate saved fit path
-    fit_file = _gen_saved_fit_path(self, data_path)
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
+    return store.saved_fit_exist(data_path, fit_folder_name)
 
-    return fit_file.is_file()
+
+def get_saved_fit_stems(self, data_folder):
+    """returns the set of data names (without extension) for which a saved
+    fit exists in the data folder. Faster than calling saved_fit_exist()
+    for each file of the folder"""
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
+    return store.get_saved_fit_stems(data_folder, fit_folder_name)
+
+
+def migrateSavedFits(self):
+    """imports the json saved fits of the current folder (and its
+    subfolders) into their fit stores"""
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
+    n_fits = 0
+    for folder in self.current_folder_state:
+        n_fits += store.migrate_json_fits(folder, fit_folder_name)
+    logger.info(f"{n_fits} saved fits imported in fit stores")
 
 
 def load_saved_fit(self, data_path=None):
@@ -408,16 +378,13 @@ def load_saved_fit(self, data_path=None):
             return None, None
         data_path = Path(data_object.path)
 
-    # generate saved fit path
-    fit_file = _gen_saved_fit_path(self, data_path)
+    # load (from json file or fit store)
+    fit_json = _load_saved_fit_dic(self, data_path)
 
     # if does not exist : return
-    if not fit_file.is_file():
+    if fit_json is None:
         return None, None
 
-    # load
-    fit_json = json.loads(fit_file.read_text())  # encoding="utf8" ?
-
     # -- analyze fit
     # get fit info
     if "__fit_info__" not in fit_json:
@@ -436,9 +403,9 @@ def load_saved_fit(self, data_path=None):
 
     # check fit version
     fit_class = self.fit_classes_dic[fit_name]
-    if fit_class()._version != fit_version:
+    if fit_class._version != fit_version:
         msg = "saved fit version (%s) does not match " % fit_version
-        msg += "the current implemented version (%s) " % fit_class()._version
+        msg += "the current implemented version (%s) " % fit_class._version
         msg += "for the '%s' fit class" % fit_name
         msg += "I will try to go on though..."
         logger.warning(msg)
@@ -466,9 +433,11 @@ def load_saved_fit(self, data_path=None):
 # == high level fit function
 
 
-def fitData(self):
+def fitData(self, force=False):
     """high level function for data fitting. Loop on all defined ROIs,
-    fit the data, and save results"""
+    fit the data, and save results. Unless force is True, the fit is skipped
+    if the data was already fitted with the same parameters (and the
+    'skip unchanged fits' setting is enabled)"""
 
     # -- check current data object (for dimension)
     data_object = self.display.getCurrentDataObject()
@@ -485,17 +454,34 @@ def fitData(self):
         logger.warning("ERROR : no ROI defined !!")
         return
 
-    fit_collection = []
+    # -- already fitted ?
+    fit_folder_name = self.settings.config["fit"]["fit folder name"]
+    fit_signature = _get_fit_signature(self)
+    if not force and _skip_unchanged_fits(self):
+        if batch.is_fit_up_to_date(data_object.path, fit_signature, fit_folder_name):
+            logger.info(f"'{data_object.path.name}' already fitted : skipped")
+            return
+    fit_hash = batch.compute_fit_hash(data_object.path, fit_signature)
+
+    # get roi data
+    roi_data = {}
     for roi_name in self.display.getROINames():
-        # get roi data
         Z, XY = self.display.getROIData(roi_name)
-        if Z is None:
+        # (skip the rois outside the image, as in batch fits)
+        if Z is None or Z.size == 0:
             continue
-        # fit the data
-        fit = _fit_2D_data(self, Z, XY, data_object)
+        roi_data[roi_name] = (Z, XY)
+    if not roi_data:
+        return
+
+    # fit the data (all the rois in parallel)
+    fit_results = _fit_2D_rois(self, roi_data, data_object)
+
+    fit_collection = []
+    for roi_name, fit in fit_results.items():
         if fit is None:
             # to handle the cas where the fit is not implemented
-            # (cf. _fit_2D_data)
+            # (cf. batch.fit_2D_data)
             # TODO : raise an error instead ?
             return
         # fit.plot_fit_result()  # TEMP
@@ -512,36 +498,128 @@ def fitData(self):
         roi_collection[roi_name] = roi_dic
 
     # - prepare fit dict
-    fit_dic = _generate_fit_result_dic(self, roi_collection, fit, data_object)
+    fit_dic = _generate_fit_result_dic(self, roi_collection, fit, data_object, fit_hash)
 
     # - save as json
     _save_fit_result_as_json(self, fit_dic, data_object)
 
 
-def batchFitData(self):
+def _get_roi_definitions(self):
+    """returns the current roi definitions, as {roi_name: {"pos", "size"}}"""
+    roi_collection = {}
+    for roi_name in self.display.getROINames():
+        roi_collection[roi_name] = {
+            "pos": self.display.getROIPos(roi_name),
+            "size": self.display.getROISize(roi_name),
+        }
+    return roi_collection
+
+
+def batchFitData(self, force=False):
     """Implements batch fitting. This function is now called when asking for a fit
-    via the gui _fitButtonClicked feedback function, instead of fitData. It will loop
-    on all selected runs and perform a fit for each of them"""
+    via the gui _fitButtonClicked feedback function, instead of fitData. If only
+    one run is selected, it is fitted with fitData. Otherwise, all the selected runs
+    are fitted by the headless batch fitting engine (HAL.classes.fit.batch), over
+    a process pool, using the current ROIs and background definitions.
+
+    The batch fit is run in the background (see BatchFitThread) : the function
+    returns True if a batch fit was started. self._batchFitRunDone() is then
+    called for each fitted run, and self._batchFitFinished() at the end.
+
+    Unless force is True, the runs already fitted with the same parameters are
+    skipped (if the 'skip unchanged fits' setting is enabled)"""
     # -- get the list of selected runs
     selected_runs = self.runList.selectedItems()
-    n_runs = len(selected_runs)
-    # -- loop
-    self.progressBar.setRange(1, n_runs + 1)
+    selected_paths = [item.data(Qt.UserRole) for item in selected_runs]
+    # skip "folders"
+    selected_paths = [p for p in selected_paths if p is not None and p.is_file()]
+    n_runs = len(selected_paths)
+    if n_runs == 0:
+        return False
+
+    # -- only one run : use the 'interactive' fit
+    if n_runs == 1:
+        self.runList.setCurrentItem(selected_runs[0])
+        fitData(self, force=force)
+        return False
+
+    # -- check rois
+    roi_collection = _get_roi_definitions(self)
+    if not roi_collection:
+        logger.warning("ERROR : no ROI defined !!")
+        return False
+
+    # -- prepare batch fit
+    binning, refinement = _get_binning_options(self)
+    thread = BatchFitThread(
+        self,
+        selected_paths,
+        data_class=self.dataTypeComboBox.currentData(),
+        fit_class=self.fitTypeComboBox.currentData(),
+        roi_collection=roi_collection,
+        background=_get_background_definition(self),
+        fit_folder_name=self.settings.config["fit"]["fit folder name"],
+        program_info=_get_program_info(self),
+        use_store=_use_fit_store(self),
+        json_format=self.settings.config["fit"]["json format"],
+        binning=binning,
+        refinement=refinement,
+        warm_start=eval(self.settings.config["fit"]["batch warm start"]),
+        max_workers=int(self.settings.config["fit"]["batch workers"]),
+        skip_unchanged=_skip_unchanged_fits(self) and not force,
+    )
+    thread.runFitted.connect(self._batchFitRunDone)
+    thread.finished.connect(self._batchFitFinished)
+    self.batch_fit_thread = thread
+
+    # progress bar
+    self.progressBar.setRange(0, n_runs)
     self.progressBar.setFormat("fitting run %v / %m")
     self.progressBar.setTextVisible(True)
-    for i_run, item in enumerate(selected_runs):
-        self.progressBar.setValue(i_run + 1)
-        # skip "folders"
-        if item.data(Qt.UserRole) is None:
-            continue
-        # select data and fit
-        self.runList.setCurrentItem(item)
-        fitData(self)
+    self.progressBar.setValue(0)
+    # the fit button is used to cancel the fit
+    self.fitButton.setText("CANCEL")
+
+    # -- fit
+    thread.start()
+    return True
 
+
+def isBatchFitRunning(self):
+    """is there a batch fit running in the background ?"""
+    thread = getattr(self, "batch_fit_thread", None)
+    return thread is not None and thread.isRunning()
+
+
+def cancelBatchFit(self, wait=False):
+    """stops the running batch fit (the runs that are being fitted are
+    finished). If wait is True, waits for the fit thread to finish"""
+    if not isBatchFitRunning(self):
+        return
+    logger.info("cancelling batch fit")
+    self.batch_fit_thread.cancel()
+    self.progressBar.setFormat("cancelling...")
+    if wait:
+        self.batch_fit_thread.wait()
+
+
+def batchFitRunDone(self, path, success):
+    """called each time a run is processed by the running batch fit"""
+    if not success:
+        logger.warning(f"fit failed for '{path}'")
+    self.progressBar.setValue(self.progressBar.value() + 1)
+
+
+def batchFitFinished(self):
+    """called when the running batch fit is finished (or cancelled)"""
+    thread = self.batch_fit_thread
+    self.batch_fit_thread = None
     # done
-    self.progressBar.setFormat("DONE")
+    self.fitButton.setText("FIT")
+    self.progressBar.setFormat("CANCELLED" if thread.cancelled else "DONE")
     self.progressBar.setRange(0, 100)
     self.progressBar.setValue(100)
+    thread.deleteLater()
 
 
 # == saved fit management
@@ -564,23 +642,14 @@ def deleteSavedFits(self):
     if not selected_runs:
         # if empty >> do nothing
         return
-    # get paths
-    selected_paths = [str(s.data(Qt.UserRole)) for s in selected_runs]
-    # loop
-    n_paths = len(selected_paths)
-    self.progressBar.setRange(1, n_paths + 1)
-    self.progressBar.setFormat("processing file %v / %m")
+    # get paths (skip "folders")
+    selected_paths = [s.data(Qt.UserRole) for s in selected_runs]
+    selected_paths = [p for p in selected_paths if p is not None and p.is_file()]
+    # DELETE !!!!!
+    self.progressBar.setRange(0, 100)
+    self.progressBar.setFormat("deleting fits")
     self.progressBar.setTextVisible(True)
-    for i_path, path in enumerate(selected_paths):
-        self.progressBar.setValue(i_path + 1)
-        # skip "folders"
-        if path is None:
-            continue
-        # generate saved fit path
-        fit_file = _gen_saved_fit_path(self, path)
-        # if file exist : DELETE !!!!!
-        if fit_file.is_file():
-            fit_file.unlink()
+    _delete_saved_fits(self, selected_paths)
 
     # done
     self.progressBar.setFormat("DONE")
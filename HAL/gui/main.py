@@ -37,7 +37,10 @@ from . import (
 )
 
 from .MainUI import Ui_mainWindow
-from ..classes.settings import Settings
+from ..classes.settings import Settings, set_shared_settings
+from ..classes.metadata.cache import MetadataCache
+from ..classes.data.datasets import DatasetRegistry
+from ..classes.fit.batch import SKIPPED
 from ..gui import local_folder
 
 
@@ -119,6 +122,9 @@ CALLBACK_LIST = [
     ("refreshRunListButton", "clicked", "_refreshRunListButtonClicked"),
     ("todayButton", "clicked", "_todayButtonClicked"),
     ("dateEdit", "dateChanged", "_dateEditClicked"),
+    # folder watcher
+    ("folderWatcher", "directoryChanged", "_folderWatcherDirectoryChanged"),
+    ("folderWatcherTimer", "timeout", "_folderWatcherTimerTimeout"),
 
     # -- DATA DISPLAY --
     # select data type
@@ -256,6 +262,7 @@ class MainWindow(QtWidgets.QMainWindow, Ui_mainWindow):
         # load settings
         global_config_path = self._settings_folder / "global.conf"
         self.settings = Settings(path=global_config_path)
+        set_shared_settings(self.settings)  # used by the modules
 
         # -- configure window
         # icon
@@ -294,16 +301,20 @@ class MainWindow(QtWidgets.QMainWindow, Ui_mainWindow):
 
         # -- Metadata cache
         # cache
-        self.metadata_cache = {}
+        self.metadata_cache = MetadataCache()
+        # parsed datasets
+        self.dataset_registry = DatasetRegistry()
         # init "lists" of available meta data
         # those are in fact "sets", so that the fields are only
         # counted once
-        meta_names = [m().name for m in self.metadata_classes]
+        meta_names = [m.name for m in self.metadata_classes]
         ordered_dic_init = [(m, set()) for m in meta_names]
         self.available_metadata = OrderedDict(ordered_dic_init)
         self.available_numeric_metadata = OrderedDict(ordered_dic_init)
         # live display subplots
         self.live_display_subplots = []
+        # parsed variable declarations and compiled plot formulaes
+        self.live_plot_cache = {}
 
         # -- Other initializations
         self.current_folder = None
@@ -311,6 +322,7 @@ class MainWindow(QtWidgets.QMainWindow, Ui_mainWindow):
         self.current_fig = None
         self.dark_theme = False
         self.default_palette = self.palette()
+        self.batch_fit_thread = None
 
         # -- Keyboard shortcuts
 
@@ -445,9 +457,15 @@ class MainWindow(QtWidgets.QMainWindow, Ui_mainWindow):
         dataexplorer.refreshDataSetList(self)
 
     def _refreshRunListButtonClicked(self, *args, **kwargs):
-        filebrowser.refreshCurrentFolder(self)
+        filebrowser.updateCurrentFolder(self, force=True)
         dataexplorer.refreshDataSetList(self)
 
+    def _folderWatcherDirectoryChanged(self, path, *args, **kwargs):
+        filebrowser.folderWatcherDirectoryChanged(self, path)
+
+    def _folderWatcherTimerTimeout(self, *args, **kwargs):
+        filebrowser.folderWatcherTimerTimeout(self)
+
     def _todayButtonClicked(self, checked=False):
         filebrowser.todayButtonClicked(self)
         dataexplorer.refreshDataSetList(self)
@@ -497,7 +515,7 @@ class MainWindow(QtWidgets.QMainWindow, Ui_mainWindow):
         quickplot.refreshMetaDataList(self)
 
     def _refreshMetadataCachebuttonClicked(self, *args, **kwargs):
-        dataexplorer.updateMetadataCache(self, reset_cache=True)
+        dataexplorer.updateMetadataCache(self, reset_cache=True, reset_index=True)
 
     def _createNewDataSet(self, *args, **kwargs):
         dataexplorer.createNewDataSet(self)
@@ -604,21 +622,59 @@ class MainWindow(QtWidgets.QMainWindow, Ui_mainWindow):
         display.updateFitForSelectedData(self)
 
     def _fitButtonClicked(self, *args, **kwargs):
-        # fit
-        fitting.batchFitData(self)
+        # a batch fit is running : cancel it
+        if fitting.isBatchFitRunning(self):
+            fitting.cancelBatchFit(self)
+            return
+        # fit (batch fits run in the background)
+        if fitting.batchFitData(self):
+            return
         # refresh
-        filebrowser.refreshCurrentFolder(self)
+        self._refreshAfterFit()
+
+    def _forceFitSelectedData(self, *args, **kwargs):
+        # fit again, even the runs that were already fitted
+        if fitting.isBatchFitRunning(self):
+            return
+        if fitting.batchFitData(self, force=True):
+            return
+        # refresh
+        self._refreshAfterFit()
+
+    def _batchFitRunDone(self, path, success):
+        fitting.batchFitRunDone(self, path, success)
+        # (nothing to update for the skipped runs)
+        if success and success != SKIPPED:
+            filebrowser.setRunFitMarker(self, path)
+            dataexplorer.updateFileMetadata(self, path)
+
+    def _batchFitFinished(self, *args, **kwargs):
+        fitting.batchFitFinished(self)
+        # refresh
+        self._refreshAfterFit()
+
+    def _refreshAfterFit(self):
+        filebrowser.updateCurrentFolder(self, force=True)
         dataexplorer.refreshDataSetList(self)
         display.updateFitForSelectedData(self)
         dataexplorer.displayMetaData(self)
 
+    def _cancelBatchFit(self, *args, **kwargs):
+        fitting.cancelBatchFit(self)
+
     def _deleteFitButtonClicked(self, *args, **kwargs):
         # fit
         fitting.deleteSavedFits(self)
         # refresh
-        filebrowser.refreshCurrentFolder(self)
+        filebrowser.updateCurrentFolder(self, force=True)
         dataexplorer.refreshDataSetList(self)
 
+    def _migrateSavedFits(self, *args, **kwargs):
+        # import json fits in fit stores
+        fitting.migrateSavedFits(self)
+        # refresh
+        filebrowser.updateCurrentFolder(self, force=True)
+
     def _backgroundCheckBoxChanged(self, *args, **kwargs):
         if self.backgroundCheckBox.isChecked():
             fitting.addBackground(self)
@@ -700,6 +756,12 @@ class MainWindow(QtWidgets.QMainWindow, Ui_mainWindow):
         self._kl.append(event.key())
         misc.analyse_keylog(self)
 
+    def closeEvent(self, event):
+        """window closed"""
+        # stop the running batch fit, if any
+        fitting.cancelBatchFit(self, wait=True)
+        super().closeEvent(event)
+
     # == MAIN
 
     def main(self):
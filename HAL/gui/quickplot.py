@@ -52,6 +52,19 @@ def _isnumber(x):
         return False
 
 
+def _toFloatArray(values):
+    """converts an array of metadata values to floats. Returns the converted
+    array, and a mask of the values that are numbers (see _isnumber()). For
+    numeric arrays, no python loop is needed"""
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        return values.astype(float), np.ones(values.shape, dtype=bool)
+    is_number = np.array([_isnumber(v) for v in values], dtype=bool)
+    out = np.full(values.shape, np.nan)
+    out[is_number] = [float(v) for v in values[is_number]]
+    return out, is_number
+
+
 # %% SETUP FUNCTIONS
 class PlottingOptionsWindow(QMainWindow, Ui_plottingOptionsWindow):
     def __init__(self) -> None:
@@ -383,22 +396,17 @@ def plotData(self):
         x_filtered = [[]] * len(x_raw)
         y_filtered = [[]] * len(x_raw)
         for k in range(len(x_raw)):
-            x_filtered[k] = []
-            y_filtered[k] = []
-
-            for i, (x, y) in enumerate(zip(x_raw[k], y_raw[k])):
-                if not _isnumber(x) or not _isnumber(y):
-                    continue
-                x_filtered[k].append(float(x))
-                y_filtered[k].append(float(y))
+            x, x_is_number = _toFloatArray(x_raw[k])
+            y, y_is_number = _toFloatArray(y_raw[k])
+            i_good = x_is_number & y_is_number
+            x_filtered[k] = x[i_good]
+            y_filtered[k] = y[i_good]
 
         # if empty : continue
         isort = [[]] * len(x_raw)
         for k in range(len(x_raw)):
-            if not x_filtered[k]:
+            if len(x_filtered[k]) == 0:
                 continue
-            x_filtered[k] = np.array(x_filtered[k])
-            y_filtered[k] = np.array(y_filtered[k])
 
             # sort
             isort[k] = np.argsort(x_filtered[k])
@@ -835,24 +843,18 @@ def plotData2D(self):
         y_raw = data[y_data_name[0]][y_data_name[1]]
         z_raw = data[z_data_name[0]][z_data_name[1]]
         # remove non numeric values
-        x_filtered = []
-        y_filtered = []
-        z_filtered = []
-        for i, (x, y, z) in enumerate(zip(x_raw, y_raw, z_raw)):
-            if not _isnumber(x) or not _isnumber(y) or not _isnumber(z):
-                continue
-            x_filtered.append(float(x))
-            y_filtered.append(float(y))
-            z_filtered.append(float(z))
+        x, x_is_number = _toFloatArray(x_raw)
+        y, y_is_number = _toFloatArray(y_raw)
+        z, z_is_number = _toFloatArray(z_raw)
+        i_good = x_is_number & y_is_number & z_is_number
+        x_filtered = x[i_good]
+        y_filtered = y[i_good]
+        z_filtered = z[i_good]
 
         # if empty : continue
-        if not x_filtered:
+        if len(x_filtered) == 0:
             continue
 
-        x_filtered = np.array(x_filtered)
-        y_filtered = np.array(y_filtered)
-        z_filtered = np.array(z_filtered)
-
         # - is x a timestamp ?
         x_meta, x_name = x_data_name
         x_info = data[x_meta].get(f"_{x_name}_info", None)
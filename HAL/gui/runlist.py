@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Author   : Alexandre
+Created  : 2026-10-18 13:41:09
+
+Comments : model / view implementation of the run list. The list content is
+           stored in a QAbstractListModel, with one light entry per row : the
+           displayed text is only generated when a row is actually shown, and
+           rows can be found from their path through an index. The view
+           (RunListView) mimics the subset of the QListWidget API used in
+           the gui (selectedItems(), currentItem(), item(), ...).
+"""
+
+# %% IMPORTS
+
+# -- global
+from PyQt5.QtCore import (
+    Qt,
+    QAbstractListModel,
+    QModelIndex,
+    QPersistentModelIndex,
+    QItemSelection,
+    QItemSelectionModel,
+    pyqtSignal,
+)
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QListView, QStyle
+
+# %% GLOBAL VARIABLES
+
+# entry kinds
+FOLDER = "folder"
+RUN = "run"
+MESSAGE = "message"
+
+FOLDER_COLOR = QColor(0, 0, 255)
+# ideas for markers :
+# 🟩, ✳️ ✔️
+# see https://emojipedia.org
+FIT_MARKER = " ✔️"
+
+
+# %% MODEL
+
+
+class RunListEntry(object):
+    """one row of the run list"""
+
+    __slots__ = ("kind", "path", "name", "is_last", "has_fit")
+
+    def __init__(self, kind, path=None, name=None, is_last=False, has_fit=False):
+        self.kind = kind  # FOLDER, RUN or MESSAGE
+        self.path = path  # Path object (None for messages)
+        self.name = name  # display name, generated when needed if None
+        self.is_last = is_last  # last run of a folder ?
+        self.has_fit = has_fit  # is there a saved fit for this run ?
+
+
+class RunListModel(QAbstractListModel):
+    """list model for the run list"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entries = []
+        self._path_index = None  # {path: row}, rebuilt when needed
+        self._folder_icon = None
+        # function used to generate the run display names, from their path
+        self.display_name_function = lambda path: path.stem
+
+    # == QAbstractListModel methods
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entries[index.row()]
+        if role == Qt.DisplayRole:
+            return self._entryText(entry)
+        elif role == Qt.UserRole:
+            return entry.path
+        elif role == Qt.ForegroundRole and entry.kind == FOLDER:
+            return FOLDER_COLOR
+        elif role == Qt.DecorationRole and entry.kind == FOLDER:
+            return self._folder_icon
+        return None
+
+    # == entries management
+
+    def _entryText(self, entry):
+        """generates the text displayed for an entry"""
+        # lazy generation of run names
+        if entry.name is None:
+            entry.name = self.display_name_function(entry.path)
+        if entry.kind != RUN:
+            return entry.name
+        prefix = "└─ " if entry.is_last else "├─ "
+        suffix = FIT_MARKER if entry.has_fit else ""
+        return prefix + entry.name + suffix
+
+    def setFolderIcon(self, icon):
+        self._folder_icon = icon
+
+    def setEntries(self, entries):
+        """replaces the whole list content"""
+        self.beginResetModel()
+        self._entries = list(entries)
+        self._path_index = None
+        self.endResetModel()
+
+    def clear(self):
+        self.setEntries([])
+
+    def insertEntries(self, row, entries):
+        """inserts a list of entries, starting at a given row"""
+        if not entries:
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(entries) - 1)
+        self._entries[row:row] = entries
+        self._path_index = None
+        self.endInsertRows()
+
+    def updateEntry(self, row, **kwargs):
+        """updates the attributes of the entry at a given row"""
+        entry = self._entries[row]
+        changed = False
+        for name, value in kwargs.items():
+            if getattr(entry, name) != value:
+                setattr(entry, name, value)
+                changed = True
+        if changed:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def entry(self, row):
+        return self._entries[row]
+
+    def rowOfPath(self, path):
+        """returns the row of a given path, or None if not in the list"""
+        if self._path_index is None:
+            self._path_index = {
+                e.path: i for i, e in enumerate(self._entries) if e.path is not None
+            }
+        return self._path_index.get(path, None)
+
+    def rowsOfFolder(self, folder):
+        """returns the (first, last) rows of the runs of a given folder, or
+        None if the folder is not in the list (or empty)"""
+        row = self.rowOfPath(folder)
+        if row is None or self._entries[row].kind != FOLDER:
+            return None
+        last = row
+        while last + 1 < len(self._entries):
+            if self._entries[last + 1].kind != RUN:
+                break
+            last += 1
+        if last == row:
+            return None
+        return row + 1, last
+
+
+# %% VIEW
+
+
+class RunListItem(object):
+    """a light 'item', pointing to a row of a RunListView, that mimics the
+    QListWidgetItem methods used in the gui"""
+
+    def __init__(self, view, row):
+        self._view = view
+        self._index = QPersistentModelIndex(view.model().index(row))
+
+    def modelIndex(self):
+        return QModelIndex(self._index)
+
+    def row(self):
+        return self._index.row()
+
+    def data(self, role):
+        return self._index.data(role)
+
+    def text(self):
+        return self._index.data(Qt.DisplayRole)
+
+    def isSelected(self):
+        return self._view.selectionModel().isSelected(self.modelIndex())
+
+    def setSelected(self, selected):
+        command = (
+            QItemSelectionModel.Select if selected else QItemSelectionModel.Deselect
+        )
+        self._view.selectionModel().select(self.modelIndex(), command)
+
+
+class RunListView(QListView):
+    """model / view run list. Implements the subset of the QListWidget API
+    used in the gui"""
+
+    itemSelectionChanged = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # performance
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        # model
+        model = RunListModel(self)
+        model.setFolderIcon(self.style().standardIcon(QStyle.SP_DirIcon))
+        self.setModel(model)
+        # selection signal
+        self.selectionModel().selectionChanged.connect(self._emitSelectionChanged)
+
+    def _emitSelectionChanged(self, *args):
+        self.itemSelectionChanged.emit()
+
+    # == QListWidget-like API
+
+    def count(self):
+        return self.model().rowCount()
+
+    def item(self, row):
+        if not 0 <= row < self.count():
+            return None
+        return RunListItem(self, row)
+
+    def row(self, item):
+        return item.row()
+
+    def itemAt(self, position):
+        index = self.indexAt(position)
+        if not index.isValid():
+            return None
+        return RunListItem(self, index.row())
+
+    def currentItem(self):
+        index = self.currentIndex()
+        if not index.isValid():
+            return None
+        return RunListItem(self, index.row())
+
+    def setCurrentItem(self, item):
+        self.setCurrentIndex(item.modelIndex())
+
+    def selectedItems(self):
+        rows = sorted(index.row() for index in self.selectedIndexes())
+        return [RunListItem(self, row) for row in rows]
+
+    def findItems(self, text, flags=Qt.MatchContains):
+        model = self.model()
+        start = model.index(0)
+        indexes = model.match(start, Qt.DisplayRole, text, -1, flags)
+        return [RunListItem(self, index.row()) for index in indexes]
+
+    def clear(self):
+        self.model().clear()
+
+    # == selection tools
+
+    def selectPaths(self, path_list, current_path=None):
+        """selects the rows corresponding to a list of paths (the previous
+        selection is cleared), and sets the current row"""
+        model = self.model()
+        selection = QItemSelection()
+        for path in path_list:
+            row = model.rowOfPath(path)
+            if row is not None:
+                index = model.index(row)
+                selection.select(index, index)
+        self.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect)
+        # set current, without changing the selection
+        row = model.rowOfPath(current_path) if current_path is not None else None
+        if row is not None:
+            self.selectionModel().setCurrentIndex(
+                model.index(row), QItemSelectionModel.NoUpdate
+            )
+
+    def selectRows(self, first, last):
+        """adds a range of rows to the selection"""
+        model = self.model()
+        selection = QItemSelection(model.index(first), model.index(last))
+        self.selectionModel().select(selection, QItemSelectionModel.Select)
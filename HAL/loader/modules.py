@@ -21,7 +21,6 @@ from .. import default_modules as default
 from ..classes.metadata.abstract import AbstractMetaData
 from ..classes.fit.abstract import Abstract2DFit, Abstract1DFit
 from ..classes.data.abstract import AbstractData
-from ..classes.display.abstract import AbstractDisplay
 
 # -- logger
 logger = logging.getLogger(__name__)
@@ -30,9 +29,25 @@ logger = logging.getLogger(__name__)
 # %% LOW LEVEL FUNCTIONS
 
 
-def _getModules(self):
+def _setClassAttributes(module_class, attributes=("name",)):
+    """makes sure that some attributes (name, version) of a module class can
+    be read at the class level, without instantiating it. The default modules
+    declare them as class attributes, but some (user) modules only set them in
+    their __init__() : for those, the class is instantiated once, and the
+    values are stored as class attributes"""
+    missing = [a for a in attributes if a not in vars(module_class)]
+    if not missing:
+        return
+    instance = module_class()
+    for attribute in missing:
+        setattr(module_class, attribute, getattr(instance, attribute))
+
+
+def _getModules(self, headless=False, user_modules=True):
     """Gets all modules, both the default ones located in `default_modules`
-    and the user-defined ones located in `~/.HAL/user_modules`"""
+    and the user-defined ones located in `~/.HAL/user_modules`. In headless
+    mode, the default display modules (that require PyQt5) are not loaded.
+    If user_modules is False, only the default modules are loaded."""
 
     # -- init the module list
     loaded_modules = []
@@ -41,8 +56,14 @@ def _getModules(self):
     # -- include the default
     loaded_modules.append(default)
     loaded_modules_names.append("default")
+    if not headless:
+        display = importlib.import_module(".display", default.__name__)
+        loaded_modules.append(display)
+        loaded_modules_names.append("default display")
 
     # -- loader user-defined
+    if not user_modules:
+        return loaded_modules, loaded_modules_names
     # get user module folder and add to system path
     user_modules_folder = self._user_modules_folder
     parent_folder = str(user_modules_folder.parent)
@@ -78,8 +99,9 @@ def _getModules(self):
     return loaded_modules, loaded_modules_names
 
 
-def _sortModules(self, loaded_modules, loaded_modules_names):
-    """Sorts the user modules"""
+def _sortModules(self, loaded_modules, loaded_modules_names, headless=False):
+    """Sorts the user modules. In headless mode, the display classes are
+    ignored (so that PyQt5 is not imported)"""
 
     # -- init lists / dict
     # implemented data classes
@@ -93,6 +115,12 @@ def _sortModules(self, loaded_modules, loaded_modules_names):
     # implemented 1D fit classes
     self.fit_classes_1D = []
 
+    # -- display classes base class (requires PyQt5)
+    if headless:
+        AbstractDisplay = None
+    else:
+        from ..classes.display.abstract import AbstractDisplay
+
     # -- generate list of ignored packages
     ignored = self.settings.config["global"]["ignored modules list"]
     ignored = ignored.split(",")
@@ -121,17 +149,20 @@ def _sortModules(self, loaded_modules, loaded_modules_names):
             # if it is a child of AbstractMetaData >> to self.metadata_classes !
             if issubclass(usermod, AbstractMetaData):
                 logger.debug(f"found one metadata class '{usermod.__name__}'")
+                _setClassAttributes(usermod)
                 self.metadata_classes.append(usermod)
             # if it is a child of Abstract2DFit >> to self.fit_classes !
             elif issubclass(usermod, Abstract2DFit):
                 logger.debug(f"found one fit class '{usermod.__name__}'")
+                _setClassAttributes(usermod, ("name", "_version"))
                 self.fit_classes.append(usermod)
             # if it is a child of AbstractData >> to self.data_classes !
             elif issubclass(usermod, AbstractData):
                 logger.debug(f"found one fit class '{usermod.__name__}'")
+                _setClassAttributes(usermod)
                 self.data_classes.append(usermod)
             # if it is a child of AbstractDisplay >> to self.display_classes !
-            elif issubclass(usermod, AbstractDisplay):
+            elif AbstractDisplay is not None and issubclass(usermod, AbstractDisplay):
                 logger.debug(f"found one fit class '{usermod.__name__}'")
                 self.display_classes.append(usermod)
             # if it is a child of Abstract1DFit >> to self.fit_classes_1D !
@@ -147,7 +178,7 @@ def _sortModules(self, loaded_modules, loaded_modules_names):
     # this will be useful for loading fit
     self.fit_classes_dic = {}
     for fit_class in self.fit_classes:
-        name = fit_class().name
+        name = fit_class.name
         if name in self.fit_classes_dic:
             msg = f"fit name '{name}' was already taken... it will be overriden "
             msg += "in the fit dictionnary. This might cause bugs when loading "
@@ -160,9 +191,10 @@ def _sortModules(self, loaded_modules, loaded_modules_names):
 # %% MAIN FUNCTION
 
 
-def load(self):
-    """the main function, called by the gui"""
+def load(self, headless=False, user_modules=True):
+    """the main function, called by the gui (and by the command line
+    interface, in headless mode, see HAL.cli)"""
     # -- get available modules
-    loaded_modules, loaded_modules_names = _getModules(self)
+    loaded_modules, loaded_modules_names = _getModules(self, headless, user_modules)
     # -- sort them
-    _sortModules(self, loaded_modules, loaded_modules_names)
+    _sortModules(self, loaded_modules, loaded_modules_names, headless)